@@ -14,6 +14,7 @@ NC='\033[0m'
 
 # General Server Variables/Configs
 DATASTORE="ipmi.json"                               # File for server names
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
 OUTFILE="cluster_liquid_leaks.csv"                  # File to save leak info
 PREFIX="tus1-p"                                     # Current naming prefix
 ENDPOINT="/redfish/v1/Chassis/1/Sensors/LiquidLeak" # Redfish leak endpoint
@@ -73,7 +74,7 @@ echo
 
 # Pulling list of names for ipmi.json
 # mapfile -t ARRAY < <(command ...)
-mapfile -t SERVER_NAMES < <(jq -r --arg p "$PREFIX" '.[] | select(.name | startswith($p)) | .name' "$DATASTORE")
+mapfile -t SERVER_NAMES < <("$INVENTORY" --ipmi "$DATASTORE" list --prefix "$PREFIX")
 # If no matching servers found then emit an empty header-only CSV
 if [[ ${#SERVER_NAMES[@]} -eq 0 ]]; then
   echo -e "${YELLOW}No servers found with prefix '${PREFIX}'.${NC}"
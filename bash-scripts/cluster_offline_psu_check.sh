@@ -3,6 +3,7 @@ set -euo pipefail
 
 ### ~~~ Script Directory and Cluster Variables ~~~ ###
 DATASTORE="ipmi.json"                               # File for server names
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
 OUTFILE="cluster_offline_psus.csv"                  # File to save leak info
 PREFIX="tus1-p"                                     # Current naming prefix
 
@@ -60,7 +61,7 @@ echo -e "  Output    : ${BOLD}${OUTFILE}${NC}"
 echo
 
 ### ~~~ Script Extracting Servers from ipmi.json ~~~ ###
-mapfile -t SERVER_NAMES < <(jq -r --arg p "$PREFIX" '.[] | select(.name | startswith($p)) | .name' "$DATASTORE")
+mapfile -t SERVER_NAMES < <("$INVENTORY" --ipmi "$DATASTORE" list --prefix "$PREFIX")
     
 ### ~~~ If ipmi.json is empty exit ~~~ ###
 if [[ ${#SERVER_NAMES[@]} -eq 0 ]]; then
@@ -8,6 +8,7 @@ set -euo pipefail
 ### ~~~ Script Directory and Cluster Variables ~~~ ###
 LOG_DIR="$1"
 DATASTORE="$2"                               # File for server names
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
 OUTFILE="cluster_liquid_leaks.csv"                  # File to save leak info
 PREFIX="tus1-p"                                     # Current naming prefix
 ENDPOINT="/redfish/v1/Chassis/1/Sensors/LiquidLeak" # Redfish leak endpoint
@@ -73,7 +74,7 @@ echo -e "  Output    : ${BOLD}${OUTFILE}${NC}"
 echo
 
 ### ~~~ Script Extracting Servers from ipmi.json ~~~ ###
-mapfile -t SERVER_NAMES < <(jq -r --arg p "$PREFIX" '.[] | select(.name | startswith($p)) | .name' "$DATASTORE")
+mapfile -t SERVER_NAMES < <("$INVENTORY" --ipmi "$DATASTORE" list --prefix "$PREFIX")
 TOTAL=${#SERVER_NAMES[@]}
 
 
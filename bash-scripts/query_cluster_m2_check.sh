@@ -4,6 +4,7 @@ set -euo pipefail
 ### ~~~ Script Directory and Cluster Variables ~~~ ###
 LOG_DIR="$1"
 DATASTORE="$2"                               # File for server names
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
 OUTFILE="cluster_failed_m2.csv"                  # File to save leak info
 ENDPOINT="/redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives/Disk.Bay.NUM"
 PREFIX="tus1-p"                                     # Current naming prefix
@@ -69,7 +70,7 @@ echo
 
 
 ### ~~~ Script Extracting Servers from ipmi.json ~~~ ###
-mapfile -t SERVER_NAMES < <(jq -r --arg p "$PREFIX" '.[] | select(.name | startswith($p)) | .name' "$DATASTORE")
+mapfile -t SERVER_NAMES < <("$INVENTORY" --ipmi "$DATASTORE" list --prefix "$PREFIX")
 TOTAL=${#SERVER_NAMES[@]}
 
 ### ~~~ If ipmi.json is empty exit ~~~ ###
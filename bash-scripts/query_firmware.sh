@@ -1,6 +1,7 @@
 #!/bin/bash
 NAME=${1}
 DATASTORE="ipmi.json"
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
 RED='\033[0;31m'
 GREEN='\033[0;32m'
 YELLOW='\033[0;33m'
@@ -42,7 +43,7 @@ if [ -z "$NAME" ] || [ "$NAME" == "--help" ] ; then
 " 1>&2
     exit 1
 fi
-IP=`jq -r ".[]| select(.name==\"$NAME\")|.ip" $DATASTORE`
+IP=$("$INVENTORY" --ipmi "$DATASTORE" get "$NAME" --fields ip)
 
 function redfish_with_retry(){
     _label=$1
@@ -1,16 +1,15 @@
 #!/bin/bash
 NAME=${1}
 DATASTORE="ipmi.json"
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
 
-IP=$(jq -r ".[]| select(.name==\"$NAME\")|.ip" $DATASTORE)
+IFS=$'\x1f' read -r IP IPMI_USER IPMI_PASS LAN_MAC < <("$INVENTORY" --ipmi "$DATASTORE" --sep $'\x1f' get "$NAME" --fields ip,username,password,lanmac)
 
 if [ -z "$IP" ]; then
     echo "Unable to determine IP for $NAME" 1>&2
     exit 1
 fi
-IPMI_USER=$(jq -r ".[]| select(.name==\"$NAME\")|.username" $DATASTORE)
-IPMI_PASS=$(jq -r ".[]| select(.name==\"$NAME\")|.password" $DATASTORE)
-LAN_MAC=$(jq -r ".[]| select(.name==\"$NAME\")|.lanmac" $DATASTORE | tr a-z A-Z)
+LAN_MAC=$(echo "$LAN_MAC" | tr a-z A-Z)
 
 ID=$IPMI_USER
 PW=$IPMI_PASS
@@ -1,6 +1,7 @@
 #!/bin/bash
 NAME=${1}
 DATASTORE="ipmi.json"
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
 RED='\033[0;31m'
 GREEN='\033[0;32m'
 YELLOW='\033[0;33m'
@@ -54,9 +55,7 @@ if [ -z "$NAME" ] || [ "$NAME" == "--help" ] ; then
 " 1>&2
     exit 1
 fi
-IP=`jq -r ".[]| select(.name==\"$NAME\")|.ip" $DATASTORE`
-RACK=`jq -r ".[]| select(.name==\"$NAME\")|.rack" $DATASTORE`
-RU=`jq -r ".[]| select(.name==\"$NAME\")|.ru" $DATASTORE`
+IFS=$'\x1f' read -r IP RACK RU < <("$INVENTORY" --ipmi "$DATASTORE" --sep $'\x1f' get "$NAME" --fields ip,rack,ru)
 
 ping -W 5 -c 1 ${IP} 2>/dev/null 1>/dev/null
 if [ "$?" == 0 ]; then
@@ -2,7 +2,9 @@
 # Get a server
 SERVER=${1}
 DATASTORE=""
-IP=`jq -r ".[]| select(.name==\"$SERVER\")|.ip" $DATASTORE`;
+INVENTORY="${INVENTORY:-$(dirname "$0")/../cluster_check/inventory.py}"   # indexed ipmi.json lookups
+PDU_DATASTORE="pdu_list.json"
+IFS=$'\x1f' read -r IP RACK RU < <("$INVENTORY" --ipmi "$DATASTORE" --pdu-list "$PDU_DATASTORE" --sep $'\x1f' get "$SERVER" --fields ip,rack,ru);
 
 ping -W 4 -c 4 ${IP} 2>/dev/null 1>/dev/null
 if [ "$?" != 0 ]; then
@@ -12,9 +14,6 @@ fi
 ## Server Up Check ##
 
 
-RACK=`jq -r ".[]| select(.name==\"$SERVER\")|.rack" $DATASTORE`
-RU=`jq -r ".[]| select(.name==\"$SERVER\")|.ru" $DATASTORE`
-
 RED='\033[0;31m'
 GREEN='\033[0;32m'
 YELLOW='\033[0;33m'
@@ -88,11 +87,14 @@ fi
 #echo -e "Position: ${POSITION}"
 
 ## PDU Check ##
-PDU_DATASTORE="pdu_list.json"
-IP_PDU_1=`jq -r ".[]| select(.name==\"$PDU_1\")|.ip" $PDU_DATASTORE`;
-IP_PDU_2=`jq -r ".[]| select(.name==\"$PDU_2\")|.ip" $PDU_DATASTORE`;
-IP_PDU_3=`jq -r ".[]| select(.name==\"$PDU_3\")|.ip" $PDU_DATASTORE`;
-IP_PDU_4=`jq -r ".[]| select(.name==\"$PDU_4\")|.ip" $PDU_DATASTORE`;
+declare -A RACK_PDU_IPS=()
+while IFS=$'\x1f' read -r PDU_NAME PDU_IP; do
+  RACK_PDU_IPS[$PDU_NAME]=$PDU_IP
+done < <("$INVENTORY" --ipmi "$DATASTORE" --pdu-list "$PDU_DATASTORE" --sep $'\x1f' pdus "$RACK")
+IP_PDU_1=${RACK_PDU_IPS[$PDU_1]:-}
+IP_PDU_2=${RACK_PDU_IPS[$PDU_2]:-}
+IP_PDU_3=${RACK_PDU_IPS[$PDU_3]:-}
+IP_PDU_4=${RACK_PDU_IPS[$PDU_4]:-}
 ## PDU Check ##
 
 
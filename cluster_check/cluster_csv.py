@@ -0,0 +1,268 @@
+"""
+Async replacements for the bash cluster checks. Each subcommand writes the same
+CSV file and console lines as the script it replaces:
+
+    leak   query_cluster_liquid_leak_check.sh   -> cluster_liquid_leaks.csv
+    nvme   query_cluster_nvme_check.sh          -> cluster_failed_nvme.csv
+    m2     query_cluster_m2_check.sh            -> cluster_failed_m2.csv
+    psu    cluster_offline_psu_check.sh         -> cluster_offline_psus.csv
+
+The scripts fork bash, redfishcmd, jq, awk and flock for every host under
+xargs -P4; here one process drives the whole fleet through RedfishClient with
+hundreds of requests in flight. Rows are written sorted by server name.
+
+Usage:
+    python cluster_csv.py leak LOG_DIR ipmi.json
+    python cluster_csv.py psu LOG_DIR ipmi.json --prefix tus1-p --concurrency 400
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import inventory
+from cluster_ttt import drive_hosts
+from redfish_ttt import POWER_PATH, POWER_SUPPLIES, ClientConfig, Field, Projection, RedfishClient
+
+# Same escape codes as the bash coloring template
+RED = "\033[0;31m"
+GREEN = "\033[0;32m"
+YELLOW = "\033[0;33m"
+BOLD = "\033[1m"
+NC = "\033[0m"
+
+Node = Dict[str, Any]
+Row = List[Any]
+# (console line or None, CSV row or None)
+Outcome = Tuple[Optional[str], Optional[Row]]
+
+# ----------- Redfish fields (same as the scripts' jq filters) ----------- #
+LEAK_PATH = "/redfish/v1/Chassis/1/Sensors/LiquidLeak"
+NVME_PATH = "/redfish/v1/Chassis/1/PCIeDevices/NVMeSSD{}"
+M2_PATH = "/redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives/Disk.Bay.{}"
+
+LEAK_SENSOR = Projection(Field("value", "Oem/Supermicro/SensorValue"))
+NVME_SN_HEALTH = Projection(Field("sn", "SerialNumber"), Field("health", "Status/Health"))
+M2_SN_HEALTH = Projection(
+    Field("sn", "SerialNumber"),
+    Field("health", "Status/Health"),
+    Field("other_err_count", "Oem/Supermicro/OtherErrCount", type="any"),
+    Field("media_err_count", "Oem/Supermicro/MediaErrCount", type="any"),
+)
+
+def _s(v: Any) -> str:
+    """jq '// ""' then @tsv: missing -> "", everything else as text."""
+    return "" if v is None else str(v)
+
+# ----------- Checks ----------- #
+async def check_leak(rf: RedfishClient, node: Node) -> Outcome:
+    name = node["name"]
+    doc = await rf.fetch(node["ip"], LEAK_PATH, LEAK_SENSOR, username=node["username"], password=node["password"])
+    if doc is None:
+        return f"{YELLOW}{name}{NC} -- {BOLD}Failed to connect{NC}", [name, "missing/empty"]
+    value = doc["value"]
+    if not value:
+        return f"{YELLOW}{name}{NC} -- Sensor value {YELLOW}missing/empty{NC}", [name, "missing/empty"]
+    if "leakage detected" in value:
+        return f"{RED}{name}{NC} -- {BOLD}Leak Detected{NC}", [name, "Leak detected"]
+    return None, None
+
+async def check_nvme(rf: RedfishClient, node: Node) -> Outcome:
+    name = node["name"]
+    docs = await rf.fetch_many(
+        node["ip"], [NVME_PATH.format(i) for i in range(1, 5)], NVME_SN_HEALTH,
+        username=node["username"], password=node["password"],
+    )
+    row: Row = [name]
+    bad = False
+    for d in docs:
+        # Unreachable/absent drives stay blank and don't count as bad
+        sn, health = (_s(d["sn"]), _s(d["health"])) if d is not None else ("", "")
+        row += [sn, health]
+        if d is not None and ("UNKNOWN" in sn or "OK" not in health):
+            bad = True
+    if not bad:
+        return None, None
+    return None, row + ["potential nvme drive bad"]
+
+async def check_m2(rf: RedfishClient, node: Node) -> Outcome:
+    name = node["name"]
+    docs = await rf.fetch_many(
+        node["ip"], [M2_PATH.format(i) for i in range(2)], M2_SN_HEALTH,
+        username=node["username"], password=node["password"],
+    )
+    row: Row = [name]
+    bad = errors = False
+    for d in docs:
+        if d is None:
+            row += ["", "", "", ""]
+            continue
+        sn, health = _s(d["sn"]), _s(d["health"])
+        other, media = _s(d["other_err_count"]), _s(d["media_err_count"])
+        row += [sn, health, other, media]
+        if "UNKNOWN" in sn or "OK" not in health:
+            bad = True
+        elif other != "0" or media != "0":
+            errors = True
+    if bad:
+        return None, row + ["potential m2 drive bad"]
+    if errors:
+        return None, row + ["possible m2 drive errors detected"]
+    return None, None
+
+def _below_100v(psu: Any) -> bool:
+    # jq: (.LineInputVoltage < 100) is also true for null
+    v = psu.get("LineInputVoltage") if isinstance(psu, dict) else None
+    return v is None or (isinstance(v, (int, float)) and not isinstance(v, bool) and v < 100)
+
+async def check_psu(rf: RedfishClient, node: Node) -> Outcome:
+    name = node["name"]
+    doc = await rf.fetch(node["ip"], POWER_PATH, POWER_SUPPLIES, username=node["username"], password=node["password"])
+    if doc is None:
+        return f"{YELLOW}{name}{NC} -- Failed to connect", None
+    supplies = doc["supplies"] if isinstance(doc["supplies"], list) else []
+    n_bad = sum(1 for p in supplies if _below_100v(p))
+    if n_bad == 0:
+        return None, None
+    rack = _s(node.get("rack")) or "???"
+    ru = _s(node.get("ru")) or "??"
+    status = "PSUs at 0v: " + ("1 PSU" if n_bad == 1 else f"{n_bad} PSUs")
+    console = f"{RED}{name}{NC} ({BOLD}Rack:{NC} {rack}, {BOLD}RU:{NC} {ru}) -- {BOLD}{status}{NC}"
+    return console, [name, rack, ru, "0v PSU detected"]
+
+@dataclass(frozen=True)
+class CsvCheck:
+    name: str                                           # subcommand
+    fn: Callable[[RedfishClient, Node], Awaitable[Outcome]]
+    banner: str
+    endpoint: str
+    outfile: str
+    header: str
+    summary: str                                        # label of the count in the "Done!" block
+    counts: Callable[[Row], bool] = lambda row: True    # which CSV rows the summary counts
+
+CSV_CHECKS: Dict[str, CsvCheck] = {c.name: c for c in (
+    CsvCheck(
+        "leak", check_leak, "Scanning for leaks..", LEAK_PATH, "cluster_liquid_leaks.csv",
+        "name,status", "Leaks Detected", counts=lambda row: row[-1] == "Leak detected",
+    ),
+    CsvCheck(
+        "nvme", check_nvme, "Scanning for failed NVMe Drives...", NVME_PATH.format("[NUM]"), "cluster_failed_nvme.csv",
+        "name,nvme-ssd1-sn,nvme-ssd1-health,nvme-ssd2-sn,nvme-ssd2-health,"
+        "nvme-ssd3-sn,nvme-ssd3-health,nvme-ssd4-sn,nvme-ssd4-health,status",
+        "Failed NVMe Drives",
+    ),
+    CsvCheck(
+        "m2", check_m2, "Scanning for failed M2 Drives...", M2_PATH.format("NUM"), "cluster_failed_m2.csv",
+        "name,m2-ssd1-sn,m2-ssd1-health,m2-ssd1-othererrcount,m2-ssd1-mediaerrcount,"
+        "m2-ssd2-sn,m2-ssd2-health,m2-ssd2-othererrcount,m2-ssd2-mediaerrcount,status",
+        "Failed M2 Drives",
+    ),
+    CsvCheck(
+        "psu", check_psu, "Scanning for offline PSUs..", POWER_PATH, "cluster_offline_psus.csv",
+        "name,rack,ru,status", "Failed PSUs",
+    ),
+)}
+
+# ----------- Runner ----------- #
+async def run_csv_check(
+    check: CsvCheck,
+    log_dir: str,
+    datastore: str,
+    prefix: str = "tus1-p",
+    max_concurrency: int = 400,
+    workers: Optional[int] = None,
+    scheme: str = "https",
+) -> int:
+    """Run one check over every server matching prefix. Returns the summary count."""
+    out_path = os.path.join(log_dir, check.outfile)
+    print(f"{BOLD}{check.banner}{NC}")
+    print(f"  Prefix    : {BOLD}{prefix}{NC}")
+    print(f"  Endpoint : {BOLD}{check.endpoint}{NC}")
+    print(f"  Output    : {BOLD}{check.outfile}{NC}")
+    print()
+
+    servers = inventory.load(datastore).with_prefix(prefix)
+    if not servers:
+        print(f"{YELLOW}No servers found with prefix '{prefix}'.{NC}")
+        with open(out_path, "w") as fh:
+            fh.write(check.header + "\n")
+        return 0
+
+    cfg = ClientConfig(
+        verify_ssl=False,
+        max_retries=2,
+        per_request_semaphore=asyncio.Semaphore(max_concurrency),
+        conn_limit=max_concurrency,
+        scheme=scheme,
+        discovery=False,
+    )
+    rows: List[Row] = []
+
+    async with RedfishClient(cfg) as rf:
+        async def one(node: Node) -> Outcome:
+            try:
+                return await check.fn(rf, node)
+            except Exception as e:
+                return f"{YELLOW}{node['name']}{NC} -- Failed to connect ({type(e).__name__})", None
+
+        async def on_outcome(outcome: Outcome) -> None:
+            console, row = outcome
+            if console is not None:
+                print(console)
+            if row is not None:
+                rows.append(row)
+
+        n_workers = max(1, min(workers or max_concurrency, len(servers)))
+        await drive_hosts(((n,) for n in servers), n_workers, one, on_outcome)
+
+    rows.sort(key=lambda r: r[0])
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(check.header + "\n")
+        fh.writelines(",".join(_s(v) for v in row) + "\n" for row in rows)
+    os.replace(tmp, out_path)
+
+    count = sum(1 for row in rows if check.counts(row))
+    print()
+    print(f"{BOLD}Done!{NC} Checked {BOLD}{len(servers)}{NC} servers.")
+    print(f"  {RED}{check.summary}:{NC} {BOLD}{count}{NC}")
+    print(f"  CSV Written to: {BOLD}{out_path}{NC}")
+    return count
+
+# ---------- cli ----------
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Cluster-wide Redfish checks with the bash scripts' CSV outputs")
+    sub = ap.add_subparsers(dest="check", required=True)
+    for c in CSV_CHECKS.values():
+        p = sub.add_parser(c.name, help=f"{c.banner.rstrip('.')} -> {c.outfile}")
+        p.add_argument("log_dir", help="Directory the CSV is written to")
+        p.add_argument("datastore", nargs="?", default="ipmi.json", help="Path to ipmi.json")
+        p.add_argument("--prefix", default="tus1-p", help="Server name prefix")
+        p.add_argument("--concurrency", type=int, default=400, help="Max in-flight Redfish requests")
+        p.add_argument("--workers", type=int, default=None, help="Hosts checked at once (default: --concurrency)")
+        p.add_argument("--scheme", choices=["https", "http"], default="https", help="http only for the simulator")
+    return ap.parse_args()
+
+def main():
+    a = parse_args()
+    if not os.path.isdir(a.log_dir):
+        print(f"{RED}Missing log directory:{NC} {a.log_dir}")
+        sys.exit(1)
+    if not os.path.isfile(a.datastore):
+        print(f"{RED}Missing datastore:{NC} {a.datastore}")
+        sys.exit(1)
+    t0 = time.time()
+    asyncio.run(run_csv_check(
+        CSV_CHECKS[a.check], a.log_dir, a.datastore, a.prefix, a.concurrency, a.workers, a.scheme,
+    ))
+    print(f"  Duration: {BOLD}{time.time() - t0:.2f}{NC} seconds")
+
+if __name__ == "__main__":
+    main()
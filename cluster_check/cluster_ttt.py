@@ -4,84 +4,276 @@ import time
 import argparse
 from tqdm import tqdm
 import asyncio
-from typing import List, Tuple, Dict, Any
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, List, Tuple, Dict, Any, Optional
 
+import inventory
 from redfish_ttt import RedfishClient, ClientConfig
+from redfish_common import JSON_BACKEND  # importable once redfish_ttt has put redfish_pdu_exporter on sys.path
+from ttt_state import StateStore
 # Used for looping through the cluster
 # Assumes IPMI.json formatting
 
 # ----------- Server Inventory ----------- #
 
 def load_ipmi_json(datastore_json_file: str, server_prefix: str, pdu_prefix: str) -> List[Tuple[str, str, str, str]]:
-    with open(datastore_json_file, 'r') as file_handle:
-        ipmi_list = json.load(file_handle)
-    servers = []
-    for node in ipmi_list:
-        n = node.get("name", "")
-        if server_prefix in n and pdu_prefix not in n:
-            #print(f"name: {node['name']}, ip: {node['ip']}, ")
-            servers.append((n, node.get("ip"), node.get("username"), node.get("password")))
-    return servers
+    # Indexed lookup (see inventory.py); the index is rebuilt only when ipmi.json changes
+    inv = inventory.load(datastore_json_file, pdu_prefix=pdu_prefix)
+    return [
+        (node["name"], node.get("ip"), node.get("username"), node.get("password"))
+        for node in inv.with_prefix(server_prefix)
+    ]
 
 
 # ----------- Checks Registry ----------- #
-async def run_checks(rf: RedfishClient, ip: str, user: str, pw: str) -> Dict[str, Any]:
+CheckFn = Callable[[RedfishClient, str, str, str], Awaitable[Any]]
+
+@dataclass(frozen=True)
+class Check:
+    name: str                     # CLI name (--checks)
+    key: str                      # stable key in the JSONL "checks" object
+    fn: CheckFn                   # (rf, ip, user, pw) -> dict | list | None
+    timeout_s: float              # budget for the whole check, retries included
+    cost: int = 1                 # estimated Redfish GETs per host
+    depends: Tuple[str, ...] = () # checks that must succeed first (pulled in automatically)
+    enabled: bool = True          # part of the default set when --checks is not given
+
+CHECKS: Dict[str, Check] = {}
+
+def register_check(
+    name: str,
+    *,
+    key: Optional[str] = None,
+    timeout_s: float = 15.0,
+    cost: int = 1,
+    depends: Tuple[str, ...] = (),
+    enabled: bool = True,
+) -> Callable[[CheckFn], CheckFn]:
+    """Decorator adding a check plugin to CHECKS. Importing a module with more checks is enough to add them."""
+    def deco(fn: CheckFn) -> CheckFn:
+        if name in CHECKS:
+            raise ValueError(f"check {name!r} already registered")
+        CHECKS[name] = Check(name, key or name, fn, timeout_s, cost, tuple(depends), enabled)
+        return fn
+    return deco
+
+def select_checks(names: Optional[List[str]] = None) -> List[Check]:
     """
-    Add new checks here keeping return keys stable
-    Each check should return a dict or none
+    Resolve --checks names (None = every enabled check) plus their dependencies.
+    Dependencies come before dependents; otherwise registry order.
     """
-    results: Dict[str, Any] = {}
-    
-    # 1. Liquid Leak Check
-    try:
-        ll = await rf.get_liquid_leak(ip=ip, username=user, password=pw)
-        results["liquid_leak"] = ll
-    except Exception as e:
-        results["liquid_leak"] = None
-        results.setdefault("_errors", []).append(f"liquid_leak:{type(e).__name__}")
-    
-    # 2. M2 Health Check
-    try:
-        ll = await rf.get_m2_health(ip=ip, username=user, password=pw)
-        results["m2_drives"] = ll
-    except Exception as e:
-        results["m2_drives"] = None
-        results.setdefault("_errors", []).append(f"m2_drives:{type(e).__name__}")
-    
-    # 3. NVME Health Check
-    try:
-        ll = await rf.get_nvme_health(ip=ip, username=user, password=pw)
-        results["nvme_drives"] = ll
-    except Exception as e:
-        results["nvme_drives"] = None
-        results.setdefault("_errors", []).append(f"nvme_drives:{type(e).__name__}")
-    
-    # 4. Memory Health Check
+    wanted = [c.name for c in CHECKS.values() if c.enabled] if names is None else names
+    unknown = [n for n in wanted if n not in CHECKS]
+    if unknown:
+        raise ValueError(f"unknown check(s): {', '.join(unknown)} (known: {', '.join(CHECKS)})")
+    ordered: List[Check] = []
+    seen: set = set()
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if name in path:
+            raise ValueError(f"check dependency cycle: {' -> '.join(path + (name,))}")
+        if name in seen:
+            return
+        if name not in CHECKS:
+            raise ValueError(f"check {path[-1]!r} depends on unknown check {name!r}")
+        for dep in CHECKS[name].depends:
+            visit(dep, path + (name,))
+        seen.add(name)
+        ordered.append(CHECKS[name])
+
+    for n in wanted:
+        visit(n, ())
+    return ordered
+
+@register_check("liquid_leak", timeout_s=10.0, cost=1)
+async def check_liquid_leak(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_liquid_leak(ip=ip, username=user, password=pw)
+
+@register_check("m2", key="m2_drives", timeout_s=15.0, cost=2)
+async def check_m2(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_m2_health(ip=ip, username=user, password=pw)
+
+@register_check("nvme", key="nvme_drives", timeout_s=15.0, cost=4)
+async def check_nvme(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_nvme_health(ip=ip, username=user, password=pw)
+
+@register_check("memory", key="dimm_slots", timeout_s=30.0, cost=24)
+async def check_memory(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_memory_health(ip=ip, username=user, password=pw)
+
+@register_check("psu", key="power_supplies", timeout_s=10.0, cost=1)
+async def check_psu(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_psu_health(ip=ip, username=user, password=pw)
+
+@register_check("cpu", key="cpus", timeout_s=15.0, cost=1)
+async def check_cpu(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_cpu_health(ip=ip, username=user, password=pw)
+
+# GPU and NIC adapters both come from the PCIeDevices collection; the client shares one read per host
+@register_check("gpu", key="gpus", timeout_s=15.0, cost=1)
+async def check_gpu(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_gpu_health(ip=ip, username=user, password=pw)
+
+@register_check("nic", key="nics", timeout_s=15.0, cost=1)
+async def check_nic(rf: RedfishClient, ip: str, user: str, pw: str) -> Any:
+    return await rf.get_nic_health(ip=ip, username=user, password=pw)
+
+async def _run_check(rf: RedfishClient, check: Check, ip: str, user: str, pw: str) -> Tuple[Any, Optional[str], float]:
+    """Returns (result, error tag or None, duration ms)."""
+    t0 = time.perf_counter()
     try:
-        ll = await rf.get_memory_health(ip=ip, username=user, password=pw)
-        results["dimm_slots"] = ll
+        result = await asyncio.wait_for(check.fn(rf, ip, user, pw), timeout=check.timeout_s)
+        err = None
     except Exception as e:
-        results["dimm_slots"] = None
-        results.setdefault("_errors", []).append(f"dimm_slots:{type(e).__name__}")
-
-    # -- Future -- #
-    # 2. CPU
-    # 3. HDD/SSD
-    # 4. Memory
-    # 5. NIC
-    # 6. GPU
-    # 7. Power
+        result, err = None, f"{check.key}:{type(e).__name__}"
+    return result, err, (time.perf_counter() - t0) * 1000.0
+
+async def run_checks(
+    rf: RedfishClient, ip: str, user: str, pw: str, checks: Optional[List[Check]] = None
+) -> Dict[str, Any]:
+    """
+    Run checks (default: select_checks()) concurrently for one host.
+    A check waits for its dependencies and is skipped (DependencyFailed) if any
+    errored or returned None. Keys keep the given order; per-check wall time
+    goes in "_durations_ms", failures in "_errors".
+    """
+    if checks is None:
+        checks = select_checks()
+    tasks: Dict[str, asyncio.Future] = {}
+
+    async def run(check: Check) -> Tuple[Any, Optional[str], float]:
+        if check.depends:
+            deps = await asyncio.gather(*(tasks[d] for d in check.depends))
+            if any(err is not None or result is None for result, err, _ in deps):
+                return None, f"{check.key}:DependencyFailed", 0.0
+        return await _run_check(rf, check, ip, user, pw)
+
+    # Launch the expensive checks first so they set the host's critical path
+    for check in sorted(checks, key=lambda c: -c.cost):
+        tasks[check.name] = asyncio.ensure_future(run(check))
+    await asyncio.gather(*tasks.values())
+
+    results: Dict[str, Any] = {}
+    durations: Dict[str, float] = {}
+    for check in checks:
+        result, err, ms = tasks[check.name].result()
+        results[check.key] = result
+        durations[check.key] = round(ms, 1)
+        if err is not None:
+            results.setdefault("_errors", []).append(err)
+    results["_durations_ms"] = durations
     return results
 
 # ----------- Runner ----------- #
+# ----------- Streaming driver ----------- #
+async def _feed_hosts(hosts: "asyncio.Queue", servers, workers: int) -> None:
+    for item in servers:
+        await hosts.put(item)   # blocks while the worker pool is saturated
+    for _ in range(workers):
+        await hosts.put(None)
+
+async def drive_hosts(
+    servers: Iterable[Tuple[Any, ...]],
+    workers: int,
+    fn: Callable[..., Awaitable[Any]],
+    on_result: Callable[[Any], Awaitable[None]],
+) -> None:
+    """
+    Run fn(*server) for every server on a pool of `workers` coroutines and pass each
+    result to on_result as it completes. Live tasks stay at `workers` for any fleet size.
+    """
+    hosts: asyncio.Queue = asyncio.Queue(maxsize=2 * workers)
+
+    async def worker() -> None:
+        while True:
+            item = await hosts.get()
+            if item is None:
+                return
+            await on_result(await fn(*item))
+
+    await _all_or_cancel([_feed_hosts(hosts, servers, workers)] + [worker() for _ in range(workers)])
+
+async def _all_or_cancel(coros: List[Awaitable[Any]]) -> None:
+    """
+    Run coros as tasks until all finish. If one raises (or the caller is
+    cancelled) the others are cancelled instead of being left blocked on a
+    queue nobody serves, and the first error is re-raised.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for t in tasks:
+        if not t.cancelled() and t.exception() is not None:
+            raise t.exception()
+
+async def _write_batches(fh, lines: "asyncio.Queue", batch: int) -> int:
+    """Drain result lines and write them in batches (one write+flush per drain). Returns lines written."""
+    written = 0
+    while True:
+        line = await lines.get()
+        done = line is None
+        buf = [] if done else [line]
+        while not done and len(buf) < batch:
+            try:
+                line = lines.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if line is None:
+                done = True
+            else:
+                buf.append(line)
+        if buf:
+            fh.write("\n".join(buf) + "\n")
+            fh.flush()
+            written += len(buf)
+        if done:
+            return written
+
 async def sweep(
     datastore_json_file: str,
     server_prefix: str,
     pdu_prefix: str,
     out_path: str,
     max_concurrency: int = 400,
+    per_host_qps: Optional[float] = None,
+    per_host_burst: Optional[float] = None,
+    scheme: str = "https",
+    per_host_concurrency: Optional[int] = None,
+    checks: Optional[List[str]] = None,
+    discovery: bool = True,
+    inventory_cache: Optional[str] = None,
+    inventory_ttl_s: float = 24 * 3600.0,
+    state_db: Optional[str] = None,
+    delta: bool = False,
+    fresh_s: Optional[float] = None,
+    workers: Optional[int] = None,
+    write_batch: int = 512,
 ) -> None:
+    """
+    Hosts are streamed through a pool of `workers` coroutines (default
+    max_concurrency), so the number of live tasks does not grow with the fleet.
+    Results go through a queue to a single writer that flushes in batches.
+
+    state_db enables incremental mode: delta=True writes only hosts with changed
+    checks (and only those checks), fresh_s skips hosts whose latest result
+    for every selected check was clean and is younger than fresh_s seconds.
+    """
     servers = load_ipmi_json(datastore_json_file, server_prefix, pdu_prefix)
+    store = StateStore(state_db) if state_db else None
+    selected = select_checks(checks)
+    skipped = 0
+    if store is not None and fresh_s:
+        fresh = store.fresh_hosts(fresh_s, [c.key for c in selected])
+        skipped = sum(1 for s in servers if s[0] in fresh)
+        servers = [s for s in servers if s[0] not in fresh]
+    print(
+        f"[Checks] {', '.join(c.name for c in selected)} | "
+        f"~{sum(c.cost for c in selected)} requests per server"
+    )
     cfg = ClientConfig(
         connect_timeout_s=2.0,
         read_timeout_s=4.0,
@@ -89,16 +281,24 @@ async def sweep(
         verify_ssl=False,
         max_retries=2,
         per_request_semaphore=asyncio.Semaphore(max_concurrency),
+        conn_limit=max_concurrency,
+        per_host_qps=per_host_qps,
+        per_host_burst=per_host_burst,
+        per_host_concurrency=per_host_concurrency,
+        scheme=scheme,
+        discovery=discovery,
+        discovery_cache_path=inventory_cache or None,
+        discovery_ttl_s=inventory_ttl_s,
     )
     # JSONL output
     # One line per host: {"ts":..., "name":..., "ip":..., "status":"ok|fail", "checks":{...}}
     async with RedfishClient(cfg) as rf:
         # Write as results complete (as_completed) to avoid holding everything in memory
-        async def do_one(name: str, ip: str, user: str, pw: str) -> str:
+        async def do_one(name: str, ip: str, user: str, pw: str) -> Optional[str]:
             t0 = time.time()
             status = "ok"
             try:
-                checks = await run_checks(rf, ip, user, pw)
+                checks = await run_checks(rf, ip, user, pw, selected)
             except Exception as e:
                 status = "fail"
                 checks = {"_errors": [f"runner:{type(e).__name__}"]}
@@ -109,23 +309,72 @@ async def sweep(
                 "status": status,
                 "checks": checks,
             }
+            if store is not None:
+                changes = store.apply(name, ip, t0, status, checks)
+                if delta:
+                    if not changes:
+                        return None
+                    rec["changes"] = changes
+                    rec["checks"] = {k: v for k, v in checks.items() if k in changes or k.startswith("_")}
             return json.dumps(rec, separators=(",", ":"), sort_keys=False)
 
-        tasks = [do_one(n, ip, u, p) for (n, ip, u, p) in servers]
+        n_workers = max(1, min(workers or max_concurrency, len(servers) or 1))
+        lines: asyncio.Queue = asyncio.Queue(maxsize=4 * write_batch)
 
         start = time.time()
+        written = 0
 
         # Append mode so multiple sweeps can be concatenated
-        with open(out_path, "a", buffering=1) as fh:
-            # tqdm progress bar over total number of servers
-            with tqdm(total=len(tasks), desc="Liquid leak sweep", unit="server") as pbar:
-                for fut in asyncio.as_completed(tasks):
-                    line = await fut
-                    fh.write(line + "\n")
-                    pbar.update(1)   # <- bump bar for each completed host
-        
+        try:
+            with open(out_path, "a") as fh:
+                # tqdm progress bar over total number of servers
+                with tqdm(total=len(servers), desc="TTT sweep", unit="server") as pbar:
+                    async def on_line(line: Optional[str]) -> None:
+                        if line is not None:
+                            await lines.put(line)
+                        pbar.update(1)   # <- bump bar for each completed host
+
+                    writer = asyncio.create_task(_write_batches(fh, lines, write_batch))
+                    pool = asyncio.create_task(drive_hosts(servers, n_workers, do_one, on_line))
+                    try:
+                        await asyncio.wait((pool, writer), return_when=asyncio.FIRST_COMPLETED)
+                        if writer.done():
+                            # The writer only stops early on an error: stop the pool, which would block on `lines`
+                            pool.cancel()
+                            await asyncio.gather(pool, return_exceptions=True)
+                            writer.result()
+                        await pool
+                    finally:
+                        if not pool.done():
+                            pool.cancel()
+                            await asyncio.gather(pool, return_exceptions=True)
+                        if not writer.done():
+                            # Let the writer flush what the pool produced before stopping it
+                            await lines.put(None)
+                            written = await writer
+        finally:
+            if rf.inventory is not None:
+                rf.inventory.save()
+            if store is not None:
+                store.close()
+
         end = time.time()
         print(f"[Sweep Completed] Servers: {len(servers)} | Duration {end - start:.2f} seconds")
+        if store is not None:
+            print(f"[State] Records written: {written} | Unchanged: {len(servers) - written} | Skipped fresh: {skipped}")
+        if rf.inventory is not None:
+            print(f"[Discovery] Cache hits: {rf.inventory.hits} | Hosts walked: {rf.inventory.walks}")
+        if rf.rate_limiter is not None:
+            stats = rf.rate_limiter.stats.values()
+            n = sum(st.count for st in stats)
+            waited = sum(st.total_s for st in stats)
+            print(f"[Rate Limit] Requests: {n} | Mean wait {waited / max(n, 1):.3f} seconds")
+        ds = rf.decode_stats
+        print(
+            f"[JSON Decode] Backend: {JSON_BACKEND} | Responses: {ds.count} | "
+            f"Mean {ds.total_s / max(ds.count, 1) * 1e6:.0f} us | "
+            f"Fallbacks: {ds.fallbacks} | Failures: {ds.failures}"
+        )
 # ---------- cli ----------
 
 def parse_args():
@@ -135,11 +384,50 @@ def parse_args():
     ap.add_argument("--pdu-prefix", default="tus1-pdu", help="PDU name prefix to exclude")
     ap.add_argument("--out", default="ttt.jsonl", help="Output JSONL log file")
     ap.add_argument("--concurrency", type=int, default=400, help="Max concurrent requests")
-    return ap.parse_args()
+    ap.add_argument("--per-host-qps", type=float, default=None, help="Per-BMC request rate limit (token bucket)")
+    ap.add_argument("--per-host-burst", type=float, default=None, help="Per-BMC token bucket size")
+    ap.add_argument("--scheme", default="https", choices=("https", "http"), help="http only for the local simulator")
+    ap.add_argument("--per-host-concurrency", type=int, default=0, help="Max in-flight requests per BMC (0 = unlimited)")
+    ap.add_argument("--checks", default=None, help="Comma list of checks to run (default: all enabled); see --list-checks")
+    ap.add_argument("--list-checks", action="store_true", help="List registered checks and exit")
+    ap.add_argument("--no-discovery", action="store_true", help="Probe fixed DIMM/NVMe/M.2 slots instead of walking Members collections")
+    ap.add_argument("--inventory-cache", default=None,
+                    help="Discovered inventory cache file (default: .<ipmi>.ttt_inventory.json next to --ipmi, '' = don't persist)")
+    ap.add_argument("--inventory-ttl-hours", type=float, default=24.0, help="Rediscover hosts whose cached inventory is older than this")
+    ap.add_argument("--workers", type=int, default=None, help="Hosts swept at once (default: --concurrency)")
+    ap.add_argument("--state-db", default=None, help="SQLite state store for incremental sweeps (implied by --delta/--fresh-minutes)")
+    ap.add_argument("--delta", action="store_true", help="Only write hosts whose checks changed state or result")
+    ap.add_argument("--fresh-minutes", type=float, default=None, help="Skip hosts whose selected checks all have a clean result younger than this")
+    a = ap.parse_args()
+    if a.inventory_cache is None:
+        a.inventory_cache = inventory.sidecar_path(a.ipmi, "ttt_inventory.json")
+    if a.state_db is None and (a.delta or a.fresh_minutes):
+        a.state_db = "ttt_state.sqlite"
+    if a.checks is not None:
+        a.checks = [c.strip() for c in a.checks.split(",") if c.strip()]
+        try:
+            select_checks(a.checks)
+        except ValueError as e:
+            ap.error(str(e))
+    return a
+
+def list_checks() -> None:
+    print(f"{'name':<14} {'key':<14} {'cost':>4} {'timeout':>8}  {'enabled':<8} depends")
+    for c in CHECKS.values():
+        print(f"{c.name:<14} {c.key:<14} {c.cost:>4} {c.timeout_s:>7.0f}s  {str(c.enabled):<8} {','.join(c.depends) or '-'}")
 
 async def main_async():
     a = parse_args()
-    await sweep(a.ipmi, a.server_prefix, a.pdu_prefix, a.out, a.concurrency)
+    if a.list_checks:
+        list_checks()
+        return
+    await sweep(
+        a.ipmi, a.server_prefix, a.pdu_prefix, a.out, a.concurrency,
+        a.per_host_qps, a.per_host_burst, a.scheme, a.per_host_concurrency or None,
+        a.checks, not a.no_discovery, a.inventory_cache, a.inventory_ttl_hours * 3600.0,
+        a.state_db, a.delta, a.fresh_minutes * 60.0 if a.fresh_minutes else None,
+        a.workers,
+    )
 
 def main():
     asyncio.run(main_async())
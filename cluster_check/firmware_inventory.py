@@ -0,0 +1,332 @@
+"""
+Fleet firmware inventory, replacing bash-scripts/query_firmware.sh.
+
+query_firmware.sh audits one server per run (the usage text suggests looping
+it over `for i in {001..054}`), forks redfishcmd and jq for every field and
+sleeps 5 s between retries. This sweep reads every server matching the prefix
+through one RedfishClient and writes the script's columns:
+
+    Name, BIOS Version, TW Bios Settings, BMC Version, GPU Version, then per
+    System Slot 1..11: Manufacturer, Model, Firmware Version, MAC Address,
+    PortCount, P1 LinkStatus, P1 CurrentSpeedGbps
+
+Per server the firmware resources and the expanded PCIeDevices collection are
+read together, then each populated slot's ports, PCIe function and Ethernet
+interface. Every GET is conditional against the --etag-cache file (by default
+kept next to --ipmi): a BMC that sends ETag/Last-Modified answers 304 for
+resources that haven't changed and the cached body is reused, so a repeat
+audit transfers little beyond link state.
+
+Rows stream to --out as servers complete (in completion order). A .parquet
+--out writes Parquet row groups instead of CSV (needs pyarrow).
+
+Usage:
+    python firmware_inventory.py --ipmi ipmi.json --out firmware_inventory.csv
+    python firmware_inventory.py --server-prefix tw0 --out firmware.parquet
+    python firmware_inventory.py tw001 tw002 --out two.csv
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import inventory
+from cluster_ttt import drive_hosts
+from redfish_ttt import MEMBERS, PCIE_COLLECTION, ClientConfig, Field, Projection, RedfishClient
+
+try:
+    import pyarrow as pa  # optional: only needed for .parquet output
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+SLOT_COUNT = 11
+
+Node = Dict[str, Any]
+Row = List[Any]
+
+# ----------- Redfish fields (same as the script's jq filters) ----------- #
+BIOS_FW_PATH = "/redfish/v1/UpdateService/FirmwareInventory/BIOS"
+BMC_PATH = "/redfish/v1/Managers/1"
+GPU_BUNDLE_PATH = "/redfish/v1/UpdateService/FirmwareInventory/bundle_active"
+BIOS_SETTINGS_PATH = "/redfish/v1/Systems/1/Bios"
+PORTS_PATH = "/redfish/v1/Chassis/1/NetworkAdapters/{}/Ports"
+
+BIOS_VERSION = Projection(Field("version", "Version"))
+BMC_VERSION = Projection(Field("version", "FirmwareVersion"))
+GPU_VERSION = Projection(Field("version", "Oem/AMD/VersionID/ComponentDetails"))
+BIOS_SETTINGS = Projection(Field("smt", "Attributes/SMTControl"))
+
+SLOT_DEVICE = Projection(
+    Field("slot", "Slot/Location/PartLocation/ServiceLabel"),
+    Field("manufacturer", "Manufacturer"),
+    Field("model", "Model"),
+    Field("firmware", "FirmwareVersion"),
+    Field("functions", "PCIeFunctions/@odata.id"),
+)
+PORT = Projection(Field("link", "LinkStatus"), Field("speed_gbps", "CurrentSpeedGbps", type="float"))
+PCIE_FUNCTION = Projection(Field("eth", "Links/EthernetInterfaces/0/@odata.id"))
+MAC = Projection(Field("mac", "MACAddress"))
+
+SLOT_LABEL = "System Slot "
+
+# ----------- Columns ----------- #
+# (header, type); the type picks the Parquet column type
+HOST_COLUMNS = (
+    ("Name", "str"), ("BIOS Version", "str"), ("TW Bios Settings", "str"),
+    ("BMC Version", "str"), ("GPU Version", "str"),
+)
+
+def slot_columns(s: int) -> List[Tuple[str, str]]:
+    return [
+        (f"SLOT{s} Manufacturer", "str"), (f"SLOT{s} Model", "str"), (f"SLOT{s} Firmware Version", "str"),
+        (f"SLOT{s} MAC Address", "str"), (f"SLOT{s} PortCount", "int"),
+        (f"SLOT{s}P1 LinkStatus", "str"), (f"SLOT{s}P1 CurrentSpeedGbps", "float"),
+    ]
+
+def columns(slots: int = SLOT_COUNT) -> List[Tuple[str, str]]:
+    cols = list(HOST_COLUMNS)
+    for s in range(1, slots + 1):
+        cols += slot_columns(s)
+    return cols
+
+# ----------- Collection ----------- #
+async def _absent() -> None:
+    return None
+
+async def collect_slot(rf: RedfishClient, ip: str, s: int, dev: Optional[Dict[str, Any]], auth: Dict[str, str]) -> Row:
+    """One slot's seven columns; blank when nothing is seated in it."""
+    if dev is None:
+        return [None] * 7
+    ports_path = PORTS_PATH.format(s)
+    # Port 1 is read alongside the Ports collection instead of after it; it 404s on portless cards
+    ports, port1, function = await asyncio.gather(
+        rf.fetch(ip, ports_path, MEMBERS, **auth),
+        rf.fetch(ip, f"{ports_path}/1", PORT, **auth),
+        rf.fetch(ip, f"{dev['functions']}/1", PCIE_FUNCTION, **auth) if dev["functions"] else _absent(),
+    )
+    port_count = len(ports["members"]) if ports is not None and isinstance(ports["members"], list) else None
+    if not port_count:
+        port1 = None
+    mac = None
+    if function is not None and function["eth"]:
+        eth = await rf.fetch(ip, function["eth"], MAC, **auth)
+        mac = eth["mac"] if eth is not None else None
+    return [
+        dev["manufacturer"], dev["model"], dev["firmware"], mac, port_count,
+        port1["link"] if port1 is not None else None,
+        port1["speed_gbps"] if port1 is not None else None,
+    ]
+
+async def collect_host(rf: RedfishClient, node: Node, slots: int = SLOT_COUNT) -> Tuple[Row, bool]:
+    """(row, reachable). An unreachable server keeps its name and blanks, like the script's "NAME," line."""
+    ip = node["ip"]
+    auth = {"username": node["username"], "password": node["password"]}
+    bios, bmc, gpu, settings, devices = await asyncio.gather(
+        rf.fetch(ip, BIOS_FW_PATH, BIOS_VERSION, **auth),
+        rf.fetch(ip, BMC_PATH, BMC_VERSION, **auth),
+        rf.fetch(ip, GPU_BUNDLE_PATH, GPU_VERSION, **auth),
+        rf.fetch(ip, BIOS_SETTINGS_PATH, BIOS_SETTINGS, **auth),
+        rf.fetch_members(ip, PCIE_COLLECTION, SLOT_DEVICE, **auth),
+    )
+    reachable = any(x is not None for x in (bios, bmc, gpu, settings, devices))
+    row: Row = [
+        node["name"],
+        bios["version"] if bios is not None else None,
+        # TW BIOS profile = SMT off
+        ("true" if settings["smt"] == "Disabled" else "false") if settings is not None else None,
+        bmc["version"] if bmc is not None else None,
+        gpu["version"] if gpu is not None else None,
+    ]
+    by_slot: Dict[int, Dict[str, Any]] = {}
+    for _, dev in devices or ():
+        label = dev["slot"] or ""
+        if label.startswith(SLOT_LABEL) and label[len(SLOT_LABEL):].isdigit():
+            by_slot.setdefault(int(label[len(SLOT_LABEL):]), dev)
+    for cells in await asyncio.gather(*(collect_slot(rf, ip, s, by_slot.get(s), auth) for s in range(1, slots + 1))):
+        row += cells
+    return row, reachable
+
+# ----------- Output ----------- #
+def _csv_value(v: Any) -> Any:
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return int(v)     # 400.0 -> 400, as the BMC sent it
+    return v
+
+class CsvSink:
+    """Rows written as they arrive to PATH.tmp, renamed over PATH on close."""
+    def __init__(self, path: str, cols: List[Tuple[str, str]]):
+        self.path = path
+        self._tmp = f"{path}.tmp"
+        self._fh = open(self._tmp, "w", newline="")
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow([name for name, _ in cols])
+
+    def write(self, row: Row) -> None:
+        self._writer.writerow([_csv_value(v) for v in row])
+
+    def close(self) -> None:
+        self._fh.close()
+        os.replace(self._tmp, self.path)
+
+class ParquetSink:
+    """Rows buffered into row groups of `batch` and written to PATH.tmp, renamed over PATH on close."""
+    def __init__(self, path: str, cols: List[Tuple[str, str]], batch: int = 1024):
+        if pq is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        types = {"str": pa.string(), "int": pa.int64(), "float": pa.float64()}
+        self.path = path
+        self.batch = batch
+        self.schema = pa.schema([(name, types[t]) for name, t in cols])
+        self._tmp = f"{path}.tmp"
+        self._writer = pq.ParquetWriter(self._tmp, self.schema)
+        self._rows: List[Row] = []
+
+    def write(self, row: Row) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self.batch:
+            self._flush()
+
+    def _flush(self) -> None:
+        arrays = [pa.array(list(col), type=f.type) for col, f in zip(zip(*self._rows), self.schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self._rows.clear()
+
+    def close(self) -> None:
+        if self._rows:
+            self._flush()
+        self._writer.close()
+        os.replace(self._tmp, self.path)
+
+def open_sink(path: str, cols: List[Tuple[str, str]]):
+    return ParquetSink(path, cols) if path.endswith(".parquet") else CsvSink(path, cols)
+
+# ----------- Sweep ----------- #
+async def sweep_firmware(
+    datastore_json_file: str,
+    server_prefix: str,
+    pdu_prefix: str,
+    out_path: str,
+    names: Optional[List[str]] = None,
+    slots: int = SLOT_COUNT,
+    max_concurrency: int = 400,
+    workers: Optional[int] = None,
+    scheme: str = "https",
+    etag_cache: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Collect every server's row into out_path. Returns counts and version tallies for the summary."""
+    inv = inventory.load(datastore_json_file, pdu_prefix=pdu_prefix)
+    if names:
+        nodes = []
+        for name in names:
+            node = inv.get(name)
+            if node is None:
+                print(f"[WARN] {name} not found in {datastore_json_file}")
+            else:
+                nodes.append(node)
+    else:
+        nodes = inv.with_prefix(server_prefix)
+
+    cfg = ClientConfig(
+        verify_ssl=False,
+        max_retries=2,
+        per_request_semaphore=asyncio.Semaphore(max_concurrency),
+        conn_limit=max_concurrency,
+        scheme=scheme,
+        discovery=False,
+        etag_cache=bool(etag_cache),
+        etag_cache_path=etag_cache or None,
+    )
+    cols = columns(slots)
+    fw_columns = [i for i, (name, _) in enumerate(cols) if "Version" in name]
+    summary: Dict[str, Any] = {"servers": len(nodes), "unreachable": [], "versions": {cols[i][0]: Counter() for i in fw_columns}}
+
+    sink = open_sink(out_path, cols)
+    async with RedfishClient(cfg) as rf:
+        async def one(node: Node) -> Tuple[Row, bool]:
+            try:
+                return await collect_host(rf, node, slots)
+            except Exception:
+                return [node["name"]] + [None] * (len(cols) - 1), False
+
+        async def on_result(res: Tuple[Row, bool]) -> None:
+            row, reachable = res
+            sink.write(row)
+            if not reachable:
+                summary["unreachable"].append(row[0])
+                return
+            for i in fw_columns:
+                if row[i] is not None:
+                    summary["versions"][cols[i][0]][row[i]] += 1
+
+        n_workers = max(1, min(workers or max_concurrency, len(nodes) or 1))
+        try:
+            await drive_hosts(((n,) for n in nodes), n_workers, one, on_result)
+        finally:
+            sink.close()
+            if rf.etags is not None:
+                rf.etags.save()
+        if rf.etags is not None:
+            summary["revalidated"] = rf.etags.revalidated
+        summary["responses"] = rf.decode_stats.count
+    return summary
+
+def version_tallies(versions: Dict[str, Counter]) -> Dict[str, Counter]:
+    """Per-column version tallies, with the SLOTn Firmware Version columns merged into one."""
+    merged: Dict[str, Counter] = {}
+    for col, counts in versions.items():
+        key = "Slot Firmware Version" if col.startswith("SLOT") else col
+        merged.setdefault(key, Counter()).update(counts)
+    return {k: c for k, c in merged.items() if c}
+
+# ---------- cli ----------
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Fleet firmware inventory (query_firmware.sh columns) as CSV or Parquet")
+    ap.add_argument("names", nargs="*", help="Server names to audit (default: every server matching --server-prefix)")
+    ap.add_argument("--ipmi", default="ipmi.json", help="Path to ipmi.json")
+    ap.add_argument("--server-prefix", default="tus1-p", help="Server name prefix filter")
+    ap.add_argument("--pdu-prefix", default="tus1-pdu", help="PDU name prefix to exclude")
+    ap.add_argument("--out", default="firmware_inventory.csv", help="Output file; .parquet writes Parquet (needs pyarrow)")
+    ap.add_argument("--slots", type=int, default=SLOT_COUNT, help="System Slots to report")
+    ap.add_argument("--concurrency", type=int, default=400, help="Max concurrent requests")
+    ap.add_argument("--workers", type=int, default=None, help="Hosts audited at once (default: --concurrency)")
+    ap.add_argument("--scheme", default="https", choices=("https", "http"), help="http only for the local simulator")
+    ap.add_argument("--etag-cache", default=None,
+                    help="Conditional-GET cache file (default: .<ipmi>.firmware_etags.json next to --ipmi, '' = plain GETs)")
+    a = ap.parse_args()
+    if a.etag_cache is None:
+        a.etag_cache = inventory.sidecar_path(a.ipmi, "firmware_etags.json")
+    return a
+
+def main():
+    a = parse_args()
+    if a.out.endswith(".parquet") and pq is None:
+        print("[FATAL] Parquet output needs pyarrow (pip install pyarrow), or use a .csv --out")
+        sys.exit(1)
+    start = time.time()
+    summary = asyncio.run(sweep_firmware(
+        a.ipmi, a.server_prefix, a.pdu_prefix, a.out, a.names, a.slots,
+        a.concurrency, a.workers, a.scheme, a.etag_cache,
+    ))
+    unreachable = summary["unreachable"]
+    print(f"[Sweep Completed] Servers: {summary['servers']} | Unreachable: {len(unreachable)} | "
+          f"Duration {time.time() - start:.2f} seconds")
+    if "revalidated" in summary:
+        print(f"[ETag Cache] Not modified (304): {summary['revalidated']} | Full responses: {summary['responses']}")
+    for col, counts in version_tallies(summary["versions"]).items():
+        print(f"[Versions] {col}: " + ", ".join(f"{v} x{n}" for v, n in counts.most_common()))
+    for name in sorted(unreachable):
+        print(f"[WARN] {name} unreachable")
+    print(f"[SUCCESS] Wrote {summary['servers']} servers to {a.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Indexed ipmi.json / pdu_list.json inventory, shared by the Python tools and the
+bash scripts (instead of one jq pass over the whole file per lookup).
+
+Both files are parsed once into a small SQLite index next to ipmi.json
+(.ipmi.json.idx) with the records keyed by name and indexed by rack/RU, so a
+lookup reads a few pages instead of parsing the whole fleet. The index is
+rebuilt whenever a source's mtime or size changes.
+
+PDUs are the pdu_list.json entries plus any ipmi.json entries whose name starts
+with the PDU prefix; their rack/position come from tus1-pdu-<RACK>-<L1|R2|..>
+when the record has no "rack" field.
+
+Shell usage (tab-separated values, one record per line, "" for missing fields):
+    inventory.py get tus1-p00042 --fields ip,rack,ru
+    inventory.py --sep $'\x1f' get tus1-p00042 --fields ip,rack,ru   # for IFS=$'\x1f' read
+    inventory.py list --prefix tus1-p --fields name,ip
+    inventory.py list --rack A12 --ru 33
+    inventory.py pdus tus1-p00042 --fields name,ip     # PDUs in the server's rack
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson  # optional fast decoder for the stored records
+except ImportError:
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+CACHE_VERSION = 1
+DEFAULT_PDU_PREFIX = "tus1-pdu"
+DEFAULT_PDU_LIST = "pdu_list.json"      # looked up next to ipmi.json
+
+Record = Dict[str, Any]
+
+# PDU positions feeding PSU bays 1-4 of a server, by its RU (as wired in server_pdu_power_cycle.sh)
+RU_PDU_POSITIONS: Dict[str, Tuple[str, ...]] = {
+    **{ru: ("L1", "L2", "R1", "R2") for ru in ("33", "25", "17", "9")},
+    **{ru: ("L3", "L4", "R3", "R4") for ru in ("29", "21", "13", "5")},
+}
+# Outlets switched on each of those PDUs for the server at that RU
+RU_PDU_OUTLETS: Dict[str, Tuple[int, ...]] = {
+    "33": (38, 40), "29": (32, 34), "25": (26, 28), "21": (22, 24),
+    "17": (18, 20), "13": (14, 16), "9": (10, 12), "5": (6, 8),
+}
+
+SCHEMA = """
+CREATE TABLE meta (source TEXT NOT NULL);
+CREATE TABLE nodes (
+    name    TEXT PRIMARY KEY,
+    kind    TEXT NOT NULL,      -- server | pdu
+    rack    TEXT NOT NULL,
+    ru      TEXT NOT NULL,
+    doc     TEXT NOT NULL       -- the original JSON record
+) WITHOUT ROWID;
+CREATE INDEX nodes_rack ON nodes (kind, rack, ru);
+"""
+
+# ----
+# Index
+# ----
+
+def _key(value: Any) -> str:
+    return "" if value is None else str(value)
+
+def _pdu_location(name: str) -> Tuple[str, str]:
+    """tus1-pdu-<RACK>-<POSITION> -> (rack, position)."""
+    parts = name.split("-")
+    if len(parts) < 4:
+        return "", ""
+    return "-".join(parts[2:-1]), parts[-1]
+
+def _rows(nodes: List[Record], pdu_nodes: List[Record], pdu_prefix: str):
+    seen = set()
+    for node, from_pdu_list in [(n, False) for n in nodes] + [(n, True) for n in pdu_nodes]:
+        name = node.get("name")
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        kind = "pdu" if from_pdu_list or name.startswith(pdu_prefix) else "server"
+        if kind == "pdu" and "rack" not in node:
+            node = dict(node)
+            node["rack"], node["position"] = _pdu_location(name)
+        yield (name, kind, _key(node.get("rack")), _key(node.get("ru")), json.dumps(node, separators=(",", ":")))
+
+class Inventory:
+    """Read-only view of one index file. Records come back as the original JSON dicts."""
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _docs(self, sql: str, args: Tuple[Any, ...] = ()) -> List[Record]:
+        return [_loads(doc) for (doc,) in self._db.execute(sql, args)]
+
+    @property
+    def servers(self) -> List[Record]:
+        return self._docs("SELECT doc FROM nodes WHERE kind = 'server' ORDER BY name")
+
+    @property
+    def pdus(self) -> List[Record]:
+        return self._docs("SELECT doc FROM nodes WHERE kind = 'pdu' ORDER BY name")
+
+    def get(self, name: str) -> Optional[Record]:
+        docs = self._docs("SELECT doc FROM nodes WHERE name = ?", (name,))
+        return docs[0] if docs else None
+
+    def with_prefix(self, prefix: str, pdus: bool = False) -> List[Record]:
+        """Servers (or PDUs) whose name starts with prefix, sorted by name."""
+        return self._docs(
+            "SELECT doc FROM nodes WHERE name >= ? AND name < ? AND kind = ? ORDER BY name",
+            (prefix, prefix + "\U0010ffff", "pdu" if pdus else "server"),
+        )
+
+    def in_rack(self, rack: Any, pdus: bool = False) -> List[Record]:
+        return self._docs(
+            "SELECT doc FROM nodes WHERE kind = ? AND rack = ? ORDER BY name",
+            ("pdu" if pdus else "server", _key(rack)),
+        )
+
+    def at(self, rack: Any, ru: Any) -> List[Record]:
+        return self._docs(
+            "SELECT doc FROM nodes WHERE kind = 'server' AND rack = ? AND ru = ? ORDER BY name",
+            (_key(rack), _key(ru)),
+        )
+
+    def pdus_for(self, name_or_rack: str) -> List[Record]:
+        """PDUs in a server's rack (or in the given rack)."""
+        rec = self.get(name_or_rack)
+        return self.in_rack(rec.get("rack") if rec is not None else name_or_rack, pdus=True)
+
+def psu_feeds(
+    rack: Any,
+    ru: Any,
+    pdu_prefix: str = DEFAULT_PDU_PREFIX,
+    ru_positions: Optional[Dict[str, Tuple[str, ...]]] = None,
+) -> Optional[Tuple[str, ...]]:
+    """
+    Names of the PDUs feeding PSU bays 1-4 of the server at rack/RU, None if the RU
+    isn't mapped. ru_positions overrides RU_PDU_POSITIONS for other rack layouts.
+    """
+    positions = (RU_PDU_POSITIONS if ru_positions is None else ru_positions).get(_key(ru))
+    if positions is None or not _key(rack):
+        return None
+    return tuple(f"{pdu_prefix}-{rack}-{p}" for p in positions)
+
+# ----
+# Loading and rebuilding the index
+# ----
+
+_memo: Dict[str, Tuple[str, Inventory]] = {}
+
+def cache_path_for(ipmi_path: str) -> str:
+    return sidecar_path(ipmi_path, "idx")
+
+def sidecar_path(ipmi_path: str, suffix: str) -> str:
+    """Hidden file next to ipmi.json for state derived from it: .ipmi.json.<suffix>"""
+    d, base = os.path.split(os.path.abspath(ipmi_path))
+    return os.path.join(d, f".{base}.{suffix}")
+
+def _source_key(paths: List[str], pdu_prefix: str) -> str:
+    parts: List[Any] = [CACHE_VERSION, pdu_prefix]
+    for p in paths:
+        st = os.stat(p)
+        parts.append([os.path.abspath(p), st.st_mtime_ns, st.st_size])
+    return json.dumps(parts)
+
+def _read_json_list(path: str) -> List[Record]:
+    with open(path, "rb") as fh:
+        data = json.load(fh)
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a JSON list of nodes")
+    return data
+
+def _indexed_source(path: str) -> Optional[str]:
+    try:
+        db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = db.execute("SELECT source FROM meta").fetchone()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+def build_index(path: str, key: str, nodes: List[Record], pdu_nodes: List[Record], pdu_prefix: str) -> None:
+    """Write a fresh index to path (via a temp file, so concurrent readers never see a partial one)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    db = sqlite3.connect(tmp)
+    try:
+        db.executescript(SCHEMA)
+        db.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?)", _rows(nodes, pdu_nodes, pdu_prefix))
+        db.execute("INSERT INTO meta VALUES (?)", (key,))
+        db.commit()
+    finally:
+        db.close()
+    os.replace(tmp, path)
+
+def load(
+    ipmi_path: str = "ipmi.json",
+    pdu_path: Optional[str] = None,
+    pdu_prefix: str = DEFAULT_PDU_PREFIX,
+    index_path: Optional[str] = None,
+) -> Inventory:
+    """
+    Open the index for ipmi_path (and pdu_path, default pdu_list.json next to it,
+    if it exists), rebuilding it first if a source changed. Repeated calls in one
+    process reuse the open index.
+    """
+    if pdu_path is None:
+        pdu_path = os.path.join(os.path.dirname(ipmi_path), DEFAULT_PDU_LIST)
+    paths = [ipmi_path] + ([pdu_path] if pdu_path and os.path.exists(pdu_path) else [])
+    key = _source_key(paths, pdu_prefix)
+    target = index_path or cache_path_for(ipmi_path)
+    hit = _memo.get(target)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+
+    path = target
+    if _indexed_source(path) != key:
+        nodes = _read_json_list(ipmi_path)
+        pdu_nodes = _read_json_list(pdu_path) if len(paths) > 1 else []
+        try:
+            build_index(path, key, nodes, pdu_nodes, pdu_prefix)
+        except (OSError, sqlite3.OperationalError):
+            # Read-only checkout etc.: keep the index in the temp dir instead
+            digest = hashlib.blake2b(target.encode(), digest_size=8).hexdigest()
+            path = os.path.join(tempfile.gettempdir(), f"inventory-{digest}.idx")
+            if _indexed_source(path) != key:
+                build_index(path, key, nodes, pdu_nodes, pdu_prefix)
+
+    if hit is not None:
+        hit[1].close()
+    inv = Inventory(path)
+    _memo[target] = (key, inv)
+    return inv
+
+# ----
+# CLI (for the bash scripts)
+# ----
+
+def _emit(records: List[Record], fields: List[str], sep: str = "\t") -> None:
+    out = sys.stdout
+    for rec in records:
+        out.write(sep.join(_key(rec.get(f)) for f in fields) + "\n")
+
+def parse_args(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Indexed ipmi.json / pdu_list.json lookups (TSV output)")
+    ap.add_argument("--ipmi", default=os.environ.get("IPMI_JSON", "ipmi.json"), help="Path to ipmi.json (env IPMI_JSON)")
+    ap.add_argument("--pdu-list", default=os.environ.get("PDU_LIST_JSON"), help="Path to pdu_list.json, skipped if missing (env PDU_LIST_JSON; default: next to ipmi.json)")
+    ap.add_argument("--pdu-prefix", default=DEFAULT_PDU_PREFIX)
+    ap.add_argument("--index", default=None, help="Index file (default: .<ipmi name>.idx next to it)")
+    # read collapses runs of IFS whitespace (tabs included), so scripts that must keep empty fields use $'\x1f'
+    ap.add_argument("--sep", default="\t", help="Field separator (default: tab)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    g = sub.add_parser("get", help="One host or PDU by exact name")
+    g.add_argument("name")
+    g.add_argument("--fields", default="ip")
+
+    ls = sub.add_parser("list", help="Servers (or PDUs) by prefix / rack / RU")
+    ls.add_argument("--prefix", default="")
+    ls.add_argument("--rack")
+    ls.add_argument("--ru")
+    ls.add_argument("--pdus", action="store_true", help="List PDUs instead of servers")
+    ls.add_argument("--fields", default="name")
+
+    p = sub.add_parser("pdus", help="PDUs in a server's rack (or a rack)")
+    p.add_argument("name_or_rack")
+    p.add_argument("--fields", default="name,ip")
+    return ap.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    a = parse_args(argv)
+    try:
+        inv = load(a.ipmi, a.pdu_list, a.pdu_prefix, a.index)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"[FATAL] {e}", file=sys.stderr)
+        return 2
+    fields = [f.strip() for f in a.fields.split(",") if f.strip()]
+
+    if a.cmd == "get":
+        rec = inv.get(a.name)
+        if rec is None:
+            print(f"{a.name} not found in {a.ipmi}", file=sys.stderr)
+            return 1
+        _emit([rec], fields, a.sep)
+    elif a.cmd == "list":
+        if a.ru is not None and a.rack is None:
+            print("--ru requires --rack", file=sys.stderr)
+            return 2
+        if a.pdus:
+            recs = inv.in_rack(a.rack, pdus=True) if a.rack is not None else inv.with_prefix(a.prefix, pdus=True)
+            recs = [r for r in recs if r["name"].startswith(a.prefix)]
+        elif a.rack is not None:
+            recs = inv.at(a.rack, a.ru) if a.ru is not None else inv.in_rack(a.rack)
+            recs = [r for r in recs if r["name"].startswith(a.prefix)]
+        else:
+            recs = inv.with_prefix(a.prefix)
+        _emit(recs, fields, a.sep)
+    elif a.cmd == "pdus":
+        recs = inv.pdus_for(a.name_or_rack)
+        if not recs:
+            print(f"No PDUs found for {a.name_or_rack}", file=sys.stderr)
+            return 1
+        _emit(recs, fields, a.sep)
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        sys.exit(0)
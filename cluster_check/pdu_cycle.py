@@ -0,0 +1,463 @@
+"""
+PDU power-cycle validation, replacing bash-scripts/server_pdu_power_cycle.sh.
+
+The script checks one server per run: for each PSU it turns off the two outlets
+feeding it (outlet_off.exp), sleeps 3 s, expects the PSU's PowerInputWatts to
+be at most 10 W, turns them back on, sleeps 3 s and expects more than 10 W. This
+engine does the same checks over Redfish for many servers at once:
+
+    - outlets are switched with the Outlet.PowerControl action through
+      redfish_pdu_exporter's RedfishClient (set_outlet_power)
+    - instead of fixed sleeps the BMC's Chassis/1/Power is polled until the PSU
+      drops/returns, with a timeout, so a cycle takes as long as the hardware needs
+    - a PSU that stays up is diagnosed: outlet still on, or another PSU lost
+      power instead (cabled to the wrong PDU)
+    - outlets are always switched back on, even when a check fails or the run
+      is interrupted, and the run halts if a PSU doesn't come back
+
+Safety policy (SafetyPolicy): the PSUs of a server are cycled one at a time, at
+most --per-pdu outlet pairs are off on any PDU and --per-rack servers of a rack
+are in progress, and a PSU is only cut while every other PSU of that server is
+drawing power. Servers are interleaved across racks and each server starts on
+a different PDU than its rack neighbours, so a rack's PDUs all work in parallel.
+
+The RU -> PDU position/outlet wiring defaults to the script's
+(inventory.RU_PDU_POSITIONS / RU_PDU_OUTLETS); --wiring reads another layout:
+
+    {"33": {"pdus": ["L1", "L2", "R1", "R2"], "outlets": [38, 40]}, ...}
+
+Results stream to --out (one CSV row per PSU) and --log gets the script's
+cycle.log lines.
+
+Usage:
+    python pdu_cycle.py --ipmi ipmi.json tus1-p00012
+    python pdu_cycle.py --ipmi ipmi.json --rack 004 --rack 005 --out cycle.csv
+    python pdu_cycle.py --ipmi ipmi.json --server-prefix tus1-p0 --dry-run
+    python pdu_cycle.py --dump-wiring > wiring.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import inventory
+from cluster_ttt import drive_hosts
+from redfish_ttt import ClientConfig, RedfishClient
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO, "redfish_pdu_exporter"))
+import redfish_client as pdu  # noqa: E402  (the PDU exporter's client)
+
+Node = Dict[str, Any]
+
+RESULT_COLUMNS = ("server", "rack", "ru", "psu", "pdu", "outlets", "result", "off_s", "on_s", "detail")
+
+# ----------- Wiring and policy ----------- #
+@dataclass(frozen=True)
+class Wiring:
+    """PDU positions feeding PSU bays 1..n, and the outlets switched on each, per RU."""
+    positions: Dict[str, Tuple[str, ...]]
+    outlets: Dict[str, Tuple[int, ...]]
+
+    @classmethod
+    def default(cls) -> "Wiring":
+        return cls(dict(inventory.RU_PDU_POSITIONS), dict(inventory.RU_PDU_OUTLETS))
+
+    @classmethod
+    def load(cls, path: str) -> "Wiring":
+        with open(path) as fh:
+            doc = json.load(fh)
+        return cls(
+            {str(ru): tuple(str(p) for p in e["pdus"]) for ru, e in doc.items()},
+            {str(ru): tuple(int(o) for o in e["outlets"]) for ru, e in doc.items()},
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        return {ru: {"pdus": list(p), "outlets": list(self.outlets.get(ru, ()))} for ru, p in self.positions.items()}
+
+@dataclass(frozen=True)
+class SafetyPolicy:
+    per_pdu: int = 1                        # outlet pairs switched off at once on one PDU
+    per_rack: int = 8                       # servers of one rack in progress at once
+    require_redundancy: bool = True         # every other PSU must be drawing power before one is cut
+    halt_after_restore_failures: int = 1    # stop starting PSUs after this many don't come back
+
+@dataclass(frozen=True)
+class Timing:
+    off_w: float = 10.0             # PSU input at or below this counts as off (the script's threshold)
+    on_w: float = 10.0              # ... and above this as on
+    poll_s: float = 0.5
+    off_timeout_s: float = 20.0
+    on_timeout_s: float = 60.0
+
+@dataclass(frozen=True)
+class Feed:
+    """The PDU outlets feeding one PSU bay."""
+    psu: int                        # 1-based, as PSU1..PSU4 in the script
+    pdu: str
+    ip: str
+    username: str
+    password: str
+    outlets: Tuple[int, ...]
+
+@dataclass
+class PsuResult:
+    server: str
+    rack: str
+    ru: str
+    psu: int
+    pdu: str
+    outlets: Tuple[int, ...]
+    result: str = "pass"            # pass | fail | skipped | restore_failed
+    off_s: Optional[float] = None
+    on_s: Optional[float] = None
+    detail: str = ""
+
+    def row(self) -> List[Any]:
+        off_s = round(self.off_s, 2) if self.off_s is not None else ""
+        on_s = round(self.on_s, 2) if self.on_s is not None else ""
+        return [self.server, self.rack, self.ru, self.psu, self.pdu, " ".join(map(str, self.outlets)),
+                self.result, off_s, on_s, self.detail]
+
+# ----------- Planning ----------- #
+def plan_server(
+    inv: inventory.Inventory,
+    node: Node,
+    wiring: Wiring,
+    pdu_prefix: str,
+    pdu_creds: Tuple[Optional[str], Optional[str]] = (None, None),
+) -> Tuple[List[Feed], str]:
+    """Feeds of a server's PSU bays in order, or ([], reason) if it can't be cycled."""
+    rack, ru = str(node.get("rack") or ""), str(node.get("ru") or "")
+    names = inventory.psu_feeds(rack, ru, pdu_prefix, wiring.positions)
+    outlets = wiring.outlets.get(ru)
+    if names is None or not outlets:
+        return [], f"no wiring for rack {rack!r} RU {ru!r}"
+    pdus = {p["name"]: p for p in inv.pdus_for(node["name"])}
+    feeds = []
+    for psu, name in enumerate(names, 1):
+        rec = pdus.get(name)
+        if rec is None:
+            return [], f"{name} not in the PDU list"
+        user, password = pdu_creds
+        feeds.append(Feed(psu, name, rec["ip"], user or rec.get("username", ""),
+                          password or rec.get("password", ""), outlets))
+    return feeds, ""
+
+def interleave(plans: List[Tuple[Node, List[Feed]]]) -> List[Tuple[Node, List[Feed]]]:
+    """
+    Round-robin the servers across racks (top RU first), and rotate each server's
+    PSU order so servers sharing PDUs start on different ones.
+    """
+    racks: Dict[str, List[Tuple[Node, List[Feed]]]] = {}
+    for node, feeds in sorted(plans, key=lambda p: -_ru(p[0])):
+        racks.setdefault(str(node.get("rack") or ""), []).append((node, feeds))
+    for servers in racks.values():
+        seen: Dict[Tuple[str, ...], int] = {}
+        for i, (node, feeds) in enumerate(servers):
+            pdus = tuple(f.pdu for f in feeds)
+            k = seen[pdus] = seen.get(pdus, -1) + 1
+            servers[i] = (node, feeds[k % len(feeds):] + feeds[:k % len(feeds)])
+    order = itertools.zip_longest(*racks.values())
+    return [plan for batch in order for plan in batch if plan is not None]
+
+def _ru(node: Node) -> int:
+    try:
+        return int(node.get("ru"))
+    except (TypeError, ValueError):
+        return 0
+
+# ----------- Engine ----------- #
+class PowerCycler:
+    """Cycles PSU feeds under a SafetyPolicy; one instance per run (semaphores are per PDU/rack)."""
+    def __init__(self, bmc: RedfishClient, pdus: pdu.RedfishClient, policy: SafetyPolicy, timing: Timing):
+        self.bmc = bmc
+        self.pdus = pdus
+        self.policy = policy
+        self.timing = timing
+        self.restore_failures = 0
+        self._pdu_slots: Dict[str, asyncio.Semaphore] = {}
+        self._rack_slots: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def halted(self) -> bool:
+        return self.restore_failures >= self.policy.halt_after_restore_failures
+
+    async def cycle_server(self, node: Node, feeds: Sequence[Feed]) -> List[PsuResult]:
+        """Every PSU of one server, one after another. Stops after a PSU that didn't come back.
+
+        An unexpected error fails this server's unreported PSUs instead of aborting the whole run.
+        """
+        results: List[PsuResult] = []
+        try:
+            await self._cycle_feeds(node, feeds, results)
+        except Exception as e:
+            reported = {r.psu for r in results}
+            detail = f"unexpected {type(e).__name__}: {e}"
+            results.extend(self._result(node, feed, "fail", detail) for feed in feeds if feed.psu not in reported)
+        return sorted(results, key=lambda r: r.psu)
+
+    async def _cycle_feeds(self, node: Node, feeds: Sequence[Feed], results: List[PsuResult]) -> None:
+        rack = str(node.get("rack") or "")
+        async with self._rack_slots.setdefault(rack, asyncio.Semaphore(self.policy.per_rack)):
+            for feed in feeds:
+                if self.halted or (results and results[-1].result == "restore_failed"):
+                    results.append(self._result(node, feed, "skipped", "run halted after a PSU failed to restore"))
+                    continue
+                async with self._pdu_slots.setdefault(feed.pdu, asyncio.Semaphore(self.policy.per_pdu)):
+                    results.append(await self.cycle_psu(node, feed))
+
+    async def cycle_psu(self, node: Node, feed: Feed) -> PsuResult:
+        """Off -> PSU input drops -> On -> PSU input returns, for one feed."""
+        t, bay = self.timing, feed.psu - 1
+        inputs = await self._inputs(node)
+        if inputs is None or len(inputs) <= bay:
+            return self._result(node, feed, "fail", "BMC power readings unavailable")
+        if not _above(inputs[bay], t.on_w):
+            return self._result(node, feed, "fail", f"PSU{feed.psu} has no input before switching ({_fmt(inputs[bay])})")
+        if self.policy.require_redundancy:
+            down = [i + 1 for i, w in enumerate(inputs) if i != bay and not _above(w, t.on_w)]
+            if down:
+                names = ", ".join(f"PSU{i}" for i in down)
+                return self._result(node, feed, "skipped", f"{names} not drawing power; not cutting PSU{feed.psu}")
+
+        # Everything live now must be live again after the feed is restored
+        live = [i for i, w in enumerate(inputs) if _above(w, t.on_w)]
+        res = self._result(node, feed)
+        try:
+            if not await self._switch(feed, "Off"):
+                res.result, res.detail = "fail", f"{feed.pdu} did not accept Off"
+            else:
+                # Done once any PSU drops: if it isn't this one, the feed is cabled elsewhere
+                ok, inputs, res.off_s = await self._wait(
+                    node, lambda w: any(not _above(_bay(w, i), t.off_w) for i in live), t.off_timeout_s
+                )
+                if not ok or _above(_bay(inputs, bay), t.off_w):
+                    res.result, res.detail = "fail", await self._diagnose_off(feed, inputs, live)
+        finally:
+            # Runs on failure and cancellation too: a feed is never left off
+            await self._restore(node, feed, res, live)
+        return res
+
+    async def _restore(self, node: Node, feed: Feed, res: PsuResult, live: List[int]) -> None:
+        t = self.timing
+        try:
+            ok = await self._switch(feed, "On")
+            if ok:
+                ok, inputs, res.on_s = await self._wait(
+                    node, lambda w: all(_above(_bay(w, i), t.on_w) for i in live), t.on_timeout_s
+                )
+                down = [i for i in live if not _above(_bay(inputs, i), t.on_w)]
+                detail = ", ".join(f"PSU{i + 1} {_fmt(_bay(inputs, i))}" for i in down) + " after On"
+            else:
+                detail = f"{feed.pdu} did not accept On"
+        except Exception as e:
+            # Unknown feed state counts as not restored, so the halt policy still applies
+            ok, detail = False, f"restore of {feed.pdu} raised {type(e).__name__}: {e}"
+        if not ok:
+            self.restore_failures += 1
+            res.result = "restore_failed"
+            res.detail = "; ".join(d for d in (res.detail, detail) if d)
+
+    async def _diagnose_off(self, feed: Feed, inputs: Optional[List[Optional[float]]], live: List[int]) -> str:
+        bay = feed.psu - 1
+        if inputs is None:
+            return "BMC power readings unavailable while off"
+        readings = await self.pdus.get_outlet_readings(
+            feed.ip, feed.outlets, username=feed.username, password=feed.password
+        )
+        still_on = [o for o, r in readings.items() if r is not None and r.power_state != "Off"]
+        if still_on:
+            return f"{feed.pdu} outlet(s) {' '.join(map(str, still_on))} still On"
+        dropped = [i + 1 for i in live if i != bay and not _above(_bay(inputs, i), self.timing.off_w)]
+        detail = f"PSU{feed.psu} still drawing {_fmt(_bay(inputs, bay))} with {feed.pdu} off"
+        if dropped:
+            detail += "; " + ", ".join(f"PSU{i}" for i in dropped) + f" lost power instead (miswired to {feed.pdu}?)"
+        return detail
+
+    async def _switch(self, feed: Feed, state: str) -> bool:
+        oks = await asyncio.gather(*(
+            self.pdus.set_outlet_power(feed.ip, o, state, username=feed.username, password=feed.password)
+            for o in feed.outlets
+        ))
+        return all(oks)
+
+    async def _inputs(self, node: Node) -> Optional[List[Optional[float]]]:
+        psus = await self.bmc.get_psu_health(node["ip"], username=node["username"], password=node["password"])
+        return None if psus is None else [p["input_w"] for p in psus]
+
+    async def _wait(self, node: Node, done, timeout_s: float) -> Tuple[bool, Optional[List[Optional[float]]], float]:
+        """Poll PSU inputs until done(inputs) or timeout. Returns (met, last inputs, seconds waited)."""
+        start = time.monotonic()
+        while True:
+            inputs = await self._inputs(node)
+            elapsed = time.monotonic() - start
+            if inputs is not None and done(inputs):
+                return True, inputs, elapsed
+            if elapsed >= timeout_s:
+                return False, inputs, elapsed
+            await asyncio.sleep(self.timing.poll_s)
+
+    @staticmethod
+    def _result(node: Node, feed: Feed, result: str = "pass", detail: str = "") -> PsuResult:
+        return PsuResult(node["name"], str(node.get("rack") or ""), str(node.get("ru") or ""),
+                         feed.psu, feed.pdu, feed.outlets, result, detail=detail)
+
+def _bay(inputs: Optional[List[Optional[float]]], i: int) -> Optional[float]:
+    """Input watts of 0-based bay i; a bay the BMC didn't report reads as no reading."""
+    return inputs[i] if inputs is not None and i < len(inputs) else None
+
+def _above(watts: Optional[float], threshold: float) -> bool:
+    return watts is not None and watts > threshold
+
+def _fmt(watts: Optional[float]) -> str:
+    return "no reading" if watts is None else f"{watts:g} W"
+
+# ----------- Run ----------- #
+def select_servers(
+    inv: inventory.Inventory, names: List[str], racks: List[str], server_prefix: Optional[str]
+) -> List[Node]:
+    nodes: Dict[str, Node] = {}
+    for name in names:
+        node = inv.get(name)
+        if node is None:
+            print(f"[WARN] {name} not found")
+        else:
+            nodes[name] = node
+    for rack in racks:
+        nodes.update((n["name"], n) for n in inv.in_rack(rack))
+    if server_prefix:
+        nodes.update((n["name"], n) for n in inv.with_prefix(server_prefix))
+    return list(nodes.values())
+
+async def run_cycle(
+    plans: List[Tuple[Node, List[Feed]]],
+    out_path: str,
+    log_path: str,
+    policy: SafetyPolicy = SafetyPolicy(),
+    timing: Timing = Timing(),
+    workers: int = 64,
+    scheme: str = "https",
+) -> Dict[str, Any]:
+    """Cycle every planned server, streaming rows to out_path and cycle.log lines to log_path."""
+    summary: Dict[str, Any] = {"servers": len(plans), "passed": 0, "failed": [], "skipped": 0}
+    bmc_cfg = ClientConfig(verify_ssl=False, max_retries=2, conn_limit=4 * workers, scheme=scheme, discovery=False)
+    pdu_cfg = pdu.ClientConfig(verify_ssl=False, max_retries=2, conn_limit=4 * workers, scheme=scheme)
+
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "w", newline="") as out, open(log_path, "a") as log:
+        writer = csv.writer(out)
+        writer.writerow(RESULT_COLUMNS)
+        async with RedfishClient(bmc_cfg) as bmc, pdu.RedfishClient(pdu_cfg) as pdus:
+            cycler = PowerCycler(bmc, pdus, policy, timing)
+
+            async def on_result(results: List[PsuResult]) -> None:
+                server = results[0].server
+                lines = []
+                for r in results:
+                    writer.writerow(r.row())
+                    if r.result in ("fail", "restore_failed"):
+                        lines.append(f"[ERROR] {server} -- PSU{r.psu} -- failure: {r.detail}")
+                    elif r.result == "skipped":
+                        lines.append(f"[WARN] {server} -- PSU{r.psu} -- skipped: {r.detail}")
+                out.flush()
+                if all(r.result == "pass" for r in results):
+                    summary["passed"] += 1
+                    lines.append(f"[SUCCESS] {server} -- All PSUs passed")
+                elif any(r.result in ("fail", "restore_failed") for r in results):
+                    summary["failed"].append(server)
+                else:
+                    summary["skipped"] += 1
+                for line in lines:
+                    print(line)
+                    log.write(line + "\n")
+                log.flush()
+
+            n_workers = max(1, min(workers, len(plans) or 1))
+            await drive_hosts(plans, n_workers, cycler.cycle_server, on_result)
+            summary["restore_failures"] = cycler.restore_failures
+    os.replace(tmp, out_path)
+    return summary
+
+# ---------- cli ----------
+def parse_args():
+    ap = argparse.ArgumentParser(description="Validate server PSU cabling by power-cycling PDU outlets (server_pdu_power_cycle.sh)")
+    ap.add_argument("names", nargs="*", help="Servers to cycle")
+    ap.add_argument("--rack", action="append", default=[], help="Cycle every server in this rack (repeatable)")
+    ap.add_argument("--server-prefix", default=None, help="Cycle every server with this name prefix")
+    ap.add_argument("--ipmi", default="ipmi.json", help="Path to ipmi.json (pdu_list.json is read from next to it)")
+    ap.add_argument("--pdu-prefix", default="tus1-pdu", help="PDU name prefix")
+    ap.add_argument("--pdu-user", default=os.environ.get("PDU_USER"), help="PDU username (default: $PDU_USER, else pdu_list.json)")
+    ap.add_argument("--pdu-pass", default=os.environ.get("PDU_PASS"), help="PDU password (default: $PDU_PASS, else pdu_list.json)")
+    ap.add_argument("--wiring", default=None, help="RU -> PDU/outlet wiring JSON (default: the script's layout)")
+    ap.add_argument("--dump-wiring", action="store_true", help="Print the wiring as JSON and exit")
+    ap.add_argument("--out", default="pdu_cycle.csv", help="Per-PSU results CSV")
+    ap.add_argument("--log", default="cycle.log", help="Appends the script's [ERROR]/[SUCCESS] lines here")
+    ap.add_argument("--per-pdu", type=int, default=1, help="Outlet pairs off at once per PDU")
+    ap.add_argument("--per-rack", type=int, default=8, help="Servers in progress at once per rack")
+    ap.add_argument("--workers", type=int, default=64, help="Servers in progress at once overall")
+    ap.add_argument("--no-redundancy-check", action="store_true", help="Cut a PSU even if another PSU is already down")
+    ap.add_argument("--off-w", type=float, default=10.0, help="PSU input (W) at or below which it counts as off")
+    ap.add_argument("--on-w", type=float, default=10.0, help="PSU input (W) above which it counts as on")
+    ap.add_argument("--poll", type=float, default=0.5, help="Seconds between PSU power reads")
+    ap.add_argument("--off-timeout", type=float, default=20.0, help="Seconds to wait for a PSU to drop")
+    ap.add_argument("--on-timeout", type=float, default=60.0, help="Seconds to wait for a PSU to come back")
+    ap.add_argument("--scheme", default="https", choices=("https", "http"), help="http only for the local simulator")
+    ap.add_argument("--dry-run", action="store_true", help="Print the plan without switching anything")
+    return ap.parse_args()
+
+def main():
+    a = parse_args()
+    try:
+        wiring = Wiring.load(a.wiring) if a.wiring else Wiring.default()
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"[FATAL] Bad wiring file {a.wiring}: {e}")
+        sys.exit(1)
+    if a.dump_wiring:
+        print(json.dumps(wiring.to_json(), indent=2))
+        return
+    if not (a.names or a.rack or a.server_prefix):
+        print("[FATAL] Name servers, --rack or --server-prefix explicitly; this switches PDU outlets off")
+        sys.exit(1)
+
+    inv = inventory.load(a.ipmi, pdu_prefix=a.pdu_prefix)
+    plans = []
+    for node in select_servers(inv, a.names, a.rack, a.server_prefix):
+        feeds, reason = plan_server(inv, node, wiring, a.pdu_prefix, (a.pdu_user, a.pdu_pass))
+        if feeds:
+            plans.append((node, feeds))
+        else:
+            print(f"[WARN] {node['name']} skipped: {reason}")
+    plans = interleave(plans)
+    if not plans:
+        print("[FATAL] Nothing to cycle")
+        sys.exit(1)
+
+    if a.dry_run:
+        for node, feeds in plans:
+            order = ", ".join(f"PSU{f.psu} {f.pdu} [{' '.join(map(str, f.outlets))}]" for f in feeds)
+            print(f"{node['name']} rack {node.get('rack')} RU {node.get('ru')}: {order}")
+        print(f"[SUCCESS] {len(plans)} servers planned, nothing switched")
+        return
+
+    policy = SafetyPolicy(per_pdu=a.per_pdu, per_rack=a.per_rack, require_redundancy=not a.no_redundancy_check)
+    timing = Timing(off_w=a.off_w, on_w=a.on_w, poll_s=a.poll, off_timeout_s=a.off_timeout, on_timeout_s=a.on_timeout)
+    start = time.time()
+    summary = asyncio.run(run_cycle(plans, a.out, a.log, policy, timing, a.workers, a.scheme))
+    print(f"[Cycle Completed] Servers: {summary['servers']} | Passed: {summary['passed']} | "
+          f"Failed: {len(summary['failed'])} | Skipped: {summary['skipped']} | Duration {time.time() - start:.2f} seconds")
+    if summary["restore_failures"]:
+        print(f"[FATAL] {summary['restore_failures']} PSU(s) did not come back after On; run halted, check {a.log}")
+        sys.exit(2)
+    print(f"[SUCCESS] Wrote per-PSU results to {a.out}")
+
+if __name__ == "__main__":
+    main()
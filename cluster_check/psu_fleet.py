@@ -0,0 +1,372 @@
+"""
+Fleet-wide PSU sweep with vectorized anomaly detection.
+
+query_power.sh / query_cluster_psu_check.sh read /redfish/v1/Chassis/1/Power one
+host at a time and only flag PSUs below 100 V. This sweep reads every server once
+(RedfishClient.get_psu_health) into a columnar PsuTable, one NumPy row per PSU,
+and scores the whole fleet in a single pass:
+
+    unreachable     Power resource could not be read
+    dead            input below 100 V or missing (what the bash checks report)
+    sag             PSU voltage low against the other PSUs on its PDU feed
+    feed_sag        a whole PDU feed low against the fleet (upstream of the servers)
+    rack_sag        a whole rack low against the fleet
+    imbalance       PSU drawing a lopsided share of its server's load
+    feed_imbalance  PDU feed drawing a lopsided share of its rack's load
+
+"Low" is a robust z-score (median and MAD per group), so a few bad readings don't
+move the baseline. A PSU's feed is the PDU its bay is cabled to
+(inventory.psu_feeds); PSUs of servers at an unmapped RU are compared per rack.
+
+Usage:
+    python psu_fleet.py --ipmi ipmi.json --out psu_anomalies.csv
+    python psu_fleet.py --ipmi ipmi.json --save-table psu.npz
+    python psu_fleet.py --from-table psu.npz --sag-z 3      # re-score without sweeping
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import inventory
+from cluster_ttt import drive_hosts
+from redfish_ttt import ClientConfig, RedfishClient
+
+MAD_SCALE = 1.4826      # MAD -> standard deviation for normally distributed readings
+
+KIND_ORDER = ("unreachable", "dead", "rack_sag", "feed_sag", "sag", "feed_imbalance", "imbalance")
+
+# ----------- Columnar PSU table ----------- #
+@dataclass
+class PsuTable:
+    """
+    One row per PSU. host/rack/feed are codes into the name lists (feed -1 = unknown);
+    volts/watts are NaN where the BMC didn't report a number.
+    """
+    hosts: List[str]
+    racks: List[str]
+    feeds: List[str]
+    feed_rack: np.ndarray       # rack code of every feed
+    host: np.ndarray            # int32
+    rack: np.ndarray            # int32
+    feed: np.ndarray            # int32
+    bay: np.ndarray             # int16, position in PowerSupplies (0 = PSU 1)
+    volts: np.ndarray           # float64, LineInputVoltage
+    watts: np.ndarray           # float64, PowerInputWatts
+    unreachable: List[str]
+
+    def __len__(self) -> int:
+        return len(self.host)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            hosts=np.array(self.hosts, dtype=str), racks=np.array(self.racks, dtype=str),
+            feeds=np.array(self.feeds, dtype=str), unreachable=np.array(self.unreachable, dtype=str),
+            feed_rack=self.feed_rack, host=self.host, rack=self.rack, feed=self.feed, bay=self.bay,
+            volts=self.volts, watts=self.watts,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "PsuTable":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(
+                hosts=z["hosts"].tolist(), racks=z["racks"].tolist(), feeds=z["feeds"].tolist(),
+                feed_rack=z["feed_rack"], host=z["host"], rack=z["rack"], feed=z["feed"], bay=z["bay"],
+                volts=z["volts"], watts=z["watts"], unreachable=z["unreachable"].tolist(),
+            )
+
+class PsuTableBuilder:
+    """Appends hosts' get_psu_health() results to flat typed arrays (no per-PSU objects)."""
+    def __init__(self, pdu_prefix: str = inventory.DEFAULT_PDU_PREFIX):
+        self.pdu_prefix = pdu_prefix
+        self.hosts: List[str] = []
+        self.unreachable: List[str] = []
+        self._racks: Dict[str, int] = {}
+        self._feeds: Dict[str, int] = {}
+        self._feed_rack = array("i")
+        self._host, self._rack, self._feed = array("i"), array("i"), array("i")
+        self._bay = array("h")
+        self._volts, self._watts = array("d"), array("d")
+
+    def add(self, name: str, rack: Any, ru: Any, psus: Optional[List[Dict[str, Any]]]) -> None:
+        if psus is None:
+            self.unreachable.append(name)
+            return
+        h = len(self.hosts)
+        self.hosts.append(name)
+        rack_name = "?" if rack is None or rack == "" else str(rack)
+        r = self._racks.setdefault(rack_name, len(self._racks))
+        feeds = inventory.psu_feeds(rack, ru, self.pdu_prefix) or ()
+        nan = float("nan")
+        for i, psu in enumerate(psus):
+            f = -1
+            if i < len(feeds):
+                f = self._feeds.get(feeds[i], -1)
+                if f < 0:
+                    f = self._feeds[feeds[i]] = len(self._feeds)
+                    self._feed_rack.append(r)
+            v, w = psu.get("line_input_v"), psu.get("input_w")
+            self._host.append(h)
+            self._rack.append(r)
+            self._feed.append(f)
+            self._bay.append(i)
+            self._volts.append(nan if v is None else v)
+            self._watts.append(nan if w is None else w)
+
+    def table(self) -> PsuTable:
+        return PsuTable(
+            hosts=self.hosts, racks=list(self._racks), feeds=list(self._feeds),
+            feed_rack=np.array(self._feed_rack, dtype=np.int32),
+            host=np.array(self._host, dtype=np.int32), rack=np.array(self._rack, dtype=np.int32),
+            feed=np.array(self._feed, dtype=np.int32), bay=np.array(self._bay, dtype=np.int16),
+            volts=np.array(self._volts, dtype=np.float64), watts=np.array(self._watts, dtype=np.float64),
+            unreachable=self.unreachable,
+        )
+
+# ----------- Vectorized analysis ----------- #
+@dataclass(frozen=True)
+class Thresholds:
+    dead_v: float = 100.0           # below this the PSU has no input (bash: LineInputVoltage < 100)
+    sag_z: float = 4.0              # robust z-score at or below -sag_z is a sag...
+    sag_min_v: float = 5.0          # ...if it is also at least this many volts under the baseline
+    mad_floor_v: float = 1.0        # BMCs report whole volts; a MAD of 0 must not make 1 V an outlier
+    min_group: int = 3              # smallest feed/rack worth its own baseline
+    imbalance_tol: float = 0.5      # |share / fair share - 1| above this is an imbalance
+    min_host_w: float = 200.0       # ignore near-idle servers for imbalance
+    feed_imbalance_tol: float = 0.35
+
+@dataclass(frozen=True)
+class Anomaly:
+    kind: str
+    rack: str
+    feed: str
+    name: str               # server, or "" for feed/rack anomalies
+    psu: str                # PSU number (1-based), or ""
+    value: float            # V for *sag/dead, W for *imbalance
+    baseline: float
+    score: float            # robust z-score or share / fair share
+
+def group_median(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of values per group code in one sort; NaN for groups without values."""
+    ok = ~np.isnan(values)
+    c, v = codes[ok], values[ok]
+    order = np.lexsort((v, c))
+    v = v[order]
+    counts = np.bincount(c, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    med = np.full(n_groups, np.nan)
+    has = counts > 0
+    lo = starts[has] + (counts[has] - 1) // 2
+    hi = starts[has] + counts[has] // 2
+    med[has] = (v[lo] + v[hi]) / 2.0
+    return med
+
+def robust_z(codes: np.ndarray, values: np.ndarray, n_groups: int, floor: float):
+    """(z, baseline) per value against its group's median and MAD."""
+    med = group_median(codes, values, n_groups)
+    base = med[codes]
+    mad = group_median(codes, np.abs(values - base), n_groups)[codes]
+    return (values - base) / (MAD_SCALE * np.maximum(mad, floor)), base
+
+def find_anomalies(t: PsuTable, th: Thresholds = Thresholds()) -> List[Anomaly]:
+    out: List[Anomaly] = [Anomaly("unreachable", "", "", name, "", np.nan, np.nan, np.nan) for name in t.unreachable]
+    n_racks, n_feeds = len(t.racks), len(t.feeds)
+    if len(t) == 0:
+        return out
+    v, w = t.volts, t.watts
+    with np.errstate(invalid="ignore"):
+        live = v >= th.dead_v           # NaN compares False: unreadable counts as dead
+    feed_name = np.array(t.feeds + [""], dtype=object)      # feed -1 -> ""
+
+    def psu_row(kind: str, i: int, value: float, base: float, score: float) -> Anomaly:
+        return Anomaly(kind, t.racks[t.rack[i]], feed_name[t.feed[i]], t.hosts[t.host[i]],
+                       str(int(t.bay[i]) + 1), float(value), float(base), float(score))
+
+    for i in np.flatnonzero(~live):
+        out.append(psu_row("dead", i, v[i], th.dead_v, np.nan))
+
+    lv = np.where(live, v, np.nan)
+
+    # Rack and feed levels against the fleet (medians of groups with enough live PSUs)
+    for kind, codes, n, names in (
+        ("rack_sag", t.rack, n_racks, t.racks),
+        ("feed_sag", t.feed, n_feeds, t.feeds),
+    ):
+        known = codes >= 0
+        counts = np.bincount(codes[known & live], minlength=n)
+        med = group_median(codes[known], lv[known], n)
+        med[counts < th.min_group] = np.nan
+        ok = ~np.isnan(med)
+        if ok.sum() < th.min_group:
+            continue
+        z, base = robust_z(np.zeros(int(ok.sum()), dtype=np.int32), med[ok], 1, th.mad_floor_v)
+        idx = np.flatnonzero(ok)
+        for j in np.flatnonzero((z <= -th.sag_z) & (base - med[ok] >= th.sag_min_v)):
+            g = idx[j]
+            rack = names[g] if kind == "rack_sag" else t.racks[t.feed_rack[g]]
+            feed = "" if kind == "rack_sag" else names[g]
+            out.append(Anomaly(kind, rack, feed, "", "", float(med[g]), float(base[j]), float(z[j])))
+
+    # PSU level: against the other PSUs on the same feed, else the same rack
+    feed_counts = np.bincount(t.feed[(t.feed >= 0) & live], minlength=n_feeds)
+    by_feed = t.feed >= 0
+    by_feed[by_feed] = feed_counts[t.feed[by_feed]] >= th.min_group
+    z = np.full(len(t), np.nan)
+    base = np.full(len(t), np.nan)
+    if by_feed.any():
+        z[by_feed], base[by_feed] = robust_z(t.feed[by_feed], lv[by_feed], n_feeds, th.mad_floor_v)
+    rest = ~by_feed
+    if rest.any():
+        z[rest], base[rest] = robust_z(t.rack[rest], lv[rest], n_racks, th.mad_floor_v)
+    with np.errstate(invalid="ignore"):
+        sag = live & (z <= -th.sag_z) & (base - v >= th.sag_min_v)
+    for i in np.flatnonzero(sag):
+        out.append(psu_row("sag", i, v[i], base[i], z[i]))
+
+    # Load sharing: each live PSU against an even split of its server's draw
+    has_w = live & ~np.isnan(w)
+    ww = np.where(has_w, w, 0.0)
+    host_w = np.bincount(t.host, weights=ww, minlength=len(t.hosts))
+    host_n = np.bincount(t.host[has_w], minlength=len(t.hosts))
+    fair = host_w / np.maximum(host_n, 1)
+    share = np.where(has_w, ww / np.maximum(fair[t.host], 1e-9), np.nan)
+    with np.errstate(invalid="ignore"):
+        imb = has_w & (host_n[t.host] >= 2) & (host_w[t.host] >= th.min_host_w) & (np.abs(share - 1.0) > th.imbalance_tol)
+    for i in np.flatnonzero(imb):
+        out.append(psu_row("imbalance", i, w[i], fair[t.host[i]], share[i]))
+
+    # Feed load against the other feeds of its rack
+    known = has_w & (t.feed >= 0)
+    if n_feeds:
+        feed_w = np.bincount(t.feed[known], weights=w[known], minlength=n_feeds)
+        has_feed = np.bincount(t.feed[known], minlength=n_feeds) > 0
+        rack_w = np.bincount(t.feed_rack, weights=feed_w, minlength=n_racks)
+        rack_nf = np.bincount(t.feed_rack[has_feed], minlength=n_racks)
+        fair_f = rack_w[t.feed_rack] / np.maximum(rack_nf[t.feed_rack], 1)
+        share_f = feed_w / np.maximum(fair_f, 1e-9)
+        flag = has_feed & (rack_nf[t.feed_rack] >= 2) & (np.abs(share_f - 1.0) > th.feed_imbalance_tol)
+        for g in np.flatnonzero(flag):
+            out.append(Anomaly("feed_imbalance", t.racks[t.feed_rack[g]], t.feeds[g], "", "",
+                               float(feed_w[g]), float(fair_f[g]), float(share_f[g])))
+
+    rank = {k: i for i, k in enumerate(KIND_ORDER)}
+    out.sort(key=lambda a: (rank[a.kind], a.rack, a.feed, a.name, a.psu))
+    return out
+
+# ----------- Sweep ----------- #
+async def sweep_psus(
+    datastore_json_file: str,
+    server_prefix: str,
+    pdu_prefix: str,
+    max_concurrency: int = 400,
+    workers: Optional[int] = None,
+    scheme: str = "https",
+) -> PsuTable:
+    nodes = inventory.load(datastore_json_file, pdu_prefix=pdu_prefix).with_prefix(server_prefix)
+    builder = PsuTableBuilder(pdu_prefix)
+    cfg = ClientConfig(
+        verify_ssl=False,
+        max_retries=2,
+        per_request_semaphore=asyncio.Semaphore(max_concurrency),
+        conn_limit=max_concurrency,
+        scheme=scheme,
+        discovery=False,
+    )
+    async with RedfishClient(cfg) as rf:
+        async def one(node: Dict[str, Any]):
+            try:
+                psus = await rf.get_psu_health(node["ip"], username=node["username"], password=node["password"])
+            except Exception:
+                psus = None
+            return node, psus
+
+        async def on_result(res) -> None:
+            node, psus = res
+            builder.add(node["name"], node.get("rack"), node.get("ru"), psus)
+
+        n_workers = max(1, min(workers or max_concurrency, len(nodes) or 1))
+        await drive_hosts(((n,) for n in nodes), n_workers, one, on_result)
+    return builder.table()
+
+def write_csv(path: str, anomalies: List[Anomaly]) -> None:
+    def num(x: float) -> str:
+        return "" if np.isnan(x) else f"{x:.6g}"
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write("kind,rack,feed,name,psu,value,baseline,score\n")
+        for a in anomalies:
+            fh.write(f"{a.kind},{a.rack},{a.feed},{a.name},{a.psu},{num(a.value)},{num(a.baseline)},{num(a.score)}\n")
+    os.replace(tmp, path)
+
+# ---------- cli ----------
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Fleet-wide PSU sweep with vectorized outlier detection")
+    ap.add_argument("--ipmi", default="ipmi.json", help="Path to ipmi.json")
+    ap.add_argument("--server-prefix", default="tus1-p", help="Server name prefix filter")
+    ap.add_argument("--pdu-prefix", default="tus1-pdu", help="PDU name prefix (also names the feeds)")
+    ap.add_argument("--out", default="psu_anomalies.csv", help="Anomaly CSV")
+    ap.add_argument("--concurrency", type=int, default=400, help="Max concurrent requests")
+    ap.add_argument("--workers", type=int, default=None, help="Hosts swept at once (default: --concurrency)")
+    ap.add_argument("--scheme", default="https", choices=("https", "http"), help="http only for the local simulator")
+    ap.add_argument("--save-table", default=None, help="Also save the PSU table (.npz) for later --from-table runs")
+    ap.add_argument("--from-table", default=None, help="Score a saved table instead of sweeping")
+    d = Thresholds()
+    ap.add_argument("--sag-z", type=float, default=d.sag_z, help="Robust z-score that counts as a sag")
+    ap.add_argument("--sag-min-v", type=float, default=d.sag_min_v, help="Minimum drop below baseline (V)")
+    ap.add_argument("--imbalance-tol", type=float, default=d.imbalance_tol, help="Allowed deviation from an even PSU load split")
+    ap.add_argument("--feed-imbalance-tol", type=float, default=d.feed_imbalance_tol, help="Allowed deviation of a feed's load from its rack's mean")
+    ap.add_argument("--show", type=int, default=20, help="Anomalies to print (all are written to --out)")
+    return ap.parse_args()
+
+def main():
+    a = parse_args()
+    th = Thresholds(
+        sag_z=a.sag_z, sag_min_v=a.sag_min_v,
+        imbalance_tol=a.imbalance_tol, feed_imbalance_tol=a.feed_imbalance_tol,
+    )
+    start = time.time()
+    if a.from_table:
+        table = PsuTable.load(a.from_table)
+    else:
+        table = asyncio.run(sweep_psus(a.ipmi, a.server_prefix, a.pdu_prefix, a.concurrency, a.workers, a.scheme))
+        print(f"[Sweep Completed] Servers: {len(table.hosts) + len(table.unreachable)} | "
+              f"PSUs: {len(table)} | Unreachable: {len(table.unreachable)} | Duration {time.time() - start:.2f} seconds")
+    if a.save_table:
+        table.save(a.save_table)
+
+    t0 = time.perf_counter()
+    anomalies = find_anomalies(table, th)
+    print(f"[Analysis] Racks: {len(table.racks)} | Feeds: {len(table.feeds)} | {(time.perf_counter() - t0) * 1000:.1f} ms")
+    write_csv(a.out, anomalies)
+
+    counts = {k: 0 for k in KIND_ORDER}
+    for x in anomalies:
+        counts[x.kind] += 1
+    print("[Anomalies] " + " | ".join(f"{k}: {n}" for k, n in counts.items()))
+    for x in anomalies[:a.show]:
+        where = x.name or x.feed or x.rack
+        psu = f" PSU{x.psu}" if x.psu else ""
+        if x.kind == "unreachable":
+            detail = ""
+        elif x.kind.endswith("imbalance"):
+            detail = f" {x.value:.0f} W vs {x.baseline:.0f} W ({x.score:.2f}x)"
+        elif x.kind == "dead":
+            detail = " no input" if np.isnan(x.value) else f" {x.value:.0f} V"
+        else:
+            detail = f" {x.value:.1f} V vs {x.baseline:.1f} V (z={x.score:.1f})"
+        print(f"[WARN] {x.kind:<15} {where}{psu}{detail}")
+    if len(anomalies) > a.show:
+        print(f"  ... {len(anomalies) - a.show} more")
+    print(f"[SUCCESS] Wrote {len(anomalies)} anomalies to {a.out}")
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,30 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 import random
+import re
 import ssl
+import sys
 import time
 from dataclasses import dataclass
-from typing import Any, Optional, Dict
+from typing import Any, Awaitable, Callable, Optional, Dict, Iterable, List, Mapping, Tuple
 
 import aiohttp
 
+# Rate limiting, JSON decoding and field projections are shared with the PDU exporter's client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "redfish_pdu_exporter"))
+from redfish_common import (  # noqa: E402
+    DecodeStats,
+    Field,
+    HostRateLimiter,
+    KeepSpec,
+    Projection,
+    loads_json,
+    loads_json_lenient,
+    project_fields,
+)
+
 class RedfishError(Exception):
     """Generic Redfish client error."""
 
@@ -23,19 +39,212 @@ class ClientConfig:
     max_retries: int = 2
     backoff_base_s: float = 0.2
     per_request_semaphore: Optional[asyncio.Semaphore] = None
+    per_host_qps: Optional[float] = None     # token-bucket rate per host, None = unlimited
+    per_host_burst: Optional[float] = None   # bucket size, defaults to max(1, per_host_qps)
+    per_host_concurrency: Optional[int] = None  # max in-flight requests per BMC, None = unlimited
+    scheme: str = "https"                    # "http" only for the local simulator
+    # Connection pool (aiohttp.TCPConnector)
+    conn_limit: int = 100                    # total sockets, 0 = unlimited
+    keepalive_timeout_s: float = 5.0         # a host's checks finish within seconds; don't hoard sockets
+    # Discovery: walk Members collections instead of probing every slot
+    discovery: bool = True
+    discovery_cache_path: Optional[str] = None   # JSON inventory cache, None = in-memory only
+    discovery_ttl_s: float = 24 * 3600.0
+    # Conditional GETs: resend a URL's last ETag/Last-Modified and reuse the cached body on 304
+    etag_cache: bool = False
+    etag_cache_path: Optional[str] = None        # JSON response cache, None = in-memory only
+    etag_ttl_s: float = 7 * 24 * 3600.0          # drop entries not revalidated for this long
+
+@dataclass
+class HostInventory:
+    """
+    Populated resources found by walking a host's Members collections.
+    Each list holds resource paths; None means the collection could not be
+    read (callers fall back to probing fixed slots).
+    """
+    ts: float
+    memory: Optional[List[str]] = None   # /redfish/v1/Systems/1/Memory/{n}
+    nvme: Optional[List[str]] = None     # /redfish/v1/Chassis/1/PCIeDevices/NVMeSSD{n}
+    m2: Optional[List[str]] = None       # .../Drives/Disk.Bay.{n}
+
+class InventoryCache:
+    """
+    Per-host HostInventory, shared by all checks of a sweep and optionally
+    persisted to a JSON file. Entries older than ttl_s are rediscovered.
+    """
+    def __init__(self, path: Optional[str], ttl_s: float):
+        self.path = path
+        self.ttl_s = ttl_s
+        self._entries: Dict[str, HostInventory] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._dirty = False
+        self.hits = 0
+        self.walks = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self) -> None:
+        assert self.path is not None
+        try:
+            with open(self.path, "r") as fh:
+                raw = json.load(fh)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable inventory cache {self.path}: {e}")
+            return
+        now = time.time()
+        for ip, entry in raw.items():
+            try:
+                inv = HostInventory(**entry)
+            except TypeError:
+                continue
+            if now - inv.ts < self.ttl_s:
+                self._entries[ip] = inv
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump({ip: inv.__dict__ for ip, inv in self._entries.items()}, fh, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    async def get(self, ip: str, discover: Callable[[], Awaitable[Optional[HostInventory]]]) -> Optional[HostInventory]:
+        inv = self._entries.get(ip)
+        if inv is not None and time.time() - inv.ts < self.ttl_s:
+            self.hits += 1
+            return inv
+        task = self._pending.get(ip)
+        if task is None:
+            self.walks += 1
+            task = self._pending[ip] = asyncio.ensure_future(discover())
+            task.add_done_callback(lambda t, ip=ip: self._store(ip, t))
+        # Shielded: one check timing out must not cancel the walk its siblings wait on
+        return await asyncio.shield(task)
+
+    def _store(self, ip: str, task: asyncio.Future) -> None:
+        self._pending.pop(ip, None)
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+        self._entries[ip] = task.result()
+        self._dirty = True
+
+@dataclass
+class CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    data: Any               # body after keep-projection, as returned to callers
+    ts: float               # last stored or revalidated
+
+class EtagCache:
+    """
+    Last response per (URL, keep) with its validators, so repeat GETs are sent with
+    If-None-Match / If-Modified-Since and a 304 reuses the stored body without a
+    transfer or decode. Optionally persisted to a JSON file; entries not revalidated
+    within ttl_s are dropped on load. Responses without validators are not kept.
+    """
+    def __init__(self, path: Optional[str], ttl_s: float):
+        self.path = path
+        self.ttl_s = ttl_s
+        self._entries: Dict[str, CachedResponse] = {}
+        self._dirty = False
+        self.revalidated = 0    # 304s answered from the cache
+        self.stored = 0         # 2xx responses that carried a validator
+        if path and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def key(url: str, keep: Optional[KeepSpec]) -> str:
+        # The same URL read with a different keep holds different fields
+        return url if keep is None else f"{url}#{json.dumps(keep, separators=(',', ':'))}"
+
+    def load(self) -> None:
+        assert self.path is not None
+        try:
+            with open(self.path, "r") as fh:
+                raw = json.load(fh)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable ETag cache {self.path}: {e}")
+            return
+        now = time.time()
+        for key, entry in raw.items():
+            try:
+                cached = CachedResponse(**entry)
+            except TypeError:
+                continue
+            if now - cached.ts < self.ttl_s:
+                self._entries[key] = cached
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump({k: e.__dict__ for k, e in self._entries.items()}, fh, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def conditions(self, key: str) -> Optional[Dict[str, str]]:
+        """Request headers that make a GET of key conditional, or None if nothing is cached."""
+        e = self._entries.get(key)
+        if e is None:
+            return None
+        headers = {}
+        if e.etag:
+            headers["If-None-Match"] = e.etag
+        if e.last_modified:
+            headers["If-Modified-Since"] = e.last_modified
+        return headers
+
+    def revalidate(self, key: str) -> Optional[Any]:
+        """Body for a 304 on key, or None if it was never cached."""
+        e = self._entries.get(key)
+        if e is None:
+            return None
+        e.ts = time.time()
+        self._dirty = True
+        self.revalidated += 1
+        return e.data
+
+    def store(self, key: str, headers: Mapping[str, str], data: Any) -> None:
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if etag is None and last_modified is None:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+            return
+        self._entries[key] = CachedResponse(etag, last_modified, data, time.time())
+        self._dirty = True
+        self.stored += 1
 
 class RedfishClient:
     """
     Async Redfish client:
       - Single aiohttp session (keep-alive)
-      - Optional global semaphore for concurrency
+      - Optional global semaphore and per-host in-flight cap
       - Jittered exponential backoff retries
+      - Bodies read once as bytes and decoded with orjson when installed
+      - Optional conditional GETs (ETag / Last-Modified) against an EtagCache
     """
 
     def __init__(self, cfg: Optional[ClientConfig] = None):
         self.cfg = cfg or ClientConfig()
         self._session: Optional[aiohttp.ClientSession] = None
         self._ssl_context: Optional[ssl.SSLContext] = None
+        self.rate_limiter: Optional[HostRateLimiter] = None
+        if self.cfg.per_host_qps:
+            self.rate_limiter = HostRateLimiter(self.cfg.per_host_qps, self.cfg.per_host_burst)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.inventory: Optional[InventoryCache] = None
+        if self.cfg.discovery:
+            self.inventory = InventoryCache(self.cfg.discovery_cache_path, self.cfg.discovery_ttl_s)
+        self.etags: Optional[EtagCache] = None
+        if self.cfg.etag_cache:
+            self.etags = EtagCache(self.cfg.etag_cache_path, self.cfg.etag_ttl_s)
+        self.decode_stats = DecodeStats(bucket_counts=[0] * len(DecodeStats.BUCKETS))
+        # ip -> whether the BMC honours $expand on collections (learned from the first response)
+        self._expand_support: Dict[str, bool] = {}
+        # (ip, collection) -> in-flight read, shared by concurrent checks of the same host
+        self._collections: Dict[Tuple[str, str], asyncio.Future] = {}
 
         if not self.cfg.verify_ssl:
             self._ssl_context = ssl.create_default_context()
@@ -57,15 +266,95 @@ class RedfishClient:
                 sock_read=self.cfg.read_timeout_s,
             )
             headers = {"User-Agent": self.cfg.user_agent, "Accept": "application/json"}
-            self._session = aiohttp.ClientSession(timeout=timeout, headers=headers)
+            connector = aiohttp.TCPConnector(
+                limit=self.cfg.conn_limit,
+                keepalive_timeout=self.cfg.keepalive_timeout_s,
+            )
+            self._session = aiohttp.ClientSession(timeout=timeout, headers=headers, connector=connector)
 
     async def close(self) -> None:
+        # Shared collection reads outlive the checks awaiting them; don't let them hit a closed session
+        for task in list(self._collections.values()):
+            task.cancel()
+        await asyncio.gather(*self._collections.values(), return_exceptions=True)
         if self._session and not self._session.closed:
             await self._session.close()
 
 
 ## Public API ##
 
+    async def fetch(
+        self,
+        ip: str,
+        path: str,
+        projection: Optional[Projection] = None,
+        *,
+        username: str,
+        password: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Generic primitive for checks: GET {scheme}://{ip}{path} and apply projection
+        (raw JSON if None). Returns None if absent (404) or unreachable after retries.
+        """
+        url = f"{self.cfg.scheme}://{ip}{path}"
+        keep = projection.keep if projection is not None else None
+        data = await self._get_json_with_retries(url, auth=aiohttp.BasicAuth(username, password), keep=keep)
+        if data is None or projection is None:
+            return data
+        return projection.extract(data)
+
+    async def fetch_many(
+        self,
+        ip: str,
+        paths: Iterable[str],
+        projection: Optional[Projection] = None,
+        *,
+        username: str,
+        password: str,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """fetch() for several paths concurrently; results align with paths, None where absent."""
+        auth = aiohttp.BasicAuth(username, password)
+        keep = projection.keep if projection is not None else None
+        base = f"{self.cfg.scheme}://{ip}"
+        datas = await asyncio.gather(
+            *(self._get_json_with_retries(f"{base}{p}", auth=auth, keep=keep) for p in paths)
+        )
+        if projection is None:
+            return list(datas)
+        extracted = iter(projection.many(d for d in datas if d is not None))
+        return [next(extracted) if d is not None else None for d in datas]
+
+    async def fetch_members(
+        self,
+        ip: str,
+        collection: str,
+        projection: Projection,
+        *,
+        username: str,
+        password: str,
+        prefix: Optional[str] = None,
+    ) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        (path, projected doc) for every member of a collection, in collection order.
+        One GET with $expand where the BMC supports it; otherwise the member links
+        are followed concurrently. prefix keeps only members whose last path segment
+        starts with it. None if the collection can't be read.
+        """
+        auth = aiohttp.BasicAuth(username, password)
+        members = await self._collection_members(ip, collection, auth)
+        if members is None:
+            return None
+        if prefix is not None:
+            members = [(p, d) for p, d in members if _last_segment(p).startswith(prefix)]
+        links = [p for p, d in members if d is None]
+        fetched = iter(await self.fetch_many(ip, links, projection, username=username, password=password))
+        out = []
+        for path, doc in members:
+            doc = projection.extract(doc) if doc is not None else next(fetched)
+            if doc is not None:
+                out.append((path, doc))
+        return out
+
     async def get_liquid_leak(
         self,
         ip: str,
@@ -78,122 +367,227 @@ class RedfishClient:
         GET /redfish/v1/Chassis/1/Sensors/LiquidLeak
         Returns dict: {"health": ..., "location": ...} or None on failure/not present.
         """
-        url = f"https://{ip}/redfish/v1/Chassis/1/Sensors/LiquidLeak"
-        data = await self._get_json_with_retries(url, auth=aiohttp.BasicAuth(username, password))
-        if data is None:
-            return None
-        return _extract_liquid_leak(data)
-    
-    # --- Placeholders for future expansion ---
-    async def get_m2_health(self, ip: str, *, username: str, password: str) -> Optional[Dict[str, Any]]:
-        auth = aiohttp.BasicAuth(username, password)
-        base = f"https://{ip}/redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives"
-        url_0 = f"{base}/Disk.Bay.0"
-        url_1 = f"{base}/Disk.Bay.1"
-        data_0, data_1 = await asyncio.gather(
-            self._get_json_with_retries(url_0,auth=auth),
-            self._get_json_with_retries(url_1,auth=auth),
+        return await self.fetch(
+            ip, "/redfish/v1/Chassis/1/Sensors/LiquidLeak", LIQUID_LEAK, username=username, password=password
         )
-        
-        if data_0 is None and data_1 is None:
-            return None
-        
-        drives: List[Dict[str, Any]] = []
-        if data_0 is not None:
-            drives.append(_extract_m2_drive(data_0, bay="0"))
-        if data_1 is not None:
-            drives.append(_extract_m2_drive(data_1, bay="1"))
-        return drives
-    
-    async def get_nvme_health(self, ip: str, *, username: str, password: str) -> Optional[Dict[str, Any]]:
+
+    async def discover(self, ip: str, *, username: str, password: str) -> Optional[HostInventory]:
+        """
+        Walk the Memory, PCIeDevices and Drives Members collections once.
+        Members whose Status/State is Absent (empty DIMM slots, most often) are
+        left out. Returns None if none of the collections could be read.
+        """
         auth = aiohttp.BasicAuth(username, password)
-        base = f"https://{ip}/redfish/v1/Chassis/1/PCIeDevices/NVMeSSD"
-        url_1 = f"{base}1"
-        url_2 = f"{base}2"
-        url_3 = f"{base}3"
-        url_4 = f"{base}4"
-
-        data_1, data_2, data_3, data_4 = await asyncio.gather(
-            self._get_json_with_retries(url_1,auth=auth),
-            self._get_json_with_retries(url_2,auth=auth),
-            self._get_json_with_retries(url_3,auth=auth),
-            self._get_json_with_retries(url_4,auth=auth),
+        mem, pcie, drives = await asyncio.gather(*(
+            self._collection_members(ip, c, auth) for c in (MEMORY_COLLECTION, PCIE_COLLECTION, DRIVES_COLLECTION)
+        ))
+        if mem is None and pcie is None and drives is None:
+            return None
+        # Bare links say nothing about presence: read the DIMM/drive resources once, here, not every sweep
+        mem, drives = await asyncio.gather(
+            self._present_paths(ip, mem, auth), self._present_paths(ip, drives, auth)
         )
-        
-        if data_1 is None and data_2 is None and data_3 is None and data_4 is None:
+        nvme = None
+        if pcie is not None:
+            nvme = [p for p, d in pcie if _last_segment(p).startswith("NVMeSSD") and not _absent(d)]
+        return HostInventory(ts=time.time(), memory=mem, nvme=nvme, m2=drives)
+
+    async def _present_paths(
+        self, ip: str, members: Optional[List[Tuple[str, Optional[Dict[str, Any]]]]], auth: aiohttp.BasicAuth
+    ) -> Optional[List[str]]:
+        """Member paths minus the Absent ones; a member that can't be read is kept."""
+        if members is None:
             return None
-        
-        drives: List[Dict[str, Any]] = []
-        if data_1 is not None:
-            drives.append(_extract_nvme_drive(data_1, bay="1"))
-        if data_2 is not None:
-            drives.append(_extract_nvme_drive(data_2, bay="2"))
-        if data_3 is not None:
-            drives.append(_extract_nvme_drive(data_3, bay="3"))
-        if data_4 is not None:
-            drives.append(_extract_nvme_drive(data_4, bay="4"))    
-        return drives
-    
-    async def get_memory_health(self, ip: str, *, username: str, password: str) -> Optional[List[Dict[str, Any]]]:
-        
-        auth = aiohttp.BasicAuth(username, password)
-        base = f"https://{ip}/redfish/v1/Systems/1/Memory/"
-        # /redfish/v1/Systems/1/Memory/12/MemoryMetrics
-        dimm_slots = [str(i) for i in range(1, 25)]
-        urls = [f"{base}{dimm}/MemoryMetrics" for dimm in dimm_slots]
+        links = [p for p, d in members if d is None]
+        docs = await asyncio.gather(*(
+            self._get_json_with_retries(f"{self.cfg.scheme}://{ip}{p}", auth=auth, keep=PRESENCE.keep) for p in links
+        ))
+        read = dict(zip(links, docs))
+        return [p for p, d in members if not _absent(read[p] if d is None else d)]
+
+    async def get_inventory(self, ip: str, *, username: str, password: str) -> Optional[HostInventory]:
+        """Cached discover(); None when discovery is disabled or failed."""
+        if self.inventory is None:
+            return None
+        return await self.inventory.get(ip, lambda: self.discover(ip, username=username, password=password))
+
+    async def get_m2_health(self, ip: str, *, username: str, password: str) -> Optional[List[Dict[str, Any]]]:
+        inv = await self.get_inventory(ip, username=username, password=password)
+        if inv is not None and inv.m2 is not None:
+            paths = inv.m2
+        else:
+            paths = [f"{DRIVES_COLLECTION}/Disk.Bay.{b}" for b in ("0", "1")]
+        docs = await self.fetch_many(ip, paths, M2_DRIVE, username=username, password=password)
+        if all(d is None for d in docs):
+            return None
+        return [{"m2_bay": _slot_label(p), **d} for p, d in zip(paths, docs) if d is not None]
 
-        tasks = [self._get_json_with_retries(url, auth=auth) for url in urls]
-        datas = await asyncio.gather(*tasks)
+    async def get_nvme_health(self, ip: str, *, username: str, password: str) -> Optional[List[Dict[str, Any]]]:
+        if self._expand_support.get(ip, True):
+            # One expanded PCIeDevices read, shared with the GPU/NIC checks
+            found = await self.fetch_members(
+                ip, PCIE_COLLECTION, NVME_DRIVE, username=username, password=password, prefix="NVMeSSD"
+            )
+            if found is not None:
+                return [{"nvme_bay": _slot_label(p), **d} for p, d in found] or None
+        inv = await self.get_inventory(ip, username=username, password=password)
+        if inv is not None and inv.nvme is not None:
+            paths = inv.nvme
+        else:
+            paths = [f"{PCIE_COLLECTION}/NVMeSSD{b}" for b in ("1", "2", "3", "4")]
+        docs = await self.fetch_many(ip, paths, NVME_DRIVE, username=username, password=password)
+        if all(d is None for d in docs):
+            return None
+        return [{"nvme_bay": _slot_label(p), **d} for p, d in zip(paths, docs) if d is not None]
 
-        if all(d is None for d in datas):
+    async def get_memory_health(self, ip: str, *, username: str, password: str) -> Optional[List[Dict[str, Any]]]:
+        # /redfish/v1/Systems/1/Memory/12/MemoryMetrics
+        inv = await self.get_inventory(ip, username=username, password=password)
+        if inv is not None and inv.memory is not None:
+            dimms = inv.memory
+        else:
+            dimms = [f"{MEMORY_COLLECTION}/{i}" for i in range(1, 25)]
+        docs = await self.fetch_many(
+            ip, [f"{d}/MemoryMetrics" for d in dimms], DIMM, username=username, password=password
+        )
+        if all(d is None for d in docs):
             return None
-        
-        dimms: List[Dict[str, Any]] = []
-        for dimm, data in zip(dimm_slots, datas):
-            if data is not None:
-                dimms.append(_extract_dimm(data, dimm=dimm))
+        return [{"dimm_slot": _slot_label(p), **d} for p, d in zip(dimms, docs) if d is not None]
 
-        return dimms
+    async def get_psu_health(self, ip: str, *, username: str, password: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        GET /redfish/v1/Chassis/1/Power
+        Returns [{"psu": MemberId, "name", "line_input_v", "input_w", "health"}, ...] in
+        PowerSupplies order, or None on failure/not present.
+        """
+        doc = await self.fetch(ip, POWER_PATH, POWER_SUPPLIES, username=username, password=password)
+        if doc is None or not isinstance(doc["supplies"], list):
+            return None
+        return PSU.many(doc["supplies"])
+
+    async def _pcie_devices(
+        self, ip: str, kind: str, slots: int, projection: Projection, label: str, *, username: str, password: str,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """PCIeDevices/{kind}{n} from the (expanded) collection, else probed over slots 1..slots."""
+        found = await self.fetch_members(
+            ip, PCIE_COLLECTION, projection, username=username, password=password, prefix=kind
+        )
+        if found is None:
+            paths = [f"{PCIE_COLLECTION}/{kind}{n}" for n in range(1, slots + 1)]
+            docs = await self.fetch_many(ip, paths, projection, username=username, password=password)
+            if all(d is None for d in docs):
+                return None
+            found = [(p, d) for p, d in zip(paths, docs) if d is not None]
+        return [{label: _slot_label(p), **d} for p, d in found]
 
     async def get_cpu_health(self, ip: str, *, username: str, password: str) -> Optional[Dict[str, Any]]:
-        # Example endpoint (varies by vendor): /redfish/v1/Systems/1/Processors
-        # Return a dict like {"summary_health": "...", "processors": [{"id": "...", "health": "..."}]}
-        return None
+        """
+        GET /redfish/v1/Systems/1/Processors (expanded)
+        Returns {"summary_health": worst processor health, "processors": [{"cpu_slot", ...}]}.
+        """
+        found = await self.fetch_members(ip, PROCESSORS_COLLECTION, PROCESSOR, username=username, password=password)
+        if found is None:
+            return None
+        procs = [{"cpu_slot": _slot_label(p), **d} for p, d in found]
+        return {"summary_health": _worst_health(p["health"] for p in procs), "processors": procs}
 
-    async def get_gpu_health(self, ip: str, *, username: str, password: str) -> Optional[Dict[str, Any]]:
-        # Example OEM path may expose GPU sensors: /redfish/v1/Chassis/1/Sensors/<GPU>...
-        return None
+    async def get_gpu_health(self, ip: str, *, username: str, password: str) -> Optional[List[Dict[str, Any]]]:
+        # Same fields as query_host_gpu_check.sh, which GETs GPU1..8 one by one
+        return await self._pcie_devices(ip, "GPU", 8, GPU_DEVICE, "gpu_slot", username=username, password=password)
 
     async def get_nic_health(self, ip: str, *, username: str, password: str) -> Optional[Dict[str, Any]]:
-        # /redfish/v1/Systems/1/EthernetInterfaces or OEM NIC sensors
-        return None
+        """
+        PCIe NIC adapters (query_host_nic_check.sh probes NIC1..11) and the host's
+        EthernetInterfaces links: {"adapters": [...], "interfaces": [...]}, either None if unreadable.
+        """
+        adapters, interfaces = await asyncio.gather(
+            self._pcie_devices(ip, "NIC", 11, NIC_DEVICE, "nic_slot", username=username, password=password),
+            self.fetch_members(ip, ETHERNET_COLLECTION, ETHERNET_INTERFACE, username=username, password=password),
+        )
+        if adapters is None and interfaces is None:
+            return None
+        return {
+            "adapters": adapters,
+            "interfaces": [d for _, d in interfaces] if interfaces is not None else None,
+        }
 
     # ---------- INTERNALS ----------
 
+    async def _collection_members(
+        self, ip: str, collection: str, auth: aiohttp.BasicAuth
+    ) -> Optional[List[Tuple[str, Optional[Dict[str, Any]]]]]:
+        """(path, expanded doc or None) per member; concurrent callers share one request."""
+        key = (ip, collection)
+        task = self._collections.get(key)
+        if task is None:
+            task = self._collections[key] = asyncio.ensure_future(self._read_collection(ip, collection, auth))
+            task.add_done_callback(lambda t, key=key: self._collections.pop(key, None))
+        # Shielded: one check timing out must not cancel the read its siblings wait on
+        return await asyncio.shield(task)
+
+    async def _read_collection(
+        self, ip: str, collection: str, auth: aiohttp.BasicAuth
+    ) -> Optional[List[Tuple[str, Optional[Dict[str, Any]]]]]:
+        expand = self._expand_support.get(ip, True)
+        url = f"{self.cfg.scheme}://{ip}{collection}"
+        data = await self._get_json_with_retries(url + (EXPAND_QUERY if expand else ""), auth=auth, keep=("Members",))
+        if data is None and expand and ip not in self._expand_support:
+            # Some BMCs reject the $expand query (4xx/5xx) instead of ignoring it: try the plain collection
+            data = await self._get_json_with_retries(url, auth=auth, keep=("Members",))
+            if data is not None:
+                self._expand_support[ip] = expand = False
+        if data is None or not isinstance(data.get("Members"), list):
+            return None
+        members = []
+        for m in data["Members"]:
+            if isinstance(m, dict) and isinstance(m.get("@odata.id"), str):
+                # A bare link has nothing but @odata.id
+                members.append((m["@odata.id"], m if len(m) > 1 else None))
+        if expand and members and ip not in self._expand_support:
+            self._expand_support[ip] = any(d is not None for _, d in members)
+        return members
+
     async def _get_json_with_retries(
         self,
         url: str,
         *,
         auth: Optional[aiohttp.BasicAuth] = None,
+        keep: Optional[KeepSpec] = None,
     ) -> Optional[dict[str, Any]]:
         await self._ensure_session()
         assert self._session is not None
+        etags = self.etags
+        ekey = EtagCache.key(url, keep) if etags is not None else ""
 
         attempts = self.cfg.max_retries + 1
         for attempt in range(attempts):
             try:
-                async with self._maybe_semaphore():
+                if self.rate_limiter is not None:
+                    # Wait for the host's token before taking a global slot
+                    await self.rate_limiter.acquire(_host_of(url))
+                # Per-host slot before the global one, so a busy BMC doesn't sit on global slots
+                async with self._host_slot(url), self._maybe_semaphore():
                     async with self._session.get(
                         url,
                         auth=auth,
+                        headers=etags.conditions(ekey) if etags is not None else None,
                         ssl=self._ssl_context if not self.cfg.verify_ssl else None,
                     ) as resp:
+                        if resp.status == 304 and etags is not None:
+                            cached = etags.revalidate(ekey)
+                            if cached is not None:
+                                return cached
+
                         if 200 <= resp.status < 300:
-                            text = await resp.text()
-                            try:
-                                return json.loads(text)
-                            except json.JSONDecodeError:
-                                return await resp.json(content_type=None)
+                            body = await resp.read()
+                            data = self._decode(body, resp.charset)
+                            if data is None:
+                                raise RedfishError(f"Malformed JSON from {url}: {body[:200]!r}")
+                            if keep is not None:
+                                data = project_fields(data, keep)
+                            if etags is not None:
+                                etags.store(ekey, resp.headers, data)
+                            return data
 
                         if resp.status in (401, 403):
                             raise RedfishError(f"Auth failed ({resp.status}) for {url}")
@@ -210,11 +604,37 @@ class RedfishClient:
 
         return None
 
+    def _decode(self, body: bytes, charset: Optional[str]) -> Optional[Any]:
+        """Decode body with the fast backend, falling back to a lenient parse of the same bytes."""
+        st = self.decode_stats
+        t0 = time.perf_counter()
+        try:
+            data = loads_json(body)
+        except ValueError:
+            try:
+                data = loads_json_lenient(body, charset)
+            except ValueError:
+                st.failures += 1
+                return None
+            st.fallbacks += 1
+        st.observe(time.perf_counter() - t0, len(body))
+        return data
+
     def _backoff_delay(self, attempt: int) -> float:
         base = self.cfg.backoff_base_s * (2 ** attempt)
         jitter = random.uniform(0, base * 0.5)
         return base + jitter
 
+    def _host_slot(self, url: str):
+        limit = self.cfg.per_host_concurrency
+        if not limit:
+            return _SemaphoreContext(None)
+        host = _host_of(url)
+        sem = self._host_slots.get(host)
+        if sem is None:
+            sem = self._host_slots[host] = asyncio.Semaphore(limit)
+        return _SemaphoreContext(sem)
+
     def _maybe_semaphore(self):
         sem = self.cfg.per_request_semaphore
         return _SemaphoreContext(sem)
@@ -233,137 +653,121 @@ class _SemaphoreContext:
         if self._sem is not None:
             self._sem.release()
 
-def _extract_liquid_leak(data: dict[str, Any]) -> Dict[str, Optional[str]]:
-    """
-    Pulls health + location for the LiquidLeak sensor from common Supermicro schemas.
-    """
-    health = None
-    location = None
-    try:
-        status = data.get("Status")
-        if isinstance(status, dict):
-            maybe = status.get("Health")
-            if isinstance(maybe, str):
-                health = maybe
-
-        oem = data.get("Oem")
-        if isinstance(oem, dict):
-            sm = oem.get("Supermicro")
-            if isinstance(sm, dict):
-                sv = sm.get("SensorValue")
-                if isinstance(sv, str):
-                    location = sv
-    except Exception:
-        pass
-
-    return {"health": health, "location": location}
-
-def _extract_m2_drive(data: Dict[str, Any], bay: str) -> Dict[str, Any]:
-    """
-    Pulls health + location for the LiquidLeak sensor from common Supermicro schemas.
-    """
-    health: Optional[str] =  None
-    otherErrCount: Optional[int] = None
-    SmartEvent: Optional[int] = None
-    MediaErrCount: Optional[int] = None
-    
-    try:
-        status = data.get("Status")
-        if isinstance(status, dict):
-            maybe = status.get("Health")
-            if isinstance(maybe, str):
-                health = maybe
-
-        oem = data.get("Oem")
-        if isinstance(oem, dict):
-            sm = oem.get("Supermicro")
-            if isinstance(sm, dict):
-                oec = sm.get("OtherErrCount")
-                if isinstance(oec, int):
-                    other_err_count = oec
-
-                ser = sm.get("SmartEventReceived")
-                if isinstance(ser, int):
-                    smart_event = ser
-
-                mec = sm.get("MediaErrCount")
-                if isinstance(mec, int):
-                    media_err_count = mec
-    except Exception:
-        # swallow and return partial info
-        pass
-
-    return {
-        "m2_bay": bay,
-        "health": health,
-        "other_err_count": other_err_count,
-        "smart_event_received": smart_event,
-        "media_err_count": media_err_count,
-    }
-
-def _extract_nvme_drive(data: Dict[str, Any], bay: str) -> Dict[str, Any]:
-    """
-    Pulls health + location for the nvme drive from common Supermicro schemas.
-    """
-    serialNumber: Optional[str] =  None
-    health: Optional[str] = None
-    healthRollup: Optional[str] = None
-    
-    try:
-        serialNumber = data.get("SerialNumber")
-
-        status = data.get("Status")
-        if isinstance(status, dict):
-            h = status.get("Health")
-            if isinstance(h, str):
-                health = h
-            hr = status.get("HealthRollup")
-            if isinstance(hr, str):
-                healthRollup = hr
-    except Exception:
-        # swallow and return partial info
-        pass
-
-    return {
-        "nvme_bay": bay,
-        "sn": serialNumber,
-        "health": health,
-        "healthRollup": healthRollup,
-    }
-
-def _extract_dimm(data: Dict[str, Any], dimm: str) -> Dict[str, Any]:
-    """
-    Pulls health + location for the nvme drive from common Supermicro schemas.
-    """
-    temp_alarm: Optional[bool] =  None
-    uncorrectableECCerr_alarm: Optional[bool] = None
-    correctableECCerr_alarm: Optional[bool] = None
-    
-    try:
-        health_data = data.get("HealthData")
-        if isinstance(health_data, dict):
-            alarm_trips = health_data.get("AlarmTrips")
-            if isinstance(alarm_trips, dict):
-                t = alarm_trips.get("Temperature")
-                if isinstance(t, bool):
-                    temp_alarm = t
-                unc = alarm_trips.get("UncorrectableECCError")
-                if isinstance(unc, bool):
-                    uncorrectableECCerr_alarm = unc
-                c = alarm_trips.get("CorrectableECCError")
-                if isinstance(c, bool):
-                    correctableECCerr_alarm = c
-    except Exception:
-        # swallow and return partial info
-        pass
-
-    return {
-        "dimm_slot": dimm,
-        "temp_alarm": temp_alarm,
-        "uncorrectableECCerr_alarm": uncorrectableECCerr_alarm,
-        "correctableECCerr_alarm": correctableECCerr_alarm,
-    }
-
+# ----
+# Check specs (Supermicro schemas)
+# ----
+
+MEMORY_COLLECTION = "/redfish/v1/Systems/1/Memory"
+PCIE_COLLECTION = "/redfish/v1/Chassis/1/PCIeDevices"
+DRIVES_COLLECTION = "/redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives"
+
+MEMBERS = Projection(Field("members", "Members", type="any"))
+
+PRESENCE = Projection(Field("state", "Status/State"))
+
+def _absent(doc: Optional[Dict[str, Any]]) -> bool:
+    """True for a member resource reporting Status/State Absent (doc as read, not projected)."""
+    return doc is not None and PRESENCE.extract(doc)["state"] == "Absent"
+
+def _last_segment(path: str) -> str:
+    return path.rstrip("/").rsplit("/", 1)[-1]
+
+_TRAILING_DIGITS_RE = re.compile(r"(\d+)$")
+
+def _slot_label(path: str) -> str:
+    """Slot/bay label for the JSONL output: '.../Memory/12' -> '12', '.../NVMeSSD3' -> '3'."""
+    seg = _last_segment(path)
+    m = _TRAILING_DIGITS_RE.search(seg)
+    return m.group(1) if m else seg
+
+LIQUID_LEAK = Projection(
+    Field("health", "Status/Health"),
+    Field("location", "Oem/Supermicro/SensorValue"),
+)
+
+M2_DRIVE = Projection(
+    Field("health", "Status/Health"),
+    Field("other_err_count", "Oem/Supermicro/OtherErrCount", type="int"),
+    Field("smart_event_received", "Oem/Supermicro/SmartEventReceived", type="int"),
+    Field("media_err_count", "Oem/Supermicro/MediaErrCount", type="int"),
+)
+
+NVME_DRIVE = Projection(
+    Field("sn", "SerialNumber"),
+    Field("health", "Status/Health"),
+    Field("healthRollup", "Status/HealthRollup"),
+)
+
+DIMM = Projection(
+    Field("temp_alarm", "HealthData/AlarmTrips/Temperature", type="bool"),
+    Field("uncorrectableECCerr_alarm", "HealthData/AlarmTrips/UncorrectableECCError", type="bool"),
+    Field("correctableECCerr_alarm", "HealthData/AlarmTrips/CorrectableECCError", type="bool"),
+)
+
+PROCESSORS_COLLECTION = "/redfish/v1/Systems/1/Processors"
+ETHERNET_COLLECTION = "/redfish/v1/Systems/1/EthernetInterfaces"
+EXPAND_QUERY = "?$expand=.($levels=1)"
+
+PROCESSOR = Projection(
+    Field("socket", "Socket"),
+    Field("type", "ProcessorType"),
+    Field("model", "Model"),
+    Field("cores", "TotalCores", type="int"),
+    Field("health", "Status/Health"),
+    Field("state", "Status/State"),
+)
+
+GPU_DEVICE = Projection(
+    Field("model", "Model"),
+    Field("sn", "SerialNumber"),
+    Field("firmware", "FirmwareVersion"),
+    Field("health", "Status/Health"),
+    Field("state", "Status/State"),
+)
+
+NIC_DEVICE = Projection(
+    Field("model", "Model"),
+    Field("sn", "SerialNumber"),
+    Field("firmware", "FirmwareVersion"),
+    Field("lanes_in_use", "PCIeInterface/LanesInUse", type="int"),
+    Field("health", "Status/Health"),
+    Field("state", "Status/State"),
+)
+
+ETHERNET_INTERFACE = Projection(
+    Field("id", "Id"),
+    Field("mac", "MACAddress"),
+    Field("link", "LinkStatus"),
+    Field("speed_mbps", "SpeedMbps", type="int"),
+    Field("health", "Status/Health"),
+    Field("state", "Status/State"),
+)
+
+_HEALTH_RANK = {"OK": 0, "Warning": 1, "Critical": 2}
+
+def _worst_health(healths: Iterable[Optional[str]]) -> Optional[str]:
+    """Worst of the Redfish Status.Health values; unknown strings rank as Critical, None is skipped."""
+    worst = None
+    for h in healths:
+        if h is not None and (worst is None or _HEALTH_RANK.get(h, 2) > _HEALTH_RANK.get(worst, 2)):
+            worst = h
+    return worst
+
+POWER_PATH = "/redfish/v1/Chassis/1/Power"
+
+POWER_SUPPLIES = Projection(Field("supplies", "PowerSupplies", type="any"))
+
+PSU = Projection(
+    Field("psu", "MemberId"),
+    Field("name", "Name"),
+    Field("line_input_v", "LineInputVoltage", type="float"),
+    Field("input_w", "PowerInputWatts", type="float"),
+    Field("health", "Status/Health"),
+)
+
+def _host_of(url: str) -> str:
+    """'https://10.0.0.1:443/redfish/...' -> '10.0.0.1:443'"""
+    return url.split("/", 3)[2]
 
 async def _safe_snippet(resp: aiohttp.ClientResponse, limit: int = 200) -> str:
     try:
@@ -0,0 +1,160 @@
+"""
+Persistent per-host/per-check state for incremental TTT sweeps (SQLite, stdlib).
+
+Each check result is stored with a digest of its JSON so a sweep can tell
+whether anything changed since the last time the host was seen:
+    new           first time this host/check was recorded
+    changed       same state, different result (e.g. a DIMM alarm flipped)
+    ok->error     state transition (states: ok | error | absent)
+
+A host can be skipped entirely when every requested check's last result was
+clean (host status ok, check not errored) and is younger than a freshness
+window. Freshness is per check, so a --checks liquid_leak sweep doesn't make the
+host's other checks look fresh.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    name        TEXT PRIMARY KEY,
+    ip          TEXT,
+    status      TEXT,
+    last_seen   REAL,
+    last_ok     REAL
+);
+CREATE TABLE IF NOT EXISTS checks (
+    name        TEXT NOT NULL,
+    check_key   TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    digest      TEXT NOT NULL,
+    result      TEXT,
+    last_change REAL,
+    last_seen   REAL,
+    last_ok     REAL,
+    PRIMARY KEY (name, check_key)
+);
+"""
+
+def _digest(payload: str) -> str:
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+def check_state(result: Any, failed: bool) -> str:
+    if failed:
+        return "error"
+    return "absent" if result is None else "ok"
+
+class StateStore:
+    """
+    Last known result of every (host, check). apply() records one host's
+    sweep result and returns what changed; commit() flushes the transaction.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        cols = {row[1] for row in self._db.execute("PRAGMA table_info(checks)")}
+        if "last_ok" not in cols:
+            # Stores from before per-check freshness: every check starts stale
+            self._db.execute("ALTER TABLE checks ADD COLUMN last_ok REAL")
+        self._pending = 0
+
+    def fresh_hosts(self, window_s: float, check_keys: Iterable[str], now: Optional[float] = None) -> Set[str]:
+        """Hosts whose latest result for every one of check_keys was clean and is younger than window_s."""
+        keys = sorted(set(check_keys))
+        if not keys:
+            return set()
+        cutoff = (now or time.time()) - window_s
+        rows = self._db.execute(
+            f"""
+            SELECT c.name FROM checks c JOIN hosts h ON h.name = c.name
+            WHERE h.status = 'ok' AND c.check_key IN ({", ".join("?" * len(keys))})
+              AND c.last_ok >= ? AND c.last_ok = c.last_seen
+            GROUP BY c.name HAVING COUNT(*) = ?
+            """,
+            (*keys, cutoff, len(keys)),
+        )
+        return {name for (name,) in rows}
+
+    def apply(self, name: str, ip: str, ts: float, status: str, checks: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Record one host's result. checks is the run_checks() dict (with the
+        usual "_errors"/"_durations_ms" extras). Returns {key: change} for every
+        check that is new, changed, or changed state, plus "_status" if the
+        host status itself changed.
+        """
+        failed = {e.split(":", 1)[0] for e in checks.get("_errors", ())}
+        prev = {
+            key: (state, digest)
+            for key, state, digest in self._db.execute(
+                "SELECT check_key, state, digest FROM checks WHERE name = ?", (name,)
+            )
+        }
+        changes: Dict[str, str] = {}
+        rows = []
+        for key, result in checks.items():
+            if key.startswith("_"):
+                continue
+            payload = json.dumps(result, sort_keys=True, separators=(",", ":"))
+            state = check_state(result, key in failed)
+            digest = _digest(payload)
+            old = prev.get(key)
+            if old is None:
+                changes[key] = "new"
+            elif old[0] != state:
+                changes[key] = f"{old[0]}->{state}"
+            elif old[1] != digest:
+                changes[key] = "changed"
+            last_change = ts if key in changes else None
+            last_ok = ts if status == "ok" and state != "error" else None
+            rows.append((name, key, state, digest, payload, last_change, ts, last_ok))
+
+        self._db.executemany(
+            """
+            INSERT INTO checks (name, check_key, state, digest, result, last_change, last_seen, last_ok)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (name, check_key) DO UPDATE SET
+                state = excluded.state,
+                digest = excluded.digest,
+                result = excluded.result,
+                last_change = COALESCE(excluded.last_change, checks.last_change),
+                last_seen = excluded.last_seen,
+                last_ok = COALESCE(excluded.last_ok, checks.last_ok)
+            """,
+            rows,
+        )
+
+        row = self._db.execute("SELECT status FROM hosts WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[0] != status:
+            changes["_status"] = f"{row[0]}->{status}"
+        clean = status == "ok" and not failed
+        self._db.execute(
+            """
+            INSERT INTO hosts (name, ip, status, last_seen, last_ok) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                ip = excluded.ip,
+                status = excluded.status,
+                last_seen = excluded.last_seen,
+                last_ok = COALESCE(excluded.last_ok, hosts.last_ok)
+            """,
+            (name, ip, status, ts, ts if clean else None),
+        )
+        self._pending += 1
+        if self._pending >= 500:
+            self.commit()
+        return changes
+
+    def commit(self) -> None:
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.commit()
+        self._db.close()
@@ -0,0 +1,72 @@
+# Microbenchmark: per-sample cost of recording outlet readings.
+#   "labels" = the old path (label dict + .labels(**labels) per gauge per sample)
+#   "bound"  = Collector's precomputed children (_SeriesCache)
+# Usage: python bench_metrics.py [pdus] [outlets_per_pdu] [rounds]
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+import exporter
+from exporter import AppConfig, Collector, _record_outlet
+from redfish_client import OutletReading
+
+def _cfg(n_pdus: int, n_outlets: int) -> AppConfig:
+    raw = {
+        "auth": {"groups": {"g": {"user": "u", "pass": "p"}}},
+        "targets": [
+            {"pdu": f"pdu-{i}", "ip": f"10.0.{i // 250}.{i % 250}", "auth_group": "g",
+             "outlets": list(range(1, n_outlets + 1)), "rack": str(i // 4), "row": "L1"}
+            for i in range(n_pdus)
+        ],
+    }
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as fh:
+        yaml.safe_dump(raw, fh)
+    try:
+        return exporter.load_config(fh.name)
+    finally:
+        os.unlink(fh.name)
+
+def _labels_path(cfg: AppConfig, reading: OutletReading) -> None:
+    for tgt in cfg.targets:
+        for o in tgt.outlets:
+            labels = {
+                "pdu": tgt.pdu, "ip": tgt.ip, "outlet": str(o),
+                "rack": tgt.labels.get("rack", ""), "row": tgt.labels.get("row", ""),
+            }
+            exporter.OUTLET_WATTS.labels(**labels).set(reading.watts)
+            exporter.OUTLET_VOLTS.labels(**labels).set(reading.volts)
+            exporter.OUTLET_AMPS.labels(**labels).set(reading.amps)
+            exporter.OUTLET_ENERGY.labels(**labels).set(reading.energy_kwh)
+            exporter.OUTLET_ON.labels(**labels).set(1)
+        exporter.SCRAPE_OK.labels(tgt.pdu, tgt.ip).set(1)
+        exporter.LAST_SUCCESS.labels(tgt.pdu, tgt.ip).set(time.time())
+
+def _bound_path(col: Collector, reading: OutletReading) -> None:
+    for series in col._series.values():
+        for oseries in series.outlets.values():
+            _record_outlet(oseries, reading)
+        series.pdu.get(exporter.SCRAPE_OK).set(1)
+        series.pdu.get(exporter.LAST_SUCCESS).set(time.time())
+
+def main():
+    n_pdus = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    n_outlets = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    cfg = _cfg(n_pdus, n_outlets)
+    col = Collector(cfg)
+    reading = OutletReading(watts=812.0, volts=208.1, amps=3.9, energy_kwh=1234.5, power_state="On")
+    samples = n_pdus * n_outlets * rounds
+
+    for name, fn, arg in (("labels", _labels_path, cfg), ("bound", _bound_path, col)):
+        fn(arg, reading)  # warm up (creates children)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            fn(arg, reading)
+        dt = time.perf_counter() - t0
+        print(f"{name:>6}: {dt:.3f}s for {samples} outlet samples | {dt / samples * 1e6:.2f} us/sample")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Scaling benchmark for sharded mode: PDU polls/second vs. number of collector processes.
+# Spins up a local stand-in PDU server (plain HTTP, SO_REUSEPORT across --server-procs
+# processes), then for each shard count runs that many processes, each sweeping its
+# rendezvous-hash slice of the fleet back to back for --seconds.
+#
+# Usage: python bench_shards.py --pdus 2000 --max-shards 8 --seconds 10
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from typing import List, Tuple
+
+import yaml
+from aiohttp import web
+
+from exporter import Collector, load_config, shard_targets
+
+# ----
+# Stand-in PDU server
+# ----
+
+def _standin_server(port: int, outlets: int) -> None:
+    body = {
+        "Members": [
+            {"Id": f"OUTLET{i}", "PowerWatts": {"Reading": 400.0 + i}, "Voltage": {"Reading": 208.0},
+             "CurrentAmps": {"Reading": 1.9}, "EnergykWh": {"Reading": 1234.5}, "PowerState": "On"}
+            for i in range(1, outlets + 1)
+        ]
+    }
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get("/redfish/v1/PowerEquipment/RackPDUs/1/Outlets", handle)
+    web.run_app(app, host="0.0.0.0", port=port, reuse_port=True, print=None, access_log=None)
+
+# ----
+# Bench worker
+# ----
+
+def _bench_shard(args: Tuple[str, int, int, float]) -> int:
+    return asyncio.run(_bench_shard_async(*args))
+
+async def _bench_shard_async(cfg_path: str, index: int, count: int, seconds: float) -> int:
+    cfg = load_config(cfg_path)
+    cfg.targets = shard_targets(cfg.targets, index, count)
+    col = Collector(cfg)
+    await col._open()
+    polls = 0
+    deadline = time.perf_counter() + seconds
+    cycle = 0
+    while time.perf_counter() < deadline:
+        await col._one_sweep(cycle)
+        polls += len(cfg.targets)
+        cycle += 1
+    await col.stop()
+    return polls
+
+def _write_cfg(pdus: int, port: int, outlets: int, concurrency: int) -> str:
+    raw = {
+        "scheme": "http",
+        "max_concurrency": concurrency,
+        "scheduler": {"mode": "sweep"},
+        "reload": {"watch": False},
+        "auth": {"groups": {"g": {"user": "u", "pass": "p"}}},
+        "targets": [
+            # Distinct loopback addresses so every PDU is its own host/connection
+            {"pdu": f"pdu-{i}", "ip": f"127.1.{i // 250}.{i % 250 + 1}:{port}", "auth_group": "g",
+             "outlets": list(range(1, outlets + 1)), "rack": str(i // 4), "row": "L1"}
+            for i in range(pdus)
+        ],
+    }
+    fd, path = tempfile.mkstemp(suffix=".yaml")
+    with os.fdopen(fd, "w") as fh:
+        yaml.safe_dump(raw, fh)
+    return path
+
+def main():
+    ap = argparse.ArgumentParser(description="Sharded PDU exporter scaling benchmark")
+    ap.add_argument("--pdus", type=int, default=2000)
+    ap.add_argument("--outlets", type=int, default=8)
+    ap.add_argument("--max-shards", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--concurrency", type=int, default=400)
+    ap.add_argument("--port", type=int, default=18080)
+    ap.add_argument("--server-procs", type=int, default=1)
+    a = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    servers = [ctx.Process(target=_standin_server, args=(a.port, a.outlets), daemon=True) for _ in range(a.server_procs)]
+    for s in servers:
+        s.start()
+    time.sleep(1.5)
+    cfg_path = _write_cfg(a.pdus, a.port, a.outlets, a.concurrency)
+
+    counts: List[int] = []
+    n = 1
+    while n <= a.max_shards:
+        counts.append(n)
+        n *= 2
+    if counts[-1] != a.max_shards:
+        counts.append(a.max_shards)
+
+    try:
+        base = None
+        print(f"{'shards':>6} {'PDU polls/s':>12} {'speedup':>8}")
+        for shards in counts:
+            with ctx.Pool(shards) as pool:
+                polls = pool.map(_bench_shard, [(cfg_path, i, shards, a.seconds) for i in range(shards)])
+            rate = sum(polls) / a.seconds
+            base = base or rate
+            print(f"{shards:>6} {rate:>12.0f} {rate / base:>7.2f}x")
+    finally:
+        os.unlink(cfg_path)
+        for s in servers:
+            s.terminate()
+
+if __name__ == "__main__":
+    main()
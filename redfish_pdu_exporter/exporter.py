@@ -1,19 +1,36 @@
 from __future__ import annotations
 import asyncio
+import gzip
+import hashlib
+import heapq
 import os
 import re
 import signal
 import sys
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import zlib
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import aiohttp
 import yaml
-from prometheus_client import CollectorRegistry, Gauge, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from prometheus_client.openmetrics.exposition import (
+    CONTENT_TYPE_LATEST as OM_CONTENT_TYPE_LATEST,
+    generate_latest as om_generate_latest,
+)
 from aiohttp import web
 
-from redfish_client import RedfishClient, ClientConfig
+from redfish_client import (
+    ClientConfig,
+    DecodeStats,
+    HostRateLimiter,
+    OutletReading,
+    PoolStats,
+    RedfishClient,
+)
+from redfish_common import JSON_BACKEND
 
 # ----
 # Configs
@@ -39,13 +56,33 @@ class AppConfig:
     connect_timeout_seconds: float
     max_concurrency: int
     tls_verify: bool
-    per_host_qps: Optional[float]  # reserved for future
+    per_host_qps: Optional[float]  # token-bucket rate per PDU, None = unlimited
+    per_host_burst: Optional[float]  # token-bucket size, defaults to max(1, per_host_qps)
     http_host: str
     http_port: int
     auth_groups: Dict[str, AuthGroup]
     targets: List[Target]
     cb_fail_threshold: int    # consecutive failures to open circuit
     cb_cooldown_cycles: int   # cycles to skip once open
+    pool_limit: int                     # total pooled sockets (defaults to max_concurrency)
+    pool_limit_per_host: int            # sockets per PDU
+    pool_keepalive_seconds: float       # idle socket lifetime; keep > poll interval for warm TLS
+    pool_dns_cache_ttl_seconds: Optional[int]
+    schedule_mode: str                  # "staggered" (phase-spread) or "sweep" (all at once)
+    scheduler_workers: int              # concurrent PDU polls in staggered mode
+    adaptive: bool                      # per-PDU intervals driven by observed change (staggered mode)
+    adaptive_min_interval_seconds: float
+    adaptive_max_interval_seconds: float
+    adaptive_growth: float              # interval multiplier per unchanged poll
+    adaptive_delta_watts: float         # outlet change (W) that counts as "changed"
+    adaptive_delta_ratio: float         # ... or this fraction of the previous reading, whichever is larger
+    metrics_render_interval_seconds: float  # max staleness of the cached /metrics payload
+    metrics_gzip: bool                  # keep a gzip-precompressed copy of the payload
+    reload_watch: bool                  # poll the config file's mtime and reload on change
+    reload_check_interval_seconds: float
+    shards: int                         # >1: run N collector processes behind a merging front
+    shard_port_base: int                # shard i listens on 127.0.0.1:(shard_port_base + i)
+    scheme: str                         # "https" (PDUs) or "http" (local stand-ins / benchmarks)
 
 # ----
 # Utilities
@@ -66,6 +103,9 @@ def _resolve_env_placeholders(obj: Any) -> Any:
         return ENV_VAR_PATTERN.sub(repl, obj)
     return obj
 
+def _opt_float(v: Any) -> Optional[float]:
+    return None if v is None or v == "" else float(v)
+
 def load_config(path: str) -> AppConfig:
     with open(path, "r") as f:
         raw = yaml.safe_load(f)
@@ -73,20 +113,48 @@ def load_config(path: str) -> AppConfig:
 
     # Defaults
     poll = int(raw.get("poll_interval_seconds", 30))
+    max_conc = int(raw.get("max_concurrency", 400))
+    pool = raw.get("connection_pool", {}) or {}
+    sched = raw.get("scheduler", {}) or {}
+    adapt = raw.get("adaptive", {}) or {}
+    mcfg = raw.get("metrics", {}) or {}
+    rcfg = raw.get("reload", {}) or {}
     cfg = AppConfig(
         poll_interval_seconds=poll,
         request_timeout_seconds=float(raw.get("request_timeout_seconds", 4)),
         connect_timeout_seconds=float(raw.get("connect_timeout_seconds", 2)),
-        max_concurrency=int(raw.get("max_concurrency", 400)),
+        max_concurrency=max_conc,
         tls_verify=bool(raw.get("tls_verify", False)),
-        per_host_qps=raw.get("per_host_qps", None),
+        per_host_qps=_opt_float(raw.get("per_host_qps")),
+        per_host_burst=_opt_float(raw.get("per_host_burst")),
         http_host=str(raw.get("http_host", "0.0.0.0")),
         http_port=int(raw.get("http_port", 9100)),
         auth_groups={},
         targets=[],
         cb_fail_threshold=int(raw.get("circuit_breaker", {}).get("fail_threshold", 5)),
         cb_cooldown_cycles=int(raw.get("circuit_breaker", {}).get("cooldown_cycles", 3)),
+        pool_limit=int(pool.get("limit", max_conc)),
+        pool_limit_per_host=int(pool.get("limit_per_host", 2)),
+        pool_keepalive_seconds=float(pool.get("keepalive_timeout_seconds", poll * 2)),
+        pool_dns_cache_ttl_seconds=pool.get("dns_cache_ttl_seconds", 300),
+        schedule_mode=str(sched.get("mode", "staggered")),
+        scheduler_workers=int(sched.get("workers", min(max_conc, 64))),
+        adaptive=bool(adapt.get("enabled", False)),
+        adaptive_min_interval_seconds=float(adapt.get("min_interval_seconds", poll)),
+        adaptive_max_interval_seconds=float(adapt.get("max_interval_seconds", poll * 8)),
+        adaptive_growth=float(adapt.get("growth", 1.5)),
+        adaptive_delta_watts=float(adapt.get("delta_watts", 10.0)),
+        adaptive_delta_ratio=float(adapt.get("delta_ratio", 0.05)),
+        metrics_render_interval_seconds=float(mcfg.get("render_interval_seconds", min(poll, 5))),
+        metrics_gzip=bool(mcfg.get("gzip", True)),
+        reload_watch=bool(rcfg.get("watch", True)),
+        reload_check_interval_seconds=float(rcfg.get("check_interval_seconds", 10)),
+        shards=int(raw.get("sharding", {}).get("shards", 1)),
+        shard_port_base=int(raw.get("sharding", {}).get("port_base", int(raw.get("http_port", 9100)) + 1)),
+        scheme=str(raw.get("scheme", "https")),
     )
+    if cfg.schedule_mode not in ("staggered", "sweep"):
+        raise ValueError(f"scheduler.mode must be 'staggered' or 'sweep', got {cfg.schedule_mode!r}")
 
 # Auth
     auth = raw.get("auth", {}).get("groups", {})
@@ -131,6 +199,27 @@ OUTLET_VOLTS = Gauge(
     registry=REGISTRY,
 )
 
+OUTLET_AMPS = Gauge(
+    "pdu_outlet_current_amps",
+    "PDU outlet current (Amps)",
+    ["pdu", "ip", "outlet"] + ["rack", "row"],
+    registry=REGISTRY,
+)
+
+OUTLET_ENERGY = Gauge(
+    "pdu_outlet_energy_kwh",
+    "PDU outlet cumulative energy (kWh)",
+    ["pdu", "ip", "outlet"] + ["rack", "row"],
+    registry=REGISTRY,
+)
+
+OUTLET_ON = Gauge(
+    "pdu_outlet_power_state",
+    "PDU outlet power state (1=On, 0=Off)",
+    ["pdu", "ip", "outlet"] + ["rack", "row"],
+    registry=REGISTRY,
+)
+
 SCRAPE_OK = Gauge(
     "pdu_scrape_ok",
     "Last scrape success for this PDU (1=ok, 0=fail)",
@@ -147,23 +236,299 @@ LAST_SUCCESS = Gauge(
 
 SCRAPE_LAT = Histogram(
     "pdu_scrape_duration_seconds",
-    "Latency for a single outlet scrape",
+    "Latency for a single PDU scrape (all configured outlets)",
     buckets=(0.05, 0.1, 0.2, 0.5, 1, 2, 3, 5, 8, 13),
     registry=REGISTRY,
 )
 
+POLL_LATENESS = Gauge(
+    "pdu_poll_lateness_seconds",
+    "How late the last poll of this PDU started versus its scheduled slot",
+    ["pdu", "ip"],
+    registry=REGISTRY,
+)
+
+POLL_INTERVAL = Gauge(
+    "pdu_poll_interval_seconds",
+    "Current poll interval for this PDU (varies when adaptive polling is enabled)",
+    ["pdu", "ip"],
+    registry=REGISTRY,
+)
+
 IN_FLIGHT = Gauge(
     "pdu_requests_in_flight",
     "Requests currently in flight",
     registry=REGISTRY,
 )
 
+RELOAD_OK = Gauge(
+    "pdu_exporter_config_reload_success",
+    "Whether the last config reload succeeded (1=ok, 0=failed, old config kept)",
+    registry=REGISTRY,
+)
+
+RELOAD_DURATION = Gauge(
+    "pdu_exporter_config_reload_duration_seconds",
+    "Time taken by the last config reload (parse + diff + apply)",
+    registry=REGISTRY,
+)
+
+RELOAD_LAST = Gauge(
+    "pdu_exporter_config_last_reload_epoch_seconds",
+    "Unix epoch of the last config reload attempt",
+    registry=REGISTRY,
+)
+
+RELOAD_DIFF = Gauge(
+    "pdu_exporter_config_reload_targets",
+    "PDU targets touched by the last config reload",
+    ["change"],
+    registry=REGISTRY,
+)
+
+RENDER_LAT = Histogram(
+    "pdu_exporter_render_seconds",
+    "Time to render the cached /metrics payload",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=REGISTRY,
+)
+
 READY = Gauge(
     "pdu_exporter_ready",
     "Exporter readiness (1=ready, 0=initializing)",
     registry=REGISTRY,
 )
 
+# The collectors below read state the event loop keeps mutating, while /metrics
+# renders in a worker thread. MetricsSnapshot.refresh() calls freeze() on the loop
+# first; collect() only reads that copy.
+_LOOP_COLLECTORS: List[Any] = []
+
+def _register_loop_collector(collector):
+    REGISTRY.register(collector)
+    _LOOP_COLLECTORS.append(collector)
+    return collector
+
+class _PoolStatsCollector:
+    """Exposes RedfishClient.pool_stats at scrape time (no per-request metric calls)."""
+    def __init__(self):
+        self.stats: Optional[PoolStats] = None
+        self._frozen: Optional[Tuple[int, int, int, int]] = None
+
+    def freeze(self) -> None:
+        st = self.stats
+        self._frozen = None if st is None else (st.hits, st.misses, st.handshakes, st.queued)
+
+    def collect(self):
+        if self._frozen is None:
+            return
+        hits, misses, handshakes, queued = self._frozen
+        for name, doc, val in (
+            ("pdu_http_pool_hits", "Requests served on a pooled keep-alive connection", hits),
+            ("pdu_http_pool_misses", "Requests that had to open a new connection", misses),
+            ("pdu_http_tls_handshakes", "New connections established (TCP + TLS handshake)", handshakes),
+            ("pdu_http_pool_queued", "Requests that waited for a free pool slot", queued),
+        ):
+            yield CounterMetricFamily(name, doc, value=val)
+
+POOL_STATS = _register_loop_collector(_PoolStatsCollector())
+
+class _RateLimitCollector:
+    """Exposes per-PDU token-bucket queue depth and wait-time histogram at scrape time."""
+    def __init__(self):
+        self.limiter: Optional[HostRateLimiter] = None
+        # (host, queue depth, bucket counts, count, total seconds) per host
+        self._frozen: Optional[List[Tuple[str, int, List[int], int, float]]] = None
+
+    def freeze(self) -> None:
+        lim = self.limiter
+        self._frozen = None if lim is None else [
+            (host, lim.queue_depth(host), list(st.bucket_counts), st.count, st.total_s)
+            for host, st in lim.stats.items()
+        ]
+
+    def collect(self):
+        if self._frozen is None:
+            return
+        depth = GaugeMetricFamily(
+            "pdu_ratelimit_queue_depth",
+            "Requests waiting on this PDU's token bucket",
+            labels=["ip"],
+        )
+        wait = HistogramMetricFamily(
+            "pdu_ratelimit_wait_seconds",
+            "Time spent waiting on this PDU's token bucket",
+            labels=["ip"],
+        )
+        for host, queued, counts, count, total_s in self._frozen:
+            depth.add_metric([host], queued)
+            buckets = [(str(le), c) for le, c in zip(HostRateLimiter.WAIT_BUCKETS, counts)]
+            buckets.append(("+Inf", count))
+            wait.add_metric([host], buckets, total_s)
+        yield depth
+        yield wait
+
+RATE_LIMIT = _register_loop_collector(_RateLimitCollector())
+
+class _DecodeStatsCollector:
+    """Exposes RedfishClient.decode_stats (JSON decode time per response) at scrape time."""
+    def __init__(self):
+        self.stats: Optional[DecodeStats] = None
+        self._frozen: Optional[DecodeStats] = None
+
+    def freeze(self) -> None:
+        st = self.stats
+        self._frozen = None if st is None else replace(st, bucket_counts=list(st.bucket_counts))
+
+    def collect(self):
+        st = self._frozen
+        if st is None:
+            return
+        hist = HistogramMetricFamily(
+            "pdu_json_decode_seconds",
+            "Time to decode one Redfish JSON response body",
+            labels=["backend"],
+        )
+        buckets = [(str(le), c) for le, c in zip(st.BUCKETS, st.bucket_counts)]
+        buckets.append(("+Inf", st.count))
+        hist.add_metric([JSON_BACKEND], buckets, st.total_s)
+        yield hist
+        yield CounterMetricFamily("pdu_json_decode_bytes", "Response bytes decoded", value=st.bytes)
+        yield CounterMetricFamily(
+            "pdu_json_decode_fallbacks",
+            "Responses the strict decoder rejected and the lenient decoder handled",
+            value=st.fallbacks,
+        )
+        yield CounterMetricFamily(
+            "pdu_json_decode_failures",
+            "Responses that could not be decoded as JSON at all",
+            value=st.failures,
+        )
+
+DECODE_STATS = _register_loop_collector(_DecodeStatsCollector())
+
+class _FreshnessCollector:
+    """Exposes the age of each PDU's last successful reading, computed at scrape time."""
+    def __init__(self):
+        self.source: Optional["Collector"] = None
+        self._frozen: Optional[List[Tuple[str, str, float]]] = None  # (pdu, ip, last success)
+
+    def freeze(self) -> None:
+        src = self.source
+        self._frozen = None if src is None else [
+            (tgt.pdu, tgt.ip, src._last_success[tgt.ip]) for tgt in src.cfg.targets if tgt.ip in src._last_success
+        ]
+
+    def collect(self):
+        if self._frozen is None:
+            return
+        now = time.time()
+        age = GaugeMetricFamily(
+            "pdu_data_age_seconds",
+            "Seconds since the last successful reading of this PDU",
+            labels=["pdu", "ip"],
+        )
+        for pdu, ip, last in self._frozen:
+            age.add_metric([pdu, ip], now - last)
+        yield age
+
+FRESHNESS = _register_loop_collector(_FreshnessCollector())
+
+class _ReadTimeView:
+    """
+    Registry view for OpenMetrics rendering: outlet samples carry the time the
+    PDU was actually read rather than the scrape time.
+    """
+    FAMILIES = (
+        "pdu_outlet_power_watts",
+        "pdu_outlet_voltage",
+        "pdu_outlet_current_amps",
+        "pdu_outlet_energy_kwh",
+        "pdu_outlet_power_state",
+    )
+
+    def __init__(self, registry: CollectorRegistry):
+        self._registry = registry
+        self.source: Optional["Collector"] = None
+
+    def collect(self):
+        read_ts = self.source._read_ts if self.source is not None else {}
+        for mf in self._registry.collect():
+            if mf.name in self.FAMILIES:
+                mf.samples = [
+                    smp._replace(timestamp=read_ts.get((smp.labels.get("ip"), smp.labels.get("outlet"))))
+                    for smp in mf.samples
+                ]
+            yield mf
+
+@dataclass(frozen=True)
+class _Payload:
+    body: bytes
+    body_gz: Optional[bytes]
+    etag: str
+
+    @property
+    def etag_gz(self) -> str:
+        """ETag of body_gz: a distinct validator per Content-Encoding (RFC 9110 8.8.3)."""
+        return self.etag[:-1] + '-gz"'
+
+class MetricsSnapshot:
+    """
+    Pre-rendered /metrics payloads, one per exposition format. The collector marks
+    the snapshot dirty when data changes; refresh() re-renders (off the event loop)
+    only if dirty, so scrapes just hand out cached bytes regardless of how many
+    Prometheus replicas ask. OpenMetrics is only rendered once somebody asked for it.
+    """
+    CONTENT_TYPES = {"text": CONTENT_TYPE_LATEST, "openmetrics": OM_CONTENT_TYPE_LATEST}
+
+    def __init__(self, registry: CollectorRegistry):
+        self._registry = registry
+        self.read_time_view = _ReadTimeView(registry)
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self._formats = {"text"}
+        self.gzip_enabled = True
+        self.payloads: Dict[str, _Payload] = {}
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    async def get(self, fmt: str) -> _Payload:
+        if fmt not in self._formats:
+            self._formats.add(fmt)
+            await self.refresh(force=True)
+        return self.payloads[fmt]
+
+    async def refresh(self, force: bool = False) -> None:
+        if not (self._dirty or force):
+            return
+        async with self._lock:
+            if not (self._dirty or force):
+                return
+            self._dirty = False
+            for collector in _LOOP_COLLECTORS:
+                collector.freeze()
+            loop = asyncio.get_running_loop()
+            t0 = time.perf_counter()
+            payloads = await loop.run_in_executor(None, self._render, tuple(self._formats))
+            RENDER_LAT.observe(time.perf_counter() - t0)
+            # Swap in one assignment so a scrape never sees a mixed snapshot
+            self.payloads = payloads
+
+    def _render(self, formats: Tuple[str, ...]) -> Dict[str, _Payload]:
+        out: Dict[str, _Payload] = {}
+        for fmt in formats:
+            if fmt == "openmetrics":
+                body = om_generate_latest(self.read_time_view)
+            else:
+                body = generate_latest(self._registry)
+            body_gz = gzip.compress(body, 6) if self.gzip_enabled else None
+            etag = '"%s-%s"' % (fmt, hashlib.blake2b(body, digest_size=12).hexdigest())
+            out[fmt] = _Payload(body=body, body_gz=body_gz, etag=etag)
+        return out
+
+SNAPSHOT = MetricsSnapshot(REGISTRY)
+
 # ----
 # Collector Task
 # ----
@@ -176,9 +541,25 @@ class Collector:
         self._sem = asyncio.Semaphore(cfg.max_concurrency)
         self._fail_streaks: Dict[str, int] = {}   # key: pdu ip
         self._cooldown_left: Dict[str, int] = {}  # cycles remaining to skip
+        self._last_success: Dict[str, float] = {} # key: pdu ip, epoch seconds
+        self._interval: Dict[str, float] = {}     # key: pdu ip, current poll interval
+        self._last_watts: Dict[str, Dict[int, float]] = {}  # key: pdu ip, for adaptive change detection
+        self._wake = asyncio.Event()              # nudges the staggered scheduler (reschedule/stop)
+        self._series: Dict[str, _TargetSeries] = {}  # key: pdu ip, bound gauge children
+        self._read_ts: Dict[Tuple[str, str], float] = {}  # key: (pdu ip, outlet), epoch of last good read
         self._rf: Optional[RedfishClient] = None
+        self._targets: Dict[str, Target] = {t.ip: t for t in cfg.targets}  # live set, key: pdu ip
+        self._gen: Dict[str, int] = {ip: 0 for ip in self._targets}        # bumped when a PDU is (re)added
+        self._pending: List[str] = []             # ips waiting for their first scheduler slot
+        self._first_pass: Set[str] = set()        # staggered mode: startup targets not yet polled once
+        self._sync_series()
 
     async def start(self):
+        await self._open()
+        # Launch loop
+        asyncio.create_task(self._run_loop(), name="collector-loop")
+
+    async def _open(self):
         rf_cfg = ClientConfig(
             connect_timeout_s=self.cfg.connect_timeout_seconds,
             read_timeout_s=self.cfg.request_timeout_seconds,
@@ -186,24 +567,41 @@ class Collector:
             verify_ssl=self.cfg.tls_verify,
             max_retries=2,
             per_request_semaphore=self._sem,
+            conn_limit=self.cfg.pool_limit,
+            conn_limit_per_host=self.cfg.pool_limit_per_host,
+            keepalive_timeout_s=self.cfg.pool_keepalive_seconds,
+            dns_cache_ttl_s=self.cfg.pool_dns_cache_ttl_seconds,
+            per_host_qps=self.cfg.per_host_qps,
+            per_host_burst=self.cfg.per_host_burst,
+            scheme=self.cfg.scheme,
         )
         self._rf = RedfishClient(rf_cfg)
+        POOL_STATS.stats = self._rf.pool_stats
+        RATE_LIMIT.limiter = self._rf.rate_limiter
+        DECODE_STATS.stats = self._rf.decode_stats
+        FRESHNESS.source = self
+        SNAPSHOT.read_time_view.source = self
         await self._rf._ensure_session()  # prime the session
 
-        # Launch loop
-        asyncio.create_task(self._run_loop(), name="collector-loop")
-
     async def stop(self):
         self._stop.set()
+        self._wake.set()
         if self._rf:
             await self._rf.close()
 
     async def _run_loop(self):
+        if self.cfg.schedule_mode == "sweep":
+            await self._run_sweep_loop()
+        else:
+            await self._run_staggered_loop()
+
+    async def _run_sweep_loop(self):
         try:
             cycle = 0
             while not self._stop.is_set():
                 t0 = time.time()
                 await self._one_sweep(cycle)
+                SNAPSHOT.invalidate()
                 if not self._ready.is_set():
                     self._ready.set()
                     READY.set(1)
@@ -221,68 +619,222 @@ class Collector:
         if self._rf is None:
             return
         tasks = []
-        # Build work list, skipping PDUs on cooldown
+        # Build work list (one request per PDU), skipping PDUs on cooldown
         for tgt in self.cfg.targets:
-            if self._cooldown_left.get(tgt.ip, 0) > 0:
-                self._cooldown_left[tgt.ip] -= 1
-                SCRAPE_OK.labels(tgt.pdu, tgt.ip).set(0)
+            if self._skip_for_cooldown(tgt):
                 continue
-            for o in tgt.outlets:
-                tasks.append(self._poll_outlet(tgt, o))
+            if tgt.outlets:
+                tasks.append(self._poll_target(tgt))
 
-        # Drive tasks with as_completed to keep memory modest
         if not tasks:
             return
-        # Wrap in a shield to ensure we decrement IN_FLIGHT on cancellation
         await asyncio.gather(*tasks, return_exceptions=True)
 
-    async def _poll_outlet(self, tgt: Target, outlet: int):
-        if self._rf is None:
+    async def _run_staggered_loop(self):
+        """
+        Each PDU is polled at a stable, hash-derived offset within its interval,
+        so requests are spread evenly instead of all firing at the top of the tick.
+        A fixed pool of workers drains a bounded queue of due targets; a target is
+        rescheduled only once its poll finishes, so it is never in flight twice.
+        Heap entries carry (ip, generation) so reloads can add/remove PDUs live.
+        """
+        loop = asyncio.get_running_loop()
+        n_workers = max(1, self.cfg.scheduler_workers)
+        queue: asyncio.Queue[Tuple[str, int, float]] = asyncio.Queue(maxsize=n_workers * 2)
+        self._first_pass = set(self._targets)
+        heap: List[Tuple[float, int, str, int]] = []
+        seq = 0
+
+        def schedule(ip: str, gen: int, due: float) -> None:
+            nonlocal seq
+            heapq.heappush(heap, (due, seq, ip, gen))
+            seq += 1
+
+        def is_live(ip: str, gen: int) -> bool:
+            return ip in self._targets and self._gen.get(ip) == gen
+
+        async def worker():
+            while True:
+                ip, gen, due = await queue.get()
+                ok: Optional[bool] = None
+                tgt = self._targets.get(ip)
+                try:
+                    if tgt is not None:
+                        self._series[ip].pdu.get(POLL_LATENESS).set(max(0.0, loop.time() - due))
+                        if not self._skip_for_cooldown(tgt) and tgt.outlets:
+                            ok = await self._poll_target(tgt)
+                except Exception as e:
+                    ok = False
+                    print(f"[WARN] poll of {ip} failed: {type(e).__name__}: {e}", file=sys.stderr)
+                finally:
+                    if tgt is not None and is_live(ip, gen):
+                        interval = self._next_interval(tgt, ok)
+                        # Keep the phase: next slot is one interval after this one, skipping missed slots
+                        nxt = due + interval
+                        now = loop.time()
+                        if nxt < now:
+                            nxt += interval * ((now - nxt) // interval + 1)
+                        schedule(ip, gen, nxt)
+                        self._wake.set()
+                    SNAPSHOT.invalidate()
+                    self._first_poll_done(ip)
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker(), name=f"collector-worker-{i}") for i in range(n_workers)]
+        self._pending.extend(self._targets)
+        if not self._first_pass:
+            self._ready.set()
+            READY.set(1)
+        try:
+            while not self._stop.is_set():
+                # Targets added at start or by a config reload get their first slot here
+                start = loop.time()
+                while self._pending:
+                    ip = self._pending.pop()
+                    tgt = self._targets.get(ip)
+                    if tgt is not None:
+                        schedule(ip, self._gen[ip], start + _phase_offset(tgt, self._next_interval(tgt, None)))
+                delay = heap[0][0] - loop.time() if heap else None
+                if delay is None or delay > 0:
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                due, _, ip, gen = heapq.heappop(heap)
+                if not is_live(ip, gen):
+                    self._first_poll_done(ip)  # removed or re-added by a reload
+                    continue
+                await queue.put((ip, gen, due))
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            READY.set(0)
+
+    def _first_poll_done(self, ip: str) -> None:
+        """Staggered mode is ready once every startup target was polled once or removed."""
+        if ip not in self._first_pass:
             return
-        labels = self._labels_for(tgt, outlet)
+        self._first_pass.discard(ip)
+        if not self._first_pass and not self._ready.is_set():
+            self._ready.set()
+            READY.set(1)
+
+    def _next_interval(self, tgt: Target, ok: Optional[bool]) -> float:
+        """
+        Interval until this PDU's next poll. Fixed unless adaptive polling is on:
+        then it stretches by adaptive_growth while readings hold steady and snaps
+        back to the minimum on change or failure. ok=None means no poll happened.
+        """
+        if not self.cfg.adaptive:
+            interval = float(self.cfg.poll_interval_seconds)
+        else:
+            lo = self.cfg.adaptive_min_interval_seconds
+            hi = self.cfg.adaptive_max_interval_seconds
+            cur = self._interval.get(tgt.ip)
+            if cur is None or not ok:
+                interval = lo
+            else:
+                interval = min(hi, cur * self.cfg.adaptive_growth)
+        self._interval[tgt.ip] = interval
+        series = self._series.get(tgt.ip)
+        if series is not None:
+            series.pdu.get(POLL_INTERVAL).set(interval)
+        return interval
+
+    def apply_config(self, new: AppConfig) -> "ReloadDiff":
+        """
+        Swap in targets/auth_groups from a reloaded config. Only PDUs that were
+        added, removed or changed are touched; everything else keeps its pooled
+        connections, breaker state and metric series. Other settings need a restart.
+        """
+        old_targets = self._targets
+        new_targets = {t.ip: t for t in new.targets}
+        diff = ReloadDiff()
+        for ip in old_targets.keys() - new_targets.keys():
+            diff.removed.append(ip)
+        for ip, tgt in new_targets.items():
+            old = old_targets.get(ip)
+            if old is None:
+                diff.added.append(ip)
+            elif old != tgt or self.cfg.auth_groups.get(old.auth_group) != new.auth_groups.get(tgt.auth_group):
+                diff.changed.append(ip)
+
+        self.cfg.targets = new.targets
+        self.cfg.auth_groups = new.auth_groups
+        self._targets = new_targets
+        for ip in diff.removed + diff.changed:
+            # Changed PDUs (new creds/outlets/labels) start with a clean breaker
+            for state in (self._fail_streaks, self._cooldown_left, self._interval, self._last_watts):
+                state.pop(ip, None)
+            if self._rf is not None:
+                # A new ip/firmware behind the same address gets its $expand support probed again
+                self._rf.forget_host(ip)
+        for ip in diff.removed:
+            self._last_success.pop(ip, None)
+            self._first_poll_done(ip)
+        for ip in diff.added:
+            self._gen[ip] = self._gen.get(ip, -1) + 1
+            self._pending.append(ip)
+        self._sync_series()
+        self._wake.set()
+        SNAPSHOT.invalidate()
+        return diff
+
+    def _skip_for_cooldown(self, tgt: Target) -> bool:
+        """Circuit breaker: True if this PDU is cooling down (and burns one cycle of it)."""
+        if self._cooldown_left.get(tgt.ip, 0) > 0:
+            self._cooldown_left[tgt.ip] -= 1
+            series = self._series.get(tgt.ip)
+            if series is not None:
+                series.pdu.get(SCRAPE_OK).set(0)
+            return True
+        return False
+
+    async def _poll_target(self, tgt: Target) -> bool:
+        """Poll every outlet of one PDU. Returns True if it answered and no outlet moved."""
+        if self._rf is None:
+            return False
 
         # In-flight instrumentation
         IN_FLIGHT.inc()
         try:
             with SCRAPE_LAT.time():
-                val_power = await self._rf.get_outlet_power(
-                    ip=tgt.ip,
-                    outlet=outlet,
-                    username=self.cfg.auth_groups[tgt.auth_group].user,
-                    password=self.cfg.auth_groups[tgt.auth_group].password,
-                )
-                val_volts = await self._rf.get_outlet_volts(
+                readings = await self._rf.get_outlet_readings(
                     ip=tgt.ip,
-                    outlet=outlet,
+                    outlets=tgt.outlets,
                     username=self.cfg.auth_groups[tgt.auth_group].user,
                     password=self.cfg.auth_groups[tgt.auth_group].password,
                 )
         finally:
             IN_FLIGHT.dec()
+        read_at = time.time()
 
-        if val_power is not None:
-            OUTLET_WATTS.labels(**labels).set(val_power)
-            SCRAPE_OK.labels(tgt.pdu, tgt.ip).set(1)
-            LAST_SUCCESS.labels(tgt.pdu, tgt.ip).set(time.time())
-            self._fail_streaks[tgt.ip] = 0
-        else:
-            # mark failure for this PDU
-            SCRAPE_OK.labels(tgt.pdu, tgt.ip).set(0)
-            streak = self._fail_streaks.get(tgt.ip, 0) + 1
-            self._fail_streaks[tgt.ip] = streak
-            if streak >= self.cfg.cb_fail_threshold:
-                # open circuit: back off for a few cycles
-                self._cooldown_left[tgt.ip] = self.cfg.cb_cooldown_cycles
-                # reset so we don't immediately retrigger after cooldown
-                self._fail_streaks[tgt.ip] = 0
-        if val_volts is not None:
-            OUTLET_VOLTS.labels(**labels).set(val_volts)
-            SCRAPE_OK.labels(tgt.pdu, tgt.ip).set(1)
-            LAST_SUCCESS.labels(tgt.pdu, tgt.ip).set(time.time())
+        series = self._series.get(tgt.ip)
+        if series is None:
+            return False  # removed by a config reload while in flight
+        any_ok = False
+        changed = False
+        prev = self._last_watts.setdefault(tgt.ip, {})
+        for outlet, oseries in series.outlets.items():
+            reading = readings.get(outlet)
+            if _record_outlet(oseries, reading):
+                any_ok = True
+                self._read_ts[(tgt.ip, oseries.labelvalues[2])] = read_at
+                if self._watts_changed(prev.get(outlet), reading.watts):
+                    changed = True
+                prev[outlet] = reading.watts
+
+        if any_ok:
+            series.pdu.get(SCRAPE_OK).set(1)
+            series.pdu.get(LAST_SUCCESS).set(read_at)
+            self._last_success[tgt.ip] = read_at
             self._fail_streaks[tgt.ip] = 0
         else:
             # mark failure for this PDU
-            SCRAPE_OK.labels(tgt.pdu, tgt.ip).set(0)
+            series.pdu.get(SCRAPE_OK).set(0)
             streak = self._fail_streaks.get(tgt.ip, 0) + 1
             self._fail_streaks[tgt.ip] = streak
             if streak >= self.cfg.cb_fail_threshold:
@@ -290,32 +842,192 @@ class Collector:
                 self._cooldown_left[tgt.ip] = self.cfg.cb_cooldown_cycles
                 # reset so we don't immediately retrigger after cooldown
                 self._fail_streaks[tgt.ip] = 0
+        # "ok" for the adaptive scheduler means read fine and nothing moved
+        return any_ok and not changed
 
-    def _labels_for(self, tgt: Target, outlet: int) -> Dict[str, str]:
-        # ensure rack/row exist in label set, even if blank (prom labels must be consistent)
-        rack = tgt.labels.get("rack", "")
-        row  = tgt.labels.get("row", "")
-        base = {
-            "pdu": tgt.pdu,
-            "ip": tgt.ip,
-            "outlet": str(outlet),
-            "rack": rack,
-            "row": row,
-        }
-        return base
+    def _watts_changed(self, prev: Optional[float], cur: Optional[float]) -> bool:
+        if prev is None or cur is None:
+            return True
+        threshold = max(self.cfg.adaptive_delta_watts, abs(prev) * self.cfg.adaptive_delta_ratio)
+        return abs(cur - prev) > threshold
+
+    def _sync_series(self) -> None:
+        """
+        Bring the bound gauge children in line with cfg.targets: build entries for
+        new PDUs/outlets, drop (and unexport) those that went away or changed labels.
+        Untouched PDUs keep their children.
+        """
+        wanted: Dict[str, Target] = {t.ip: t for t in self.cfg.targets}
+        for ip in list(self._series):
+            tgt = wanted.get(ip)
+            cur = self._series[ip]
+            if tgt is None or cur.pdu.labelvalues != (tgt.pdu, tgt.ip):
+                for o in cur.outlets:
+                    self._read_ts.pop((ip, str(o)), None)
+                cur.remove()
+                del self._series[ip]
+        for ip, tgt in wanted.items():
+            cur = self._series.get(ip)
+            if cur is None:
+                cur = self._series[ip] = _TargetSeries(tgt.pdu, tgt.ip)
+            want_outlets = {int(o): _outlet_labelvalues(tgt, o) for o in tgt.outlets}
+            for o in list(cur.outlets):
+                if want_outlets.get(o) != cur.outlets[o].labelvalues:
+                    cur.outlets.pop(o).remove()
+                    self._read_ts.pop((ip, str(o)), None)
+            for o, lv in want_outlets.items():
+                if o not in cur.outlets:
+                    cur.outlets[o] = _SeriesCache(lv)
 
     # Exposed to the HTTP layer
     def is_ready(self) -> bool:
         return self._ready.is_set()
 
+@dataclass
+class ReloadDiff:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+class ConfigReloader:
+    """Reloads the config file on SIGHUP or when its mtime changes, and applies it to the Collector."""
+    def __init__(self, path: str, collector: Collector, shard: Optional[Tuple[int, int]] = None):
+        self.path = path
+        self.collector = collector
+        self.shard = shard  # (index, count): keep only this shard's targets
+        self._lock = asyncio.Lock()
+        self._mtime = _mtime(path)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def reload_soon(self, reason: str) -> None:
+        """Schedule reload() from a signal handler; the task is kept until done and its errors logged."""
+        task = asyncio.get_running_loop().create_task(self.reload(reason), name=f"config-reload-{reason}")
+        self._tasks.add(task)
+        task.add_done_callback(self._reload_done)
+
+    def _reload_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            e = task.exception()
+            print(f"[WARN] Config reload task failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+    async def reload(self, reason: str) -> None:
+        async with self._lock:
+            t0 = time.perf_counter()
+            RELOAD_LAST.set(time.time())
+            self._mtime = _mtime(self.path)
+            try:
+                new = load_config(self.path)
+                if self.shard is not None:
+                    new.targets = shard_targets(new.targets, *self.shard)
+                diff = self.collector.apply_config(new)
+            except Exception as e:
+                RELOAD_OK.set(0)
+                print(f"[WARN] Config reload ({reason}) failed, keeping old config: {type(e).__name__}: {e}", file=sys.stderr)
+                return
+            RELOAD_OK.set(1)
+            RELOAD_DURATION.set(time.perf_counter() - t0)
+            RELOAD_DIFF.labels("added").set(len(diff.added))
+            RELOAD_DIFF.labels("removed").set(len(diff.removed))
+            RELOAD_DIFF.labels("changed").set(len(diff.changed))
+            print(f"[SUCCESS] Config reloaded ({reason}): +{len(diff.added)} -{len(diff.removed)} ~{len(diff.changed)} targets")
+
+    async def watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            mtime = _mtime(self.path)
+            if mtime is not None and mtime != self._mtime:
+                await self.reload("file changed")
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+class _SeriesCache:
+    """
+    Bound children of several gauges for one label tuple. Children are bound on
+    first set (so nothing is exported before it has a value) and then reused.
+    """
+    __slots__ = ("labelvalues", "_children")
+
+    def __init__(self, labelvalues: Tuple[str, ...]):
+        self.labelvalues = labelvalues
+        self._children: Dict[Gauge, Any] = {}
+
+    def get(self, gauge: Gauge):
+        child = self._children.get(gauge)
+        if child is None:
+            child = self._children[gauge] = gauge.labels(*self.labelvalues)
+        return child
+
+    def remove(self) -> None:
+        for gauge in self._children:
+            try:
+                gauge.remove(*self.labelvalues)
+            except KeyError:
+                pass
+        self._children.clear()
+
+class _TargetSeries:
+    """Per-PDU series plus one _SeriesCache per configured outlet."""
+    __slots__ = ("pdu", "outlets")
+
+    def __init__(self, pdu: str, ip: str):
+        self.pdu = _SeriesCache((pdu, ip))
+        self.outlets: Dict[int, _SeriesCache] = {}
+
+    def remove(self) -> None:
+        self.pdu.remove()
+        for o in self.outlets.values():
+            o.remove()
+        self.outlets.clear()
+
+def _outlet_labelvalues(tgt: Target, outlet: int) -> Tuple[str, ...]:
+    # ensure rack/row exist in label set, even if blank (prom labels must be consistent)
+    # order matches OUTLET_* labelnames: pdu, ip, outlet, rack, row
+    return (tgt.pdu, tgt.ip, str(outlet), tgt.labels.get("rack", ""), tgt.labels.get("row", ""))
+
+def _record_outlet(series: _SeriesCache, reading: Optional[OutletReading]) -> bool:
+    """Set outlet gauges from a reading. Returns True if a watts value was recorded."""
+    if reading is None or reading.watts is None:
+        return False
+    series.get(OUTLET_WATTS).set(reading.watts)
+    if reading.volts is not None:
+        series.get(OUTLET_VOLTS).set(reading.volts)
+    if reading.amps is not None:
+        series.get(OUTLET_AMPS).set(reading.amps)
+    if reading.energy_kwh is not None:
+        series.get(OUTLET_ENERGY).set(reading.energy_kwh)
+    if reading.power_state is not None:
+        series.get(OUTLET_ON).set(1 if reading.power_state == "On" else 0)
+    return True
+
+def shard_of(ip: str, shard_count: int) -> int:
+    """
+    Rendezvous (highest-random-weight) hash: stable owner for a PDU, and changing
+    the shard count only moves the PDUs whose winning shard changed.
+    """
+    return max(range(shard_count), key=lambda i: zlib.crc32(f"{i}|{ip}".encode()))
+
+def shard_targets(targets: List[Target], index: int, count: int) -> List[Target]:
+    return [t for t in targets if shard_of(t.ip, count) == index]
+
+def _phase_offset(tgt: Target, interval: float) -> float:
+    """Stable offset in [0, interval) derived from the PDU identity (survives restarts)."""
+    h = zlib.crc32(f"{tgt.pdu}|{tgt.ip}".encode())
+    return (h / 2**32) * interval
+
 # ----
 # HTTP Server
 # ----
 
 class HttpApp:
-    def __init__(self, cfg: AppConfig, collector: Collector):
+    def __init__(self, cfg: AppConfig, collector: Collector, snapshot: Optional[MetricsSnapshot] = None):
         self.cfg = cfg
         self.collector = collector
+        self.snapshot = snapshot or SNAPSHOT
         self.app = web.Application()
         self.app.add_routes([
             web.get("/metrics", self.handle_metrics),
@@ -324,20 +1036,47 @@ class HttpApp:
         ])
         self.runner: Optional[web.AppRunner] = None
         self.site: Optional[web.TCPSite] = None
+        self._render_task: Optional[asyncio.Task] = None
+        self.snapshot.gzip_enabled = cfg.metrics_gzip
     
     async def start(self):
+        await self.snapshot.refresh(force=True)
+        self._render_task = asyncio.create_task(self._render_loop(), name="metrics-render")
         self.runner = web.AppRunner(self.app, access_log=None)
         await self.runner.setup()
         self.site = web.TCPSite(self.runner, host=self.cfg.http_host, port=self.cfg.http_port)
         await self.site.start()
 
     async def stop(self):
+        if self._render_task:
+            self._render_task.cancel()
         if self.runner:
             await self.runner.cleanup()
 
+    async def _render_loop(self):
+        # Coalesces many collector updates into at most one render per interval
+        while True:
+            await asyncio.sleep(self.cfg.metrics_render_interval_seconds)
+            try:
+                await self.snapshot.refresh()
+            except Exception as e:
+                print(f"[WARN] metrics render failed: {type(e).__name__}: {e}", file=sys.stderr)
+
     async def handle_metrics(self, request: web.Request) -> web.Response:
-        data = generate_latest(REGISTRY)
-        return web.Response(body=data, content_type=None)
+        fmt = _negotiate_format(request.headers.get("Accept", ""))
+        if fmt not in self.snapshot.CONTENT_TYPES:
+            fmt = "text"
+        payload = await self.snapshot.get(fmt)
+        gz = payload.body_gz is not None and _accepts_gzip(request.headers.get("Accept-Encoding", ""))
+        etag = payload.etag_gz if gz else payload.etag
+        headers = {"ETag": etag, "Vary": "Accept, Accept-Encoding"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+        headers["Content-Type"] = MetricsSnapshot.CONTENT_TYPES[fmt]
+        if gz:
+            headers["Content-Encoding"] = "gzip"
+            return web.Response(body=payload.body_gz, headers=headers)
+        return web.Response(body=payload.body, headers=headers)
 
     async def handle_healthz(self, request: web.Request) -> web.Response:
         return web.Response(text="ok\n")
@@ -348,6 +1087,44 @@ class HttpApp:
         return web.Response(status=503, text="not ready\n")
 
 
+def _negotiate_format(accept: str) -> str:
+    """
+    Pick "openmetrics" or "text" from an Accept header by q-value.
+    Prometheus lists openmetrics-text with a higher q than text/plain by default.
+    """
+    om_q = 0.0
+    text_q = 0.0
+    for part in accept.split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for prm in params:
+            if prm.startswith("q="):
+                try:
+                    q = float(prm[2:])
+                except ValueError:
+                    q = 0.0
+        media = media.lower()
+        if media == "application/openmetrics-text":
+            om_q = max(om_q, q)
+        elif media in ("text/plain", "text/*", "*/*"):
+            text_q = max(text_q, q)
+    return "openmetrics" if om_q > 0 and om_q >= text_q else "text"
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip (honours q=0)."""
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() not in ("gzip", "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
 # ----
 # Main
 # ----
@@ -362,6 +1139,14 @@ async def amain():
         print(f"[SUCCESS] Config file found at {config_path}")
     
     cfg = load_config(config_path)
+    if cfg.shards > 1:
+        from sharded import run_front
+        await run_front(config_path, cfg)
+        return
+    await serve(config_path, cfg)
+
+async def serve(config_path: str, cfg: AppConfig, shard: Optional[Tuple[int, int]] = None):
+    """Run one Collector + HttpApp until SIGINT/SIGTERM. shard=(index, count) in sharded mode."""
     collector = Collector(cfg)
     http = HttpApp(cfg, collector)
 
@@ -370,8 +1155,23 @@ async def amain():
     # Start components
     await collector.start()
     await http.start()
+    reloader = ConfigReloader(config_path, collector, shard=shard)
+    RELOAD_OK.set(1)
+    watch_task = None
+    if cfg.reload_watch:
+        watch_task = asyncio.create_task(reloader.watch(cfg.reload_check_interval_seconds), name="config-watch")
+
+    # Wait for shutdown request
+    await _wait_for_stop(lambda: reloader.reload_soon("SIGHUP"))
+
+    # Shutdown
+    if watch_task:
+        watch_task.cancel()
+    await http.stop()
+    await collector.stop()
 
-    # Signal handling
+async def _wait_for_stop(on_hup=None):
+    """Block until SIGINT/SIGTERM; call on_hup() on SIGHUP where supported."""
     loop = asyncio.get_running_loop()
     stop_event = asyncio.Event()
 
@@ -384,14 +1184,14 @@ async def amain():
         except NotImplementedError:
             # Windows
             signal.signal(sig, lambda s, f: _stop())
+    if on_hup is not None and hasattr(signal, "SIGHUP"):
+        try:
+            loop.add_signal_handler(signal.SIGHUP, on_hup)
+        except NotImplementedError:
+            pass
 
-    # Wait for shutdown request
     await stop_event.wait()
 
-    # Shutdown
-    await http.stop()
-    await collector.stop()
-
 def main():
     try:
         asyncio.run(amain())
@@ -1,18 +1,36 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import random
+import re
 import ssl
 import time
 from dataclasses import dataclass
-from typing import Any, Optional
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 
 import aiohttp
 
+from redfish_common import (
+    DecodeStats,
+    Field,
+    HostRateLimiter,
+    KeepSpec,
+    Projection,
+    loads_json,
+    loads_json_lenient,
+    project_fields,
+)
+
 class RedfishError(Exception):
     """Generic Redfish client error."""
 
+class QueryRejected(RedfishError):
+    """A probe GET was refused outright (e.g. 400/405/501 for an unsupported query); not retried."""
+
+# Error statuses worth retrying even on a probe: the server is busy, not refusing
+_TRANSIENT_STATUSES = frozenset((429, 502, 503, 504))
+
 @dataclass(frozen=True)
 class ClientConfig:
     connect_timeout_s: float = 2.0
@@ -23,19 +41,55 @@ class ClientConfig:
     max_retries: int = 2
     backoff_base_s: float = 0.2
     per_request_semaphore: Optional[asyncio.Semaphore] = None
+    per_host_qps: Optional[float] = None     # token-bucket rate per host, None = unlimited
+    per_host_burst: Optional[float] = None   # bucket size, defaults to max(1, per_host_qps)
+    # Connection pool (aiohttp.TCPConnector)
+    conn_limit: int = 100               # total sockets, 0 = unlimited
+    conn_limit_per_host: int = 2        # warm sockets per PDU; embedded web servers choke on more
+    keepalive_timeout_s: float = 60.0   # keep idle sockets across poll cycles to skip TLS handshakes
+    dns_cache_ttl_s: Optional[int] = 300
+    scheme: str = "https"               # "http" only for local stand-in servers / benchmarks
+
+@dataclass
+class PoolStats:
+    """Connection pool counters, fed by aiohttp tracing."""
+    hits: int = 0          # request served from an idle pooled connection
+    misses: int = 0        # request had to open a new connection
+    handshakes: int = 0    # new connections fully established (TCP + TLS)
+    queued: int = 0        # request waited for a free slot under conn_limit(_per_host)
+
+@dataclass(frozen=True)
+class OutletReading:
+    """All readings from one GET of a RackPDU outlet; any field may be None if absent."""
+    watts: Optional[float] = None
+    volts: Optional[float] = None
+    amps: Optional[float] = None
+    energy_kwh: Optional[float] = None
+    power_state: Optional[str] = None   # "On" / "Off" per Redfish PowerState
 
 class RedfishClient:
     """
     Async redfish client:
         - Reuses a single aiohttp ClientSession (HTTP keep-alive)
+        - Bounded per-host connection pool so TLS sessions stay warm
         - Optional concurrency control via semaphore
         - Jittered exponentional backoff retries
+        - Bulk outlet reads via $expand, with per-PDU capability cache
+        - Outlet on/off through the Outlet.PowerControl action
+        - Bodies read once as bytes and decoded with orjson when installed
     """
 
     def __init__(self, cfg: Optional[ClientConfig] = None):
         self.cfg = cfg or ClientConfig()
         self._session: Optional[aiohttp.ClientSession] = None
         self._ssl_context: Optional[ssl.SSLContext] = None
+        self.rate_limiter: Optional[HostRateLimiter] = None
+        if self.cfg.per_host_qps:
+            self.rate_limiter = HostRateLimiter(self.cfg.per_host_qps, self.cfg.per_host_burst)
+        # ip -> True/False once we know whether the PDU honours $expand on Outlets
+        self._expand_support: Dict[str, bool] = {}
+        self.pool_stats = PoolStats()
+        self.decode_stats = DecodeStats(bucket_counts=[0] * len(DecodeStats.BUCKETS))
 
         if not self.cfg.verify_ssl:
             self._ssl_context = ssl.create_default_context()
@@ -57,36 +111,135 @@ class RedfishClient:
                 sock_read=self.cfg.read_timeout_s,
             )
             headers = {"User-Agent": self.cfg.user_agent, "Accept": "application/json"}
-            self._session = aiohttp.ClientSession(timeout=timeout, headers=headers)
+            connector = aiohttp.TCPConnector(
+                limit=self.cfg.conn_limit,
+                limit_per_host=self.cfg.conn_limit_per_host,
+                keepalive_timeout=self.cfg.keepalive_timeout_s,
+                ttl_dns_cache=self.cfg.dns_cache_ttl_s,
+                use_dns_cache=self.cfg.dns_cache_ttl_s is not None,
+                ssl=self._ssl_context if not self.cfg.verify_ssl else True,
+            )
+            self._session = aiohttp.ClientSession(
+                timeout=timeout,
+                headers=headers,
+                connector=connector,
+                trace_configs=[self._pool_trace_config()],
+            )
 
     async def close(self) -> None:
         if self._session and not self._session.closed:
             await self._session.close()
 
+    def _pool_trace_config(self) -> aiohttp.TraceConfig:
+        stats = self.pool_stats
+        tc = aiohttp.TraceConfig()
+
+        async def on_reuse(session, ctx: SimpleNamespace, params) -> None:
+            stats.hits += 1
+
+        async def on_create_start(session, ctx: SimpleNamespace, params) -> None:
+            stats.misses += 1
+
+        async def on_queued(session, ctx: SimpleNamespace, params) -> None:
+            stats.queued += 1
+
+        async def on_create_end(session, ctx: SimpleNamespace, params) -> None:
+            stats.handshakes += 1
+
+        tc.on_connection_reuseconn.append(on_reuse)
+        tc.on_connection_create_start.append(on_create_start)
+        tc.on_connection_create_end.append(on_create_end)
+        tc.on_connection_queued_start.append(on_queued)
+        return tc
+
 
 ## Public API ##
 
-    async def get_outlet_power(
+    def forget_host(self, ip: str) -> None:
+        """Drop what was learned about ip (the $expand probe), e.g. after its config changed."""
+        self._expand_support.pop(ip, None)
+
+    async def get_outlet_reading(
         self,
         ip: str,
         outlet: int | str,
         *,
         username: str,
         password: str,
-    ) -> Optional[float]:
+    ) -> Optional[OutletReading]:
+        """
+        Single GET of /Outlets/OUTLET{n}, extracting every reading we care about.
+        Returns None if the outlet could not be fetched at all.
+        """
         outlet_str = str(outlet)
-        url = f"https://{ip}/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{outlet_str}"
-        # curl -sk --user admin:87654321 https://$NAME/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET14 | jq -r '.Voltage.Reading'
+        url = f"{self.cfg.scheme}://{ip}/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{outlet_str}"
+        # curl -sk --user admin:87654321 https://$NAME/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET14
 
         data = await self._get_json_with_retries(
             url,
             auth=aiohttp.BasicAuth(username, password),
+            keep=OUTLET.keep,
         )
         if data is None:
             return None
-        
-        val = _extract_watts(data)
-        return val
+
+        return _extract_outlet_reading(data)
+
+    async def get_outlet_readings(
+        self,
+        ip: str,
+        outlets: Iterable[int | str],
+        *,
+        username: str,
+        password: str,
+    ) -> Dict[int, Optional[OutletReading]]:
+        """
+        Read many outlets of one PDU. Uses a single
+            GET /redfish/v1/PowerEquipment/RackPDUs/1/Outlets?$expand=.($levels=1)
+        when the PDU supports it, otherwise falls back to one GET per outlet.
+        The outcome of the first probe is cached per ip: a refusal of the query
+        marks the PDU as unsupported at once, without retries.
+        Returns {outlet: OutletReading or None}.
+        """
+        wanted = [int(o) for o in outlets]
+        if not wanted:
+            return {}
+        auth = aiohttp.BasicAuth(username, password)
+
+        support = self._expand_support.get(ip)
+        if support is not False:
+            url = f"{self.cfg.scheme}://{ip}/redfish/v1/PowerEquipment/RackPDUs/1/Outlets?$expand=.($levels=1)"
+            try:
+                data = await self._get_json_with_retries(url, auth=auth, keep=EXPANDED_OUTLETS_KEEP, probe=support is None)
+            except QueryRejected:
+                data = None
+                self._expand_support[ip] = False
+            else:
+                if data is None:
+                    # No answer at all: per-outlet GETs would just repeat the failure once per outlet
+                    return {o: None for o in wanted}
+                expanded = _extract_expanded_outlets(data)
+                if expanded is not None:
+                    self._expand_support[ip] = True
+                    return {o: expanded.get(o) for o in wanted}
+                # Collection came back with bare @odata.id links: no $expand here
+                self._expand_support[ip] = False
+
+        readings = await asyncio.gather(
+            *(self.get_outlet_reading(ip, o, username=username, password=password) for o in wanted)
+        )
+        return dict(zip(wanted, readings))
+
+    async def get_outlet_power(
+        self,
+        ip: str,
+        outlet: int | str,
+        *,
+        username: str,
+        password: str,
+    ) -> Optional[float]:
+        reading = await self.get_outlet_reading(ip, outlet, username=username, password=password)
+        return reading.watts if reading is not None else None
 
     async def get_outlet_volts(
         self,
@@ -96,26 +249,86 @@ class RedfishClient:
         username: str,
         password: str,
     ) -> Optional[float]:
-        outlet_str = str(outlet)
-        url = f"https://{ip}/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{outlet_str}"
-        # curl -sk --user admin:87654321 https://$NAME/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET14 | jq -r '.Voltage.Reading'
+        reading = await self.get_outlet_reading(ip, outlet, username=username, password=password)
+        return reading.volts if reading is not None else None
 
-        data = await self._get_json_with_retries(
-            url,
-            auth=aiohttp.BasicAuth(username, password),
-        )
-        if data is None:
-            return None
-        
-        val = _extract_volts(data)
-        return val
+    async def set_outlet_power(
+        self,
+        ip: str,
+        outlet: int | str,
+        state: str,
+        *,
+        username: str,
+        password: str,
+    ) -> bool:
+        """
+        POST /Outlets/OUTLET{n}/Actions/Outlet.PowerControl with {"PowerState": state}
+        ("On" / "Off"). Returns True once the PDU accepted the request; the outlet's
+        PowerState/PowerWatts follow on the PDU's own schedule.
+        """
+        if state not in ("On", "Off"):
+            raise ValueError(f"PowerState must be 'On' or 'Off', got {state!r}")
+        url = (f"{self.cfg.scheme}://{ip}/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/"
+               f"OUTLET{outlet}/Actions/Outlet.PowerControl")
+        return await self._post_with_retries(url, {"PowerState": state}, auth=aiohttp.BasicAuth(username, password))
+
+    async def _post_with_retries(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        *,
+        auth: Optional[aiohttp.BasicAuth] = None,
+    ) -> bool:
+        """
+        POST a JSON action body. Only for idempotent actions (setting a state, not
+        toggling it): a request that timed out may have been applied and is resent.
+        """
+        await self._ensure_session()
+        assert self._session is not None
+
+        attempts = self.cfg.max_retries + 1
+        for attempt in range(attempts):
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(_host_of(url))
+                async with self._maybe_semaphore():
+                    async with self._session.post(
+                        url,
+                        json=payload,
+                        auth=auth,
+                        ssl=self._ssl_context if not self.cfg.verify_ssl else None,
+                    ) as resp:
+                        if 200 <= resp.status < 300:
+                            return True
+                        if resp.status in (401, 403):
+                            raise RedfishError(f"Auth failed ({resp.status}) for {url}")
+                        if resp.status in (400, 404, 405):
+                            # Outlet or action not supported: resending won't help
+                            return False
+                        body = await _safe_snippet(resp)
+                        raise RedfishError(f"HTTP {resp.status} from {url}: {body}")
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, RedfishError):
+                if attempt < attempts - 1:
+                    await asyncio.sleep(self._backoff_delay(attempt))
+                continue
+
+        return False
 
     async def _get_json_with_retries(
         self,
         url: str,
         *,
         auth: Optional[aiohttp.BasicAuth] = None,
+        keep: Optional[KeepSpec] = None,
+        probe: bool = False,
     ) -> Optional[dict[str, Any]]:
+        """
+        GET url and decode the JSON body. keep (see project_fields) trims the
+        decoded document to the fields the caller reads, so large payloads
+        are not held on to. With probe, an error status other than 401/403 or
+        a transient one raises QueryRejected instead of being retried.
+        """
         await self._ensure_session()
         assert self._session is not None
 
@@ -125,6 +338,9 @@ class RedfishClient:
         for attempt in range(attempts):
             t0 = time.time()
             try:
+                if self.rate_limiter is not None:
+                    # Wait for the host's token before taking a global slot
+                    await self.rate_limiter.acquire(_host_of(url))
                 async with self._maybe_semaphore():
                     async with self._session.get(
                         url,
@@ -133,17 +349,17 @@ class RedfishClient:
                     ) as resp:
                             # 2xx happy path
                         if 200 <= resp.status < 300:
-                            text = await resp.text()
-                                # Some devices return application/json but with oddities; parse robustly.
-                            try:
-                                return json.loads(text)
-                            except json.JSONDecodeError:
-                                    # Some PDUs return bytes or malformed JSON occasionally; try resp.json() as a fallback.
-                                return await resp.json(content_type=None)
+                            body = await resp.read()
+                            data = self._decode(body, resp.charset)
+                            if data is None:
+                                raise RedfishError(f"Malformed JSON from {url}: {body[:200]!r}")
+                            return project_fields(data, keep) if keep is not None else data
 
                         # 401/403 likely bad credentials or auth flow
                         if resp.status in (401, 403):
                             raise RedfishError(f"Auth failed ({resp.status}) for {url}")
+                        if probe and resp.status not in _TRANSIENT_STATUSES:
+                            raise QueryRejected(f"HTTP {resp.status} from {url}")
                         # 404: outlet not found (can occur for absent outlets)
                         if resp.status == 404:
                             return None
@@ -152,6 +368,8 @@ class RedfishClient:
                         body = await _safe_snippet(resp)
                         raise RedfishError(f"HTTP {resp.status} from {url}: {body}")
 
+            except QueryRejected:
+                raise
             except (aiohttp.ClientError, asyncio.TimeoutError, RedfishError) as e:
                 last_err = e
                 # Only backoff if we have remaining attempts
@@ -164,6 +382,22 @@ class RedfishClient:
         # Exhausted retries
         return None
 
+    def _decode(self, body: bytes, charset: Optional[str]) -> Optional[Any]:
+        """Decode body with the fast backend, falling back to a lenient parse of the same bytes."""
+        st = self.decode_stats
+        t0 = time.perf_counter()
+        try:
+            data = loads_json(body)
+        except ValueError:
+            try:
+                data = loads_json_lenient(body, charset)
+            except ValueError:
+                st.failures += 1
+                return None
+            st.fallbacks += 1
+        st.observe(time.perf_counter() - t0, len(body))
+        return data
+
     def _backoff_delay(self, attempt: int) -> float:
         base = self.cfg.backoff_base_s * (2**attempt)
         jitter = random.uniform(0, base * 0.5)
@@ -187,75 +421,56 @@ class _SemaphoreContext:
         if self._sem is not None:
             self._sem.release()
 
-def _extract_watts(data: dict[str, Any]) -> Optional[float]:
-    """
-    Robustly extract a watts reading from common Redfish schemas.
+# ----
+# Outlet spec
+# ----
 
-    Primary (as requested):
-        data["PowerWatts"]["Reading"]
+OUTLET = Projection(
+    # PowerWatts.Reading per the RackPDU schema; the rest are fallbacks seen in the wild
+    Field("watts", "PowerWatts/Reading", "PowerReading", "PowerReading/Reading", "Power/Reading", type="float"),
+    Field("volts", "Voltage/Reading", type="float"),
+    Field("amps", "CurrentAmps/Reading", type="float"),
+    Field("energy_kwh", "EnergykWh/Reading", type="float"),
+    Field("power_state", "PowerState"),   # "On" / "Off"
+)
 
-    Fallbacks seen in the wild (kept conservative):
-        data["PowerReading"] or data["PowerReading"]["Reading"]
-        data["Power"]["Reading"]
-    """
-    try:
-        pw = data.get("PowerWatts")
-        if isinstance(pw, dict):
-            val = pw.get("Reading")
-            if _is_number(val):
-                return float(val)
-    except Exception:
-        pass
-
-    # Conservative fallbacks
-    try:
-        pr = data.get("PowerReading")
-        if _is_number(pr):
-            return float(pr)
-        if isinstance(pr, dict) and _is_number(pr.get("Reading")):
-            return float(pr["Reading"])
-    except Exception:
-        pass
+# Expanded collection members also need their Id to map back to an outlet number
+EXPANDED_OUTLETS_KEEP: Mapping[str, Any] = {"Members": OUTLET.keep + ("Id", "@odata.id")}
 
-    try:
-        p = data.get("Power")
-        if isinstance(p, dict) and _is_number(p.get("Reading")):
-            return float(p["Reading"])
-    except Exception:
-        pass
+def _extract_outlet_reading(data: dict[str, Any]) -> OutletReading:
+    return OutletReading(**OUTLET.extract(data))
 
-    return None
+_OUTLET_ID_RE = re.compile(r"(\d+)$")
 
-def _extract_volts(data: dict[str, Any]) -> Optional[float]:
+def _extract_expanded_outlets(data: dict[str, Any]) -> Optional[Dict[int, OutletReading]]:
     """
-    Robustly extract a watts reading from common Redfish schemas.
-
-    Primary (as requested):
-        data["PowerWatts"]["Reading"]
-
-    Fallbacks seen in the wild (kept conservative):
-        data["PowerReading"] or data["PowerReading"]["Reading"]
-        data["Power"]["Reading"]
+    Parse an Outlets collection fetched with $expand.
+    Returns {outlet_number: OutletReading}, or None if Members are not expanded.
     """
-    try:
-        pw = data.get("Voltage")
-        if isinstance(pw, dict):
-            val = pw.get("Reading")
-            if _is_number(val):
-                return float(val)
-    except Exception:
-        pass
-
-    # Conservative fallbacks
-    #   None
-    return None
+    members = data.get("Members")
+    if not isinstance(members, list):
+        return None
+    nums: List[int] = []
+    docs: List[dict[str, Any]] = []
+    for m in members:
+        if not isinstance(m, dict):
+            continue
+        ident = m.get("Id") or str(m.get("@odata.id", "")).rstrip("/").rsplit("/", 1)[-1]
+        match = _OUTLET_ID_RE.search(str(ident))
+        if match is None:
+            continue
+        if not any(k in m for k in ("PowerWatts", "Voltage", "CurrentAmps", "PowerState")):
+            # Only a link, not an expanded resource
+            continue
+        nums.append(int(match.group(1)))
+        docs.append(m)
+    if members and not docs:
+        return None
+    return {n: OutletReading(**rec) for n, rec in zip(nums, OUTLET.many(docs))}
 
-def _is_number(x: Any) -> bool:
-    try:
-        float(x)
-        return True
-    except Exception:
-        return False
+def _host_of(url: str) -> str:
+    """'https://10.0.0.1:443/redfish/...' -> '10.0.0.1:443'"""
+    return url.split("/", 3)[2]
 
 async def _safe_snippet(resp: aiohttp.ClientResponse, limit: int = 200) -> str:
     try: 
@@ -0,0 +1,249 @@
+"""
+Pieces shared by the Redfish clients: redfish_client.py here (PDUs) and
+cluster_check/redfish_ttt.py (BMCs), which puts this directory on sys.path.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+try:
+    import orjson  # optional fast decoder; stdlib json otherwise
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# ----
+# Per-host rate limiting
+# ----
+
+class _TokenBucket:
+    """Async token bucket for one host. Waiters are served FIFO via the lock."""
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping as needed. Returns seconds spent waiting."""
+        t0 = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1.0:
+                        self.tokens -= 1.0
+                        break
+                    await asyncio.sleep((1.0 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+        return time.monotonic() - t0
+
+@dataclass
+class HostWaitStats:
+    """Cumulative histogram of token-bucket wait time for one host."""
+    bucket_counts: List[int]
+    count: int = 0
+    total_s: float = 0.0
+
+class HostRateLimiter:
+    """
+    Per-host requests/second limit, keyed by host (ip or ip:port).
+    burst defaults to max(1, qps) so a host can absorb one second of backlog.
+    """
+    WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, qps: float, burst: Optional[float] = None):
+        if qps <= 0:
+            raise ValueError("qps must be > 0")
+        self.qps = float(qps)
+        self.burst = float(burst) if burst else max(1.0, self.qps)
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self.stats: Dict[str, HostWaitStats] = {}
+
+    async def acquire(self, host: str) -> float:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _TokenBucket(self.qps, self.burst)
+        waited = await bucket.acquire()
+        st = self.stats.get(host)
+        if st is None:
+            st = self.stats[host] = HostWaitStats(bucket_counts=[0] * len(self.WAIT_BUCKETS))
+        st.count += 1
+        st.total_s += waited
+        for i, le in enumerate(self.WAIT_BUCKETS):
+            if waited <= le:
+                st.bucket_counts[i] += 1
+        return waited
+
+    def queue_depth(self, host: str) -> int:
+        bucket = self._buckets.get(host)
+        return bucket.waiting if bucket is not None else 0
+
+# ----
+# JSON decoding
+# ----
+
+@dataclass
+class DecodeStats:
+    """Cumulative histogram of JSON decode time per 2xx response."""
+    bucket_counts: List[int]
+    count: int = 0
+    total_s: float = 0.0
+    bytes: int = 0
+    fallbacks: int = 0     # rejected by the strict decoder, recovered by the lenient one
+    failures: int = 0      # undecodable even leniently (retried as an HTTP error)
+
+    BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+
+    def observe(self, seconds: float, size: int) -> None:
+        self.count += 1
+        self.total_s += seconds
+        self.bytes += size
+        for i, le in enumerate(self.BUCKETS):
+            if seconds <= le:
+                self.bucket_counts[i] += 1
+
+KeepSpec = Union[Tuple[str, ...], Mapping[str, Any]]
+
+def loads_json(body: bytes) -> Any:
+    """Strict decode of raw response bytes. Raises ValueError on bad input."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)  # bytes in: stdlib detects UTF-8/16/32 without a str round trip
+
+def loads_json_lenient(body: bytes, charset: Optional[str] = None) -> Any:
+    """
+    Second chance for BMC/PDU firmware oddities: non-UTF-8 charsets, a BOM,
+    trailing NULs/whitespace, raw control characters inside strings.
+    """
+    try:
+        text = body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        # Unknown charset in the Content-Type header
+        text = body.decode("utf-8", errors="replace")
+    text = text.lstrip("\ufeff").strip("\x00 \t\r\n")
+    return json.loads(text, strict=False)
+
+def project_fields(data: Any, spec: KeepSpec) -> Any:
+    """
+    Keep only the fields named by spec:
+        ("A", "B")              -> top-level keys A and B
+        {"Members": ("Id",)}    -> Members, with each element trimmed to Id
+        {"Status": None}        -> Status, untouched
+    Lists are projected element-wise; non-dict values pass through.
+    """
+    if isinstance(data, list):
+        return [project_fields(x, spec) for x in data]
+    if not isinstance(data, dict):
+        return data
+    if not isinstance(spec, Mapping):
+        return {k: data[k] for k in spec if k in data}
+    out = {}
+    for k, sub in spec.items():
+        if k in data:
+            out[k] = data[k] if sub is None else project_fields(data[k], sub)
+    return out
+
+# ----
+# Field projection
+# ----
+
+def _as_float(v: Any) -> Optional[float]:
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return float(v)
+        except ValueError:
+            return None
+    return None
+
+# type -> value or None
+_COERCE: Dict[str, Callable[[Any], Any]] = {
+    "str": lambda v: v if isinstance(v, str) else None,
+    "int": lambda v: v if isinstance(v, int) and not isinstance(v, bool) else None,
+    "bool": lambda v: v if isinstance(v, bool) else None,
+    "float": _as_float,
+    "any": lambda v: v,
+}
+
+class Field:
+    """
+    One output field of a Projection. paths are "/"-separated JSON paths tried in
+    order; the first one whose value has the right type wins, else None.
+        Field("watts", "PowerWatts/Reading", "PowerReading", type="float")
+    Numeric segments also index into lists ("Members/0/Id").
+    """
+    __slots__ = ("name", "paths", "type")
+
+    def __init__(self, name: str, *paths: str, type: str = "str"):
+        if not paths:
+            raise ValueError(f"Field {name!r} needs at least one path")
+        if type not in _COERCE:
+            raise ValueError(f"Field {name!r}: unknown type {type!r}")
+        self.name = name
+        self.paths = paths
+        self.type = type
+
+PathKeys = Tuple[Tuple[str, Optional[int]], ...]
+
+def _path_keys(path: str) -> PathKeys:
+    """Split a path once: (dict key, list index or None) per segment."""
+    return tuple((k, int(k) if k.isdigit() else None) for k in path.split("/"))
+
+def _lookup(doc: Any, keys: PathKeys) -> Any:
+    for key, index in keys:
+        if isinstance(doc, dict):
+            doc = doc.get(key)
+        elif isinstance(doc, list) and index is not None:
+            doc = doc[index] if index < len(doc) else None
+        else:
+            return None
+    return doc
+
+class Projection:
+    """
+    Declarative extraction spec; paths are split into keys once, at definition.
+        LEAK = Projection(Field("health", "Status/Health"), ...)
+        LEAK.extract(doc)  -> {"health": ..., ...}
+        LEAK.many(docs)    -> [{...}, ...]
+        LEAK.keep          -> top-level keys, for _get_json_with_retries(keep=...)
+    Missing paths and wrong types yield None; extraction never raises.
+    """
+    def __init__(self, *fields: Field):
+        names = [f.name for f in fields]
+        if len(set(names)) != len(names):
+            raise ValueError(f"duplicate field names in projection: {names}")
+        self.fields = fields
+        self._plan: Tuple[Tuple[str, Callable[[Any], Any], Tuple[PathKeys, ...]], ...] = tuple(
+            (f.name, _COERCE[f.type], tuple(_path_keys(p) for p in f.paths)) for f in fields
+        )
+        self.keep: Tuple[str, ...] = tuple(dict.fromkeys(p.split("/", 1)[0] for f in fields for p in f.paths))
+
+    def extract(self, doc: Any) -> Dict[str, Any]:
+        if not isinstance(doc, dict):
+            return {name: None for name, _, _ in self._plan}
+        out: Dict[str, Any] = {}
+        for name, coerce, paths in self._plan:
+            value = None
+            for keys in paths:
+                value = coerce(_lookup(doc, keys))
+                if value is not None:
+                    break
+            out[name] = value
+        return out
+
+    def many(self, docs: Iterable[Any]) -> List[Dict[str, Any]]:
+        extract = self.extract
+        return [extract(d) for d in docs]
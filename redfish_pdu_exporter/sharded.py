@@ -0,0 +1,275 @@
+"""
+Sharded exporter mode (sharding.shards > 1 in config.yaml).
+
+The front process spawns one worker process per shard. Each worker runs the normal
+Collector + HttpApp over its rendezvous-hash slice of cfg.targets (see shard_of),
+listening on 127.0.0.1:(sharding.port_base + i). TLS, JSON parsing and rendering
+therefore spread over N cores.
+
+The front serves /metrics from a merged snapshot of the workers' payloads. Per-PDU
+series are unique to one shard; per-process series (no "ip" label, e.g.
+pdu_requests_in_flight) get a shard="i" label so they don't collide.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import multiprocessing as mp
+import os
+import signal
+import sys
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from prometheus_client import CollectorRegistry, Gauge, Histogram, generate_latest
+
+from exporter import (
+    AppConfig,
+    HttpApp,
+    MetricsSnapshot,
+    _Payload,
+    _wait_for_stop,
+    load_config,
+    serve,
+    shard_targets,
+)
+
+# ----
+# Front metrics (kept apart from the collector registry, which is empty in the front)
+# ----
+
+FRONT_REGISTRY = CollectorRegistry()
+
+SHARD_UP = Gauge(
+    "pdu_exporter_shard_up",
+    "Whether the front could fetch this shard's /metrics on the last merge",
+    ["shard"],
+    registry=FRONT_REGISTRY,
+)
+
+SHARD_RESTARTS = Gauge(
+    "pdu_exporter_shard_restarts",
+    "Times the front restarted this shard's worker process",
+    ["shard"],
+    registry=FRONT_REGISTRY,
+)
+
+MERGE_LAT = Histogram(
+    "pdu_exporter_merge_seconds",
+    "Time to fetch and merge all shard payloads",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    registry=FRONT_REGISTRY,
+)
+
+# ----
+# Worker process
+# ----
+
+def shard_main(config_path: str, index: int, count: int) -> None:
+    try:
+        asyncio.run(_shard_amain(config_path, index, count))
+    except KeyboardInterrupt:
+        pass
+
+async def _shard_amain(config_path: str, index: int, count: int) -> None:
+    cfg = load_config(config_path)
+    cfg = replace(
+        cfg,
+        targets=shard_targets(cfg.targets, index, count),
+        http_host="127.0.0.1",
+        http_port=cfg.shard_port_base + index,
+        # The global limits are fleet-wide; each shard gets its share
+        max_concurrency=max(1, cfg.max_concurrency // count),
+        pool_limit=max(1, cfg.pool_limit // count),
+        scheduler_workers=max(1, cfg.scheduler_workers // count),
+    )
+    print(f"[SUCCESS] Shard {index}/{count}: {len(cfg.targets)} targets on port {cfg.http_port}")
+    await serve(config_path, cfg, shard=(index, count))
+
+# ----
+# Front process
+# ----
+
+class ShardSupervisor:
+    """Spawns, watches and restarts the shard worker processes."""
+    def __init__(self, config_path: str, cfg: AppConfig):
+        self.config_path = config_path
+        self.count = cfg.shards
+        self._ctx = mp.get_context("spawn")
+        self.procs: List[Optional[mp.Process]] = [None] * self.count
+        self.restarts = [0] * self.count
+        self.ready = [False] * self.count
+
+    def start(self) -> None:
+        for i in range(self.count):
+            self._spawn(i)
+
+    def _spawn(self, i: int) -> None:
+        p = self._ctx.Process(
+            target=shard_main,
+            args=(self.config_path, i, self.count),
+            name=f"pdu-exporter-shard-{i}",
+            daemon=True,
+        )
+        p.start()
+        self.procs[i] = p
+
+    async def monitor(self, interval: float = 2.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            for i, p in enumerate(self.procs):
+                if p is not None and not p.is_alive():
+                    print(f"[WARN] Shard {i} exited with {p.exitcode}, restarting", file=sys.stderr)
+                    self.ready[i] = False
+                    self.restarts[i] += 1
+                    SHARD_RESTARTS.labels(str(i)).set(self.restarts[i])
+                    self._spawn(i)
+
+    def reload(self) -> None:
+        for p in self.procs:
+            if p is not None and p.is_alive() and hasattr(signal, "SIGHUP"):
+                os.kill(p.pid, signal.SIGHUP)
+
+    def stop(self) -> None:
+        for p in self.procs:
+            if p is not None and p.is_alive():
+                p.terminate()
+        for p in self.procs:
+            if p is not None:
+                p.join(timeout=5)
+
+    # Exposed to the HTTP layer (duck-types Collector.is_ready)
+    def is_ready(self) -> bool:
+        return all(self.ready)
+
+class ShardedSnapshot(MetricsSnapshot):
+    """
+    Text-format snapshot merged from the shard workers. Each refresh revalidates
+    every shard with If-None-Match and only re-merges when a shard changed.
+    """
+    CONTENT_TYPES = {"text": MetricsSnapshot.CONTENT_TYPES["text"]}
+
+    def __init__(self, supervisor: ShardSupervisor, port_base: int):
+        super().__init__(FRONT_REGISTRY)
+        self.supervisor = supervisor
+        self.urls = [f"http://127.0.0.1:{port_base + i}" for i in range(supervisor.count)]
+        self._shard_etag: List[str] = [""] * supervisor.count
+        self._shard_text: List[str] = [""] * supervisor.count
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def get(self, fmt: str) -> _Payload:
+        if "text" not in self.payloads:
+            await self.refresh(force=True)
+        return self.payloads["text"]
+
+    async def refresh(self, force: bool = False) -> None:
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+            t0 = time.perf_counter()
+            changed = await asyncio.gather(*(self._fetch(i) for i in range(len(self.urls))))
+            if any(changed) or force or "text" not in self.payloads:
+                loop = asyncio.get_running_loop()
+                self.payloads = {"text": await loop.run_in_executor(None, self._merge_payload)}
+            MERGE_LAT.observe(time.perf_counter() - t0)
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _fetch(self, i: int) -> bool:
+        """Fetch shard i's payload and readiness. Returns True if its payload changed."""
+        assert self._session is not None
+        base = self.urls[i]
+        headers = {"Accept": "text/plain", "Accept-Encoding": "gzip"}
+        if self._shard_etag[i]:
+            headers["If-None-Match"] = self._shard_etag[i]
+        try:
+            async with self._session.get(f"{base}/-/ready") as resp:
+                self.supervisor.ready[i] = resp.status == 200
+            async with self._session.get(f"{base}/metrics", headers=headers) as resp:
+                if resp.status == 304:
+                    SHARD_UP.labels(str(i)).set(1)
+                    return False
+                resp.raise_for_status()
+                text = await resp.text()
+                self._shard_etag[i] = resp.headers.get("ETag", "")
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            SHARD_UP.labels(str(i)).set(0)
+            self.supervisor.ready[i] = False
+            changed = bool(self._shard_text[i])
+            self._shard_text[i] = ""
+            self._shard_etag[i] = ""
+            return changed
+        SHARD_UP.labels(str(i)).set(1)
+        self._shard_text[i] = text
+        return True
+
+    def _merge_payload(self) -> _Payload:
+        merged = merge_expositions(list(enumerate(self._shard_text)))
+        body = merged.encode() + generate_latest(FRONT_REGISTRY)
+        body_gz = gzip.compress(body, 6) if self.gzip_enabled else None
+        etag = '"text-%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+        return _Payload(body=body, body_gz=body_gz, etag=etag)
+
+def merge_expositions(payloads: List[Tuple[int, str]]) -> str:
+    """
+    Merge Prometheus text expositions from several shards into one, emitting each
+    family's HELP/TYPE once. Samples without an ip label get shard="i" added.
+    """
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, List[str]] = {}
+    order: List[str] = []
+    for shard, text in payloads:
+        cur: Optional[str] = None
+        shard_label = f'shard="{shard}"'
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("# HELP "):
+                cur = line.split(" ", 3)[2]
+                if cur not in headers:
+                    headers[cur] = [line]
+                    samples[cur] = []
+                    order.append(cur)
+                continue
+            if line.startswith("# TYPE "):
+                if cur is not None and len(headers[cur]) == 1:
+                    headers[cur].append(line)
+                continue
+            if line.startswith("#") or cur is None:
+                continue
+            brace = line.find("{")
+            space = line.find(" ")
+            if brace != -1 and brace < space:
+                if '{ip="' not in line and ',ip="' not in line:
+                    line = f"{line[:brace + 1]}{shard_label},{line[brace + 1:]}"
+            else:
+                line = f"{line[:space]}{{{shard_label}}}{line[space:]}"
+            samples[cur].append(line)
+    out: List[str] = []
+    for name in order:
+        out.extend(headers[name])
+        out.extend(samples[name])
+    out.append("")
+    return "\n".join(out)
+
+async def run_front(config_path: str, cfg: AppConfig) -> None:
+    sup = ShardSupervisor(config_path, cfg)
+    sup.start()
+    print(f"[SUCCESS] Started {cfg.shards} shard workers (ports {cfg.shard_port_base}..{cfg.shard_port_base + cfg.shards - 1})")
+
+    snap = ShardedSnapshot(sup, cfg.shard_port_base)
+    http = HttpApp(cfg, sup, snapshot=snap)
+    await http.start()
+    monitor_task = asyncio.create_task(sup.monitor(), name="shard-monitor")
+
+    await _wait_for_stop(sup.reload)
+
+    monitor_task.cancel()
+    await http.stop()
+    await snap.close()
+    sup.stop()
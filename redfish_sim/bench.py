@@ -0,0 +1,221 @@
+"""
+Benchmark suite for the Redfish tools against the local simulator.
+
+Starts simulator.py in the background, writes a fleet inventory, then runs each
+scenario in a fresh process (so peak RSS is per scenario) and reports sweep
+duration, requests/s, p50/p99 request latency and peak RSS.
+
+Scenarios:
+    exporter  - redfish_pdu_exporter Collector, back-to-back full sweeps
+    ttt       - cluster_check/cluster_ttt.sweep over the BMC fleet
+
+Usage:
+    python bench.py --fleet 2000 --latency-ms 5 --jitter-ms 10 --tls
+    python bench.py --suite ttt --fleet 500 --json baseline.json
+    python bench.py --suite ttt --fleet 50000 --sweeps 1 --checks liquid_leak
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import simulator
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORTER_DIR = os.path.join(REPO, "redfish_pdu_exporter")
+CLUSTER_CHECK_DIR = os.path.join(REPO, "cluster_check")
+
+# ----
+# Measurement helpers
+# ----
+
+def _instrument(client_cls, latencies: List[float]) -> None:
+    """Time every logical GET (including retries and limiter/semaphore waits)."""
+    orig = client_cls._get_json_with_retries
+
+    async def timed(self, url, **kw):
+        t0 = time.perf_counter()
+        try:
+            return await orig(self, url, **kw)
+        finally:
+            latencies.append(time.perf_counter() - t0)
+
+    client_cls._get_json_with_retries = timed
+
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(p / 100.0 * len(s)))]
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss survives the fork+exec behind spawn, so it would report the parent's
+    # peak (e.g. writing a 50k-host inventory); VmHWM is reset by exec.
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+
+async def _sample_tasks(peak: List[int], interval: float = 0.05) -> None:
+    """Track the peak number of live asyncio tasks (excluding this sampler)."""
+    while True:
+        peak[0] = max(peak[0], len(asyncio.all_tasks()) - 1)
+        await asyncio.sleep(interval)
+
+def _summary(durations: List[float], latencies: List[float], peak_tasks: int = 0) -> Dict[str, Any]:
+    total = sum(durations)
+    return {
+        "sweeps": len(durations),
+        "sweep_s_mean": total / max(len(durations), 1),
+        "sweep_s_max": max(durations) if durations else 0.0,
+        "requests": len(latencies),
+        "req_per_s": len(latencies) / total if total else 0.0,
+        "p50_ms": _pct(latencies, 50) * 1000,
+        "p99_ms": _pct(latencies, 99) * 1000,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_tasks": peak_tasks,
+    }
+
+# ----
+# Scenarios (each runs in its own process)
+# ----
+
+def bench_exporter(args: Dict[str, Any]) -> Dict[str, Any]:
+    sys.path.insert(0, EXPORTER_DIR)
+    import exporter
+    import redfish_client
+
+    latencies: List[float] = []
+    _instrument(redfish_client.RedfishClient, latencies)
+
+    async def run() -> List[float]:
+        cfg = exporter.load_config(args["pdu_config"])
+        col = exporter.Collector(cfg)
+        await col._open()
+        durations = []
+        for cycle in range(args["sweeps"]):
+            t0 = time.perf_counter()
+            await col._one_sweep(cycle)
+            durations.append(time.perf_counter() - t0)
+        await col.stop()
+        return durations
+
+    return _summary(asyncio.run(run()), latencies)
+
+def bench_ttt(args: Dict[str, Any]) -> Dict[str, Any]:
+    sys.path.insert(0, CLUSTER_CHECK_DIR)
+    import cluster_ttt
+    import redfish_ttt
+
+    latencies: List[float] = []
+    _instrument(redfish_ttt.RedfishClient, latencies)
+    out = os.path.join(args["workdir"], "ttt.jsonl")
+    peak = [0]
+
+    async def run() -> List[float]:
+        sampler = asyncio.create_task(_sample_tasks(peak))
+        durations = []
+        for _ in range(args["sweeps"]):
+            t0 = time.perf_counter()
+            await cluster_ttt.sweep(
+                args["ipmi"], "tus1-p", "tus1-pdu", out,
+                max_concurrency=args["concurrency"], scheme=args["scheme"], checks=args["checks"],
+                inventory_cache=None,
+            )
+            durations.append(time.perf_counter() - t0)
+        sampler.cancel()
+        return durations
+
+    return _summary(asyncio.run(run()), latencies, peak[0])
+
+SCENARIOS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "exporter": bench_exporter,
+    "ttt": bench_ttt,
+}
+
+# ----
+# Driver
+# ----
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Redfish tools benchmark (simulator-backed)")
+    ap.add_argument("--suite", default=",".join(SCENARIOS), help=f"Comma list of: {', '.join(SCENARIOS)}")
+    ap.add_argument("--fleet", type=int, default=1000, help="Simulated hosts (PDUs for exporter, BMCs for ttt)")
+    ap.add_argument("--sweeps", type=int, default=3)
+    ap.add_argument("--concurrency", type=int, default=400)
+    ap.add_argument("--port", type=int, default=18443)
+    ap.add_argument("--sim-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--dimm-fill", type=float, default=1.0)
+    ap.add_argument("--nvme-fill", type=float, default=1.0)
+    ap.add_argument("--tls", action="store_true")
+    ap.add_argument("--checks", default=None, help="ttt: comma list of checks (default: all enabled)")
+    ap.add_argument("--json", help="Also write results to this JSON file")
+    return ap.parse_args()
+
+def main():
+    a = parse_args()
+    names = [n.strip() for n in a.suite.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        sys.exit(f"unknown scenario(s): {', '.join(unknown)}")
+
+    sim_cfg = simulator.SimConfig(
+        port=a.port, procs=a.sim_procs, latency_ms=a.latency_ms, jitter_ms=a.jitter_ms,
+        error_rate=a.error_rate, tls=a.tls, dimm_fill=a.dimm_fill, nvme_fill=a.nvme_fill,
+    )
+    scheme = "https" if a.tls else "http"
+    workdir = tempfile.mkdtemp(prefix="redfish-bench-")
+    ipmi = os.path.join(workdir, "ipmi.json")
+    pdu_config = os.path.join(workdir, "pdu_config.yaml")
+    simulator.write_ipmi_json(ipmi, a.fleet, a.port)
+    simulator.write_pdu_config(pdu_config, a.fleet, a.port, scheme, extra={
+        "max_concurrency": a.concurrency,
+        "scheduler": {"mode": "sweep"},
+        "reload": {"watch": False},
+    })
+    args = {
+        "ipmi": ipmi, "pdu_config": pdu_config, "workdir": workdir, "sweeps": a.sweeps,
+        "concurrency": a.concurrency, "scheme": scheme,
+        "checks": a.checks.split(",") if a.checks else None,
+    }
+
+    procs = simulator.start_in_background(sim_cfg)
+    ctx = mp.get_context("spawn")
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        asyncio.run(simulator.wait_until_up(a.port, a.tls))
+        for name in names:
+            with ctx.Pool(1) as pool:
+                results[name] = pool.apply(SCENARIOS[name], (args,))
+    finally:
+        for p in procs:
+            p.terminate()
+
+    print(f"\nfleet={a.fleet} concurrency={a.concurrency} latency={a.latency_ms}+{a.jitter_ms}ms "
+          f"errors={a.error_rate:.1%} tls={a.tls}")
+    print(f"{'scenario':<10} {'sweep s':>8} {'max s':>7} {'reqs':>8} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'RSS MB':>7} {'tasks':>7}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['sweep_s_mean']:>8.2f} {r['sweep_s_max']:>7.2f} {r['requests']:>8} "
+              f"{r['req_per_s']:>8.0f} {r['p50_ms']:>7.1f} {r['p99_ms']:>7.1f} {r['peak_rss_mb']:>7.1f} "
+              f"{r['peak_tasks'] or '-':>7}")
+    if a.json:
+        with open(a.json, "w") as fh:
+            json.dump({"args": vars(a), "results": results}, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Bash cluster checks vs cluster_check/cluster_csv.py against the local simulator.
+
+Runs each bash script the way operators do (from a directory holding
+./redfishcmd, ./query_power.sh and ipmi.json) and then the matching
+cluster_csv.py subcommand, and reports wall time and whether the CSV rows agree.
+./redfishcmd is a curl shim that looks the BMC up in the inventory index, and a
+no-op ping is put on PATH for query_power.sh (simulator hosts carry a port).
+
+Usage:
+    python bench_cluster_csv.py --fleet 200 --fault-rate 0.1
+    python bench_cluster_csv.py --fleet 1000 --checks leak,psu --latency-ms 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Set, Tuple
+
+import simulator
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASH_DIR = os.path.join(REPO, "bash-scripts")
+CLUSTER_CSV = os.path.join(REPO, "cluster_check", "cluster_csv.py")
+INVENTORY = os.path.join(REPO, "cluster_check", "inventory.py")
+
+# check -> (bash script, takes LOG_DIR DATASTORE args, outfile)
+CHECKS: Dict[str, Tuple[str, bool, str]] = {
+    "leak": ("query_cluster_liquid_leak_check.sh", True, "cluster_liquid_leaks.csv"),
+    "nvme": ("query_cluster_nvme_check.sh", True, "cluster_failed_nvme.csv"),
+    "m2": ("query_cluster_m2_check.sh", True, "cluster_failed_m2.csv"),
+    "psu": ("cluster_offline_psu_check.sh", False, "cluster_offline_psus.csv"),
+}
+
+REDFISHCMD = """#!/bin/bash
+# redfishcmd NAME PATH -- benchmark shim: BMC address/credentials from the inventory, then curl
+IFS=$'\\t' read -r IP USER PASS < <("$INVENTORY" --ipmi ipmi.json get "$1" --fields ip,username,password) || exit 1
+exec curl -s -k -m 10 -u "$USER:$PASS" "{scheme}://$IP$2"
+"""
+
+# ----
+# Helpers
+# ----
+
+def _write_exec(path: str, body: str) -> None:
+    with open(path, "w") as fh:
+        fh.write(body)
+    os.chmod(path, 0o755)
+
+def _rows(path: str) -> Set[str]:
+    try:
+        with open(path) as fh:
+            return {line.rstrip("\n") for line in list(fh)[1:] if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+def _run(cmd: List[str], cwd: str, env: Dict[str, str]) -> float:
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - t0
+
+def setup_workdir(fleet: int, port: int, scheme: str) -> str:
+    workdir = tempfile.mkdtemp(prefix="cluster-csv-bench-")
+    simulator.write_ipmi_json(os.path.join(workdir, "ipmi.json"), fleet, port)
+    _write_exec(os.path.join(workdir, "redfishcmd"), REDFISHCMD.replace("{scheme}", scheme))
+    shutil.copy(os.path.join(BASH_DIR, "query_power.sh"), workdir)
+    os.chmod(os.path.join(workdir, "query_power.sh"), 0o755)
+    os.makedirs(os.path.join(workdir, "bin"))
+    _write_exec(os.path.join(workdir, "bin", "ping"), "#!/bin/sh\nexit 0\n")
+    for d in ("bash", "python"):
+        os.makedirs(os.path.join(workdir, d))
+    return workdir
+
+def bench_check(name: str, workdir: str, scheme: str, concurrency: int) -> Dict[str, object]:
+    script, takes_args, outfile = CHECKS[name]
+    env = dict(os.environ, INVENTORY=INVENTORY, PATH=f"{os.path.join(workdir, 'bin')}:{os.environ['PATH']}")
+
+    bash_dir = os.path.join(workdir, "bash")
+    cmd = ["bash", os.path.join(BASH_DIR, script)] + ([bash_dir, "ipmi.json"] if takes_args else [])
+    bash_s = _run(cmd, workdir, env)
+    # The PSU script has no LOG_DIR and writes into its working directory
+    bash_csv = os.path.join(bash_dir if takes_args else workdir, outfile)
+
+    py_dir = os.path.join(workdir, "python")
+    cmd = [sys.executable, CLUSTER_CSV, name, py_dir, "ipmi.json",
+           "--scheme", scheme, "--concurrency", str(concurrency)]
+    py_s = _run(cmd, workdir, env)
+
+    bash_rows, py_rows = _rows(bash_csv), _rows(os.path.join(py_dir, outfile))
+    return {
+        "bash_s": bash_s, "python_s": py_s,
+        "bash_rows": len(bash_rows), "python_rows": len(py_rows),
+        "only_bash": sorted(bash_rows - py_rows), "only_python": sorted(py_rows - bash_rows),
+    }
+
+# ----
+# Driver
+# ----
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Bash cluster checks vs cluster_csv.py (simulator-backed)")
+    ap.add_argument("--checks", default=",".join(CHECKS), help=f"Comma list of: {', '.join(CHECKS)}")
+    ap.add_argument("--fleet", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=400)
+    ap.add_argument("--port", type=int, default=18443)
+    ap.add_argument("--sim-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    ap.add_argument("--fault-rate", type=float, default=0.1, help="Share of hosts with leaks / bad drives / dead PSUs")
+    ap.add_argument("--tls", action="store_true")
+    ap.add_argument("--show", type=int, default=3, help="Mismatched rows to print per side")
+    return ap.parse_args()
+
+def main():
+    a = parse_args()
+    names = [n.strip() for n in a.checks.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CHECKS]
+    if unknown:
+        sys.exit(f"unknown check(s): {', '.join(unknown)}")
+    for tool in ("curl", "jq", "flock"):
+        if shutil.which(tool) is None:
+            sys.exit(f"[FATAL] {tool} is required by the bash scripts")
+
+    scheme = "https" if a.tls else "http"
+    workdir = setup_workdir(a.fleet, a.port, scheme)
+    sim_cfg = simulator.SimConfig(
+        port=a.port, procs=a.sim_procs, latency_ms=a.latency_ms, tls=a.tls, fault_rate=a.fault_rate,
+    )
+    procs = simulator.start_in_background(sim_cfg)
+    results = {}
+    try:
+        asyncio.run(simulator.wait_until_up(a.port, a.tls))
+        for name in names:
+            results[name] = bench_check(name, workdir, scheme, a.concurrency)
+    finally:
+        for p in procs:
+            p.terminate()
+
+    print(f"\nfleet={a.fleet} latency={a.latency_ms}ms fault_rate={a.fault_rate:.0%} tls={a.tls} workdir={workdir}")
+    print(f"{'check':<6} {'bash s':>8} {'python s':>9} {'speedup':>8} {'bash rows':>10} {'py rows':>8} {'mismatch':>9}")
+    for name, r in results.items():
+        mismatch = len(r["only_bash"]) + len(r["only_python"])
+        speedup = r["bash_s"] / r["python_s"] if r["python_s"] else 0.0
+        print(f"{name:<6} {r['bash_s']:>8.2f} {r['python_s']:>9.2f} {speedup:>7.1f}x "
+              f"{r['bash_rows']:>10} {r['python_rows']:>8} {mismatch:>9}")
+    for name, r in results.items():
+        for side in ("only_bash", "only_python"):
+            for row in r[side][:a.show]:
+                print(f"  {name} {side}: {row}")
+
+if __name__ == "__main__":
+    main()
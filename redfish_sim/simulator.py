@@ -0,0 +1,666 @@
+"""
+Local Redfish PDU/BMC simulator for benchmarking without hardware.
+
+One aiohttp server answers for a whole fleet: every loopback address (127.x.y.z)
+on the chosen port is a distinct simulated host, and per-host state (populated
+DIMM/NVMe slots, outlet wattage) is derived from a hash of the Host header, so
+it is stable across requests and processes.
+
+Endpoints served (the ones redfish_pdu_exporter and cluster_check use):
+    /redfish/v1/PowerEquipment/RackPDUs/1/Outlets                (supports $expand)
+    /redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{n}
+    POST .../Outlets/OUTLET{n}/Actions/Outlet.PowerControl       ({"PowerState": "On"|"Off"})
+    /redfish/v1/Chassis/1/Sensors/LiquidLeak
+    /redfish/v1/Chassis/1/Power                                  (PowerSupplies[]: LineInputVoltage, PowerInputWatts)
+    /redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives/Disk.Bay.{n}
+    /redfish/v1/Chassis/1/PCIeDevices/NVMeSSD{n}
+    /redfish/v1/Systems/1/Memory/{n}[/MemoryMetrics]
+    /redfish/v1/Systems/1/Memory                                 (Members: every slot, empty ones Status.State Absent)
+    /redfish/v1/Chassis/1/PCIeDevices,
+    /redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives      (Members: populated slots only)
+    /redfish/v1/Chassis/1/PCIeDevices/{GPU,NIC}{n}
+    /redfish/v1/Systems/1/Processors[/{n}], /redfish/v1/Systems/1/EthernetInterfaces[/{n}]
+    (Memory, PCIeDevices, Processors and EthernetInterfaces support $expand)
+    /redfish/v1/UpdateService/FirmwareInventory/{BIOS,bundle_active}, /redfish/v1/Managers/1,
+    /redfish/v1/Systems/1/Bios                                   (query_firmware.sh)
+    /redfish/v1/Chassis/1/NetworkAdapters/{slot}/Ports[/{n}]
+    /redfish/v1/Chassis/1/PCIeDevices/NIC{n}/PCIeFunctions/1, /redfish/v1/Systems/1/EthernetInterfaces/NIC{n}
+
+JSON responses carry a content-hash ETag and honour If-None-Match with 304.
+
+Switched-off outlets cut power to the PSUs that write_pdu_list/write_ipmi_json
+wire to them (PSU and outlet meters follow after power_settle_s). Outlet state
+lives in the serving process, so power-cycle runs need procs=1.
+
+Usage:
+    python simulator.py --port 18443 --procs 4 --latency-ms 20 --jitter-ms 30 --error-rate 0.01 --tls
+    python simulator.py --write-inventory --fleet 5000 --port 18443   # ipmi.json + pdu_list.json + pdu_config.yaml
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+from aiohttp import web
+
+# ----
+# Config
+# ----
+
+@dataclass(frozen=True)
+class SimConfig:
+    host: str = "0.0.0.0"
+    port: int = 18443
+    procs: int = 1                 # server processes sharing the port (SO_REUSEPORT)
+    latency_ms: float = 0.0        # fixed per-request service time
+    jitter_ms: float = 0.0         # + uniform(0, jitter) on top
+    error_rate: float = 0.0        # fraction of requests answered 503
+    tls: bool = False
+    cert: Optional[str] = None     # PEM cert/key; generated with openssl if tls and not given
+    key: Optional[str] = None
+    expand: bool = True            # honour $expand on the Outlets collection
+    outlets: int = 48              # outlets per simulated PDU
+    dimm_slots: int = 24
+    dimm_fill: float = 1.0         # fraction of DIMM slots populated (per host, deterministic)
+    nvme_slots: int = 4
+    nvme_fill: float = 1.0
+    m2_bays: int = 2
+    gpus: int = 8
+    nics: int = 4                  # PCIe NIC1..n (the bash check probes NIC1..11)
+    cpus: int = 2
+    eth_interfaces: int = 2
+    etag: bool = True              # ETag on JSON responses, 304 for a matching If-None-Match
+    power_settle_s: float = 1.0    # outlet switch -> PSU/outlet meters reflect it
+    # Fraction of hosts with each fault: leak, bad NVMe/GPU/CPU, M.2 errors, NIC link/port down,
+    # dead/sagging/hogging PSU, PSUs 1/2 cabled to each other's PDU, old BIOS/NIC firmware, SMT enabled
+    fault_rate: float = 0.0
+
+# ----
+# Per-host deterministic state
+# ----
+
+def _h(*parts: Any) -> int:
+    return zlib.crc32("|".join(str(p) for p in parts).encode())
+
+def _populated(host: str, kind: str, slot: int, fill: float) -> bool:
+    return (_h(host, kind, slot) % 1000) < fill * 1000
+
+def _faulty(host: str, kind: str, rate: float) -> bool:
+    return rate > 0 and (_h(host, "fault", kind) % 10000) < rate * 10000
+
+def _host_key(request: web.Request) -> str:
+    return request.host.rsplit(":", 1)[0] if request.host else "unknown"
+
+def _host_index(host: str) -> Optional[int]:
+    """Position of a fleet_hosts address in its list."""
+    try:
+        _, _, a, b = host.split(".")
+        return int(a) * 250 + int(b) - 1
+    except ValueError:
+        return None
+
+def _feed(host: str) -> Optional[str]:
+    """Rack and PDU bank ("L1/L2/R1/R2" vs "L3/L4/R3/R4") of a write_ipmi_json host, from its address."""
+    i = _host_index(host)
+    if i is None:
+        return None
+    return f"{i // 8:03d}|{i % 8 % 2}"
+
+PDU_POSITIONS = ("L1", "L2", "L3", "L4", "R1", "R2", "R3", "R4")   # write_pdu_list order within a rack
+RU_OUTLETS = {33: (38, 40), 29: (32, 34), 25: (26, 28), 21: (22, 24), 17: (18, 20), 13: (14, 16), 9: (10, 12), 5: (6, 8)}
+
+def _pdu_host(rack: int, position: str) -> str:
+    j = rack * len(PDU_POSITIONS) + PDU_POSITIONS.index(position)
+    return f"127.3.{j // 250}.{j % 250 + 1}"
+
+def _psu_outlets(host: str) -> Optional[List[Tuple[str, Tuple[int, ...]]]]:
+    """(PDU host, outlets) feeding PSU bays 1-4 of a write_ipmi_json server, as server_pdu_power_cycle.sh wires them."""
+    i = _host_index(host)
+    if i is None:
+        return None
+    rack, slot = divmod(i, 8)
+    positions = ("L1", "L2", "R1", "R2") if slot % 2 == 0 else ("L3", "L4", "R3", "R4")
+    outlets = RU_OUTLETS[33 - 4 * slot]
+    return [(_pdu_host(rack, p), outlets) for p in positions]
+
+def _outlet(host: str, n: int, state: str = "On", powered: bool = True) -> Dict[str, Any]:
+    base = 150 + _h(host, "outlet", n) % 700
+    watts = round(base + random.uniform(-3, 3), 1) if powered else 0.0
+    volts = round(207.5 + random.uniform(0, 1.5), 1)
+    return {
+        "@odata.id": f"/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{n}",
+        "Id": f"OUTLET{n}",
+        "PowerState": state,
+        "PowerWatts": {"Reading": watts},
+        "Voltage": {"Reading": volts},
+        "CurrentAmps": {"Reading": round(watts / volts, 2)},
+        "EnergykWh": {"Reading": round(base * 8.76, 1)},
+    }
+
+# ----
+# App
+# ----
+
+def build_app(cfg: SimConfig) -> web.Application:
+    @web.middleware
+    async def inject(request: web.Request, handler):
+        delay = cfg.latency_ms + (random.uniform(0, cfg.jitter_ms) if cfg.jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            return web.Response(status=503, text="simulated failure")
+        resp = await handler(request)
+        if cfg.etag and resp.status == 200 and isinstance(resp.body, bytes):
+            etag = f'"{zlib.crc32(resp.body):08x}"'
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            resp.headers["ETag"] = etag
+        return resp
+
+    # (PDU host, outlet) -> (switched on, monotonic time of the switch); outlets start on
+    switched: Dict[Tuple[str, int], Tuple[bool, float]] = {}
+
+    def outlet_doc(host: str, n: int) -> Dict[str, Any]:
+        on, _ = switched.get((host, n), (True, 0.0))
+        return _outlet(host, n, "On" if on else "Off", powered(host, n))
+
+    def powered(host: str, n: int) -> bool:
+        """Whether the outlet is live, as the meters see it (a switch shows after power_settle_s)."""
+        on, at = switched.get((host, n), (True, 0.0))
+        return on if time.monotonic() - at >= cfg.power_settle_s else not on
+
+    async def outlets(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        if cfg.expand and "$expand" in request.query_string:
+            members = [outlet_doc(host, n) for n in range(1, cfg.outlets + 1)]
+        else:
+            members = [{"@odata.id": f"/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{n}"}
+                       for n in range(1, cfg.outlets + 1)]
+        return web.json_response({"Members@odata.count": len(members), "Members": members})
+
+    async def outlet(request: web.Request) -> web.Response:
+        n = int(request.match_info["n"])
+        if not 1 <= n <= cfg.outlets:
+            raise web.HTTPNotFound()
+        return web.json_response(outlet_doc(_host_key(request), n))
+
+    async def outlet_power_control(request: web.Request) -> web.Response:
+        n = int(request.match_info["n"])
+        if not 1 <= n <= cfg.outlets:
+            raise web.HTTPNotFound()
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest()
+        state = body.get("PowerState") if isinstance(body, dict) else None
+        if state not in ("On", "Off"):
+            raise web.HTTPBadRequest()
+        key = (_host_key(request), n)
+        if switched.get(key, (True, 0.0))[0] != (state == "On"):
+            switched[key] = (state == "On", time.monotonic())
+        return web.Response(status=204)
+
+    async def liquid_leak(request: web.Request) -> web.Response:
+        leak = _faulty(_host_key(request), "leak", cfg.fault_rate)
+        return web.json_response({
+            "Id": "LiquidLeak",
+            "Status": {"Health": "Critical" if leak else "OK", "State": "Enabled"},
+            "Oem": {"Supermicro": {"SensorValue": "Liquid leakage detected" if leak else "No Leak"}},
+        })
+
+    async def m2_drive(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        bay = int(request.match_info["n"])
+        if bay >= cfg.m2_bays:
+            raise web.HTTPNotFound()
+        errors = 3 if bay == 1 and _faulty(host, "m2", cfg.fault_rate) else 0
+        return web.json_response({
+            "Id": f"Disk.Bay.{bay}",
+            "SerialNumber": f"SIMM2{_h(host, 'm2sn', bay):08d}",
+            "Status": {"Health": "OK", "State": "Enabled"},
+            "Oem": {"Supermicro": {"OtherErrCount": 0, "SmartEventReceived": 0, "MediaErrCount": errors}},
+        })
+
+    async def power(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        dead = _h(host, "psu") % 4 if _faulty(host, "psu", cfg.fault_rate) else -1
+        sag = _h(host, "psusag") % 4 if _faulty(host, "psusag", cfg.fault_rate) else -1
+        hog = _h(host, "psuhog") % 4 if _faulty(host, "psuhog", cfg.fault_rate) else -1
+        feed = _feed(host)
+        volts, watts = [], []
+        for i in range(4):
+            v = 206 + _h(host, "psu", i) % 2
+            if i == sag:
+                v = 188 + _h(host, "psusag", i) % 6
+            elif feed is not None and _faulty(f"{feed}|{i}", "feedsag", cfg.fault_rate / 4):
+                v = 196                                  # every PSU on this PDU feed sags
+            volts.append(0 if i == dead else v)
+            watts.append(0 if i == dead else 900 + _h(host, "psuw", i) % 300)
+        if hog >= 0 and hog != dead:
+            # One PSU carries most of the load while its siblings idle
+            total = sum(watts)
+            live = [i for i in range(4) if i != dead]
+            watts = [0 if i == dead else 40 for i in range(4)]
+            watts[hog] = total - 40 * (len(live) - 1)
+        feeds = _psu_outlets(host)
+        if feeds is not None:
+            if _faulty(host, "miswire", cfg.fault_rate):
+                feeds[0], feeds[1] = feeds[1], feeds[0]
+            for i, (pdu, outlets_) in enumerate(feeds):
+                if not any(powered(pdu, o) for o in outlets_):
+                    volts[i], watts[i] = 0, 0
+        return web.json_response({
+            "Id": "Power",
+            "PowerSupplies": [
+                {
+                    "MemberId": str(i),
+                    "Name": f"Power Supply Bay {i + 1}",
+                    "LineInputVoltage": volts[i],
+                    "PowerInputWatts": watts[i],
+                    "Status": {"Health": "Critical" if i == dead else "OK", "State": "Enabled"},
+                }
+                for i in range(4)
+            ],
+        })
+
+    async def nvme(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        n = int(request.match_info["n"])
+        if not 1 <= n <= cfg.nvme_slots or not _populated(host, "nvme", n, cfg.nvme_fill):
+            raise web.HTTPNotFound()
+        return web.json_response(nvme_doc(host, n))
+
+    def dimm_doc(host: str, n: int) -> Dict[str, Any]:
+        present = _populated(host, "dimm", n, cfg.dimm_fill)
+        return {
+            "@odata.id": f"/redfish/v1/Systems/1/Memory/{n}",
+            "Id": str(n),
+            "Status": {"Health": "OK", "State": "Enabled"} if present else {"State": "Absent"},
+        }
+
+    async def memory_metrics(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        n = int(request.match_info["n"])
+        if not 1 <= n <= cfg.dimm_slots or not _populated(host, "dimm", n, cfg.dimm_fill):
+            raise web.HTTPNotFound()
+        return web.json_response({
+            "Id": "MemoryMetrics",
+            "HealthData": {"AlarmTrips": {
+                "Temperature": False,
+                "UncorrectableECCError": False,
+                "CorrectableECCError": False,
+            }},
+        })
+
+    def gpu_doc(host: str, n: int) -> Dict[str, Any]:
+        bad = n == 1 + _h(host, "gpubad") % cfg.gpus and _faulty(host, "gpu", cfg.fault_rate)
+        return {
+            "@odata.id": f"/redfish/v1/Chassis/1/PCIeDevices/GPU{n}",
+            "Id": f"GPU{n}",
+            "Model": "NVIDIA H100 80GB HBM3",
+            "SerialNumber": f"SIMGPU{_h(host, 'gpusn', n):010d}",
+            "FirmwareVersion": "96.00.99.00.01",
+            "Status": {"Health": "Critical" if bad else "OK", "State": "Enabled"},
+        }
+
+    def nic_slot(n: int) -> int:
+        """NIC{n} sits in System Slot 2n-1 (odd slots of the 11 query_firmware.sh reads)."""
+        return 2 * n - 1
+
+    def nic_doc(host: str, n: int) -> Dict[str, Any]:
+        return {
+            "@odata.id": f"/redfish/v1/Chassis/1/PCIeDevices/NIC{n}",
+            "Id": f"NIC{n}",
+            "Manufacturer": "Mellanox Technologies",
+            "Model": "ConnectX-7",
+            "SerialNumber": f"SIMNIC{_h(host, 'nicsn', n):010d}",
+            # Older firmware on a fault_rate share of hosts, for audits to find
+            "FirmwareVersion": "28.36.1010" if _faulty(host, "nicfw", cfg.fault_rate) else "28.39.1002",
+            "PCIeInterface": {"LanesInUse": 16},
+            "Slot": {"Location": {"PartLocation": {"ServiceLabel": f"System Slot {nic_slot(n)}"}}},
+            "PCIeFunctions": {"@odata.id": f"/redfish/v1/Chassis/1/PCIeDevices/NIC{n}/PCIeFunctions"},
+            "Status": {"Health": "OK", "State": "Enabled"},
+        }
+
+    def nvme_doc(host: str, n: int) -> Dict[str, Any]:
+        bad = n == 1 + _h(host, "nvmebad") % cfg.nvme_slots and _faulty(host, "nvme", cfg.fault_rate)
+        health = "Warning" if bad else "OK"
+        return {
+            "@odata.id": f"/redfish/v1/Chassis/1/PCIeDevices/NVMeSSD{n}",
+            "Id": f"NVMeSSD{n}",
+            "SerialNumber": f"SIM{_h(host, 'sn', n):010d}",
+            "Status": {"Health": health, "HealthRollup": health, "State": "Enabled"},
+        }
+
+    def cpu_doc(host: str, n: int) -> Dict[str, Any]:
+        bad = n == 1 + _h(host, "cpubad") % cfg.cpus and _faulty(host, "cpu", cfg.fault_rate)
+        return {
+            "@odata.id": f"/redfish/v1/Systems/1/Processors/{n}",
+            "Id": str(n),
+            "Socket": f"CPU{n}",
+            "ProcessorType": "CPU",
+            "Model": "Intel(R) Xeon(R) Platinum 8480+",
+            "TotalCores": 56,
+            "TotalThreads": 112,
+            "Status": {"Health": "Warning" if bad else "OK", "State": "Enabled"},
+        }
+
+    def eth_doc(host: str, n: int) -> Dict[str, Any]:
+        down = n == 1 + _h(host, "ethdown") % cfg.eth_interfaces and _faulty(host, "nic", cfg.fault_rate)
+        return {
+            "@odata.id": f"/redfish/v1/Systems/1/EthernetInterfaces/{n}",
+            "Id": str(n),
+            "MACAddress": ":".join(f"{b:02x}" for b in _h(host, "mac", n).to_bytes(4, "big")) + ":00:01",
+            "LinkStatus": "LinkDown" if down else "LinkUp",
+            "SpeedMbps": 0 if down else 25000,
+            "Status": {"Health": "Warning" if down else "OK", "State": "Enabled"},
+        }
+
+    def nic_function_doc(host: str, n: int) -> Dict[str, Any]:
+        return {
+            "@odata.id": f"/redfish/v1/Chassis/1/PCIeDevices/NIC{n}/PCIeFunctions/1",
+            "Id": "1",
+            "Links": {"EthernetInterfaces": [{"@odata.id": f"/redfish/v1/Systems/1/EthernetInterfaces/NIC{n}"}]},
+        }
+
+    def nic_eth_doc(host: str, n: int) -> Dict[str, Any]:
+        return {
+            "@odata.id": f"/redfish/v1/Systems/1/EthernetInterfaces/NIC{n}",
+            "Id": f"NIC{n}",
+            "MACAddress": ":".join(f"{b:02x}" for b in _h(host, "nicmac", n).to_bytes(4, "big")) + ":10:01",
+        }
+
+    async def adapter_ports(request: web.Request) -> web.Response:
+        slot = int(request.match_info["slot"])
+        if slot not in {nic_slot(n) for n in range(1, cfg.nics + 1)}:
+            raise web.HTTPNotFound()
+        return collection([f"/redfish/v1/Chassis/1/NetworkAdapters/{slot}/Ports/{p}" for p in (1, 2)])
+
+    async def adapter_port(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        slot, p = int(request.match_info["slot"]), int(request.match_info["n"])
+        if slot not in {nic_slot(n) for n in range(1, cfg.nics + 1)} or p not in (1, 2):
+            raise web.HTTPNotFound()
+        down = p == 1 and slot == nic_slot(1) and _faulty(host, "port", cfg.fault_rate)
+        return web.json_response({
+            "@odata.id": f"/redfish/v1/Chassis/1/NetworkAdapters/{slot}/Ports/{p}",
+            "Id": str(p),
+            "LinkStatus": "LinkDown" if down else "LinkUp",
+            "CurrentSpeedGbps": 0 if down else 400,
+        })
+
+    async def bios_firmware(request: web.Request) -> web.Response:
+        old = _faulty(_host_key(request), "biosfw", cfg.fault_rate)
+        return web.json_response({"Id": "BIOS", "Version": "2.1" if old else "2.3"})
+
+    async def gpu_bundle(request: web.Request) -> web.Response:
+        return web.json_response({
+            "Id": "bundle_active",
+            "Oem": {"AMD": {"VersionID": {"ComponentDetails": "MI300X-UBB-1.2.0"}}},
+        })
+
+    async def manager(request: web.Request) -> web.Response:
+        return web.json_response({"Id": "1", "FirmwareVersion": "01.03.12"})
+
+    async def bios_settings(request: web.Request) -> web.Response:
+        smt = "Enabled" if _faulty(_host_key(request), "smt", cfg.fault_rate) else "Disabled"
+        return web.json_response({"Id": "Bios", "Attributes": {"SMTControl": smt, "NUMANodesPerSocket": "NPS1"}})
+
+    def member(doc_fn: Callable[[str, int], Dict[str, Any]], count: int):
+        """Handler for /.../{n} serving doc_fn(host, n), 404 outside 1..count."""
+        async def get(request: web.Request) -> web.Response:
+            n = int(request.match_info["n"])
+            if not 1 <= n <= count:
+                raise web.HTTPNotFound()
+            return web.json_response(doc_fn(_host_key(request), n))
+        return get
+
+    def collection(members: List[str], request: Optional[web.Request] = None,
+                   expand: Optional[Callable[[str], Dict[str, Any]]] = None) -> web.Response:
+        """Members links, or the full resources for $expand when expand maps a link to its document."""
+        if expand is not None and request is not None and cfg.expand and "$expand" in request.query_string:
+            docs = [expand(m) for m in members]
+        else:
+            docs = [{"@odata.id": m} for m in members]
+        return web.json_response({"Members@odata.count": len(docs), "Members": docs})
+
+    async def memory_collection(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        # Like most BMCs, empty slots are listed too (Status.State Absent)
+        return collection([f"/redfish/v1/Systems/1/Memory/{n}" for n in range(1, cfg.dimm_slots + 1)], request,
+                          lambda m: dimm_doc(host, int(m.rsplit("/", 1)[1])))
+
+    async def pcie_collection(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        members = [f"/redfish/v1/Chassis/1/PCIeDevices/NVMeSSD{n}" for n in range(1, cfg.nvme_slots + 1)
+                   if _populated(host, "nvme", n, cfg.nvme_fill)]
+        members += [f"/redfish/v1/Chassis/1/PCIeDevices/GPU{n}" for n in range(1, cfg.gpus + 1)]
+        members += [f"/redfish/v1/Chassis/1/PCIeDevices/NIC{n}" for n in range(1, cfg.nics + 1)]
+
+        def expand(m: str) -> Dict[str, Any]:
+            seg = m.rsplit("/", 1)[1]
+            kind = seg.rstrip("0123456789")
+            return {"NVMeSSD": nvme_doc, "GPU": gpu_doc, "NIC": nic_doc}[kind](host, int(seg[len(kind):]))
+        return collection(members, request, expand)
+
+    async def processors_collection(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        return collection([f"/redfish/v1/Systems/1/Processors/{n}" for n in range(1, cfg.cpus + 1)], request,
+                          lambda m: cpu_doc(host, int(m.rsplit("/", 1)[1])))
+
+    async def eth_collection(request: web.Request) -> web.Response:
+        host = _host_key(request)
+        return collection([f"/redfish/v1/Systems/1/EthernetInterfaces/{n}" for n in range(1, cfg.eth_interfaces + 1)],
+                          request, lambda m: eth_doc(host, int(m.rsplit("/", 1)[1])))
+
+    async def drives_collection(request: web.Request) -> web.Response:
+        return collection([f"/redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives/Disk.Bay.{n}"
+                           for n in range(cfg.m2_bays)])
+
+    app = web.Application(middlewares=[inject])
+    app.add_routes([
+        web.get("/redfish/v1/PowerEquipment/RackPDUs/1/Outlets", outlets),
+        web.get("/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{n:\\d+}", outlet),
+        web.post("/redfish/v1/PowerEquipment/RackPDUs/1/Outlets/OUTLET{n:\\d+}/Actions/Outlet.PowerControl",
+                 outlet_power_control),
+        web.get("/redfish/v1/Chassis/1/Sensors/LiquidLeak", liquid_leak),
+        web.get("/redfish/v1/Chassis/1/Power", power),
+        web.get("/redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives/Disk.Bay.{n:\\d+}", m2_drive),
+        web.get("/redfish/v1/Chassis/1/PCIeDevices/NVMeSSD{n:\\d+}", nvme),
+        web.get("/redfish/v1/Systems/1/Memory/{n:\\d+}", member(dimm_doc, cfg.dimm_slots)),
+        web.get("/redfish/v1/Systems/1/Memory/{n:\\d+}/MemoryMetrics", memory_metrics),
+        web.get("/redfish/v1/Systems/1/Memory", memory_collection),
+        web.get("/redfish/v1/Chassis/1/PCIeDevices", pcie_collection),
+        web.get("/redfish/v1/Chassis/1/PCIeDevices/GPU{n:\\d+}", member(gpu_doc, cfg.gpus)),
+        web.get("/redfish/v1/Chassis/1/PCIeDevices/NIC{n:\\d+}", member(nic_doc, cfg.nics)),
+        web.get("/redfish/v1/Systems/1/Processors", processors_collection),
+        web.get("/redfish/v1/Systems/1/Processors/{n:\\d+}", member(cpu_doc, cfg.cpus)),
+        web.get("/redfish/v1/Systems/1/EthernetInterfaces", eth_collection),
+        web.get("/redfish/v1/Systems/1/EthernetInterfaces/{n:\\d+}", member(eth_doc, cfg.eth_interfaces)),
+        web.get("/redfish/v1/Chassis/HA-RAID.0.StorageEnclosure.0/Drives", drives_collection),
+        web.get("/redfish/v1/Chassis/1/PCIeDevices/NIC{n:\\d+}/PCIeFunctions/1", member(nic_function_doc, cfg.nics)),
+        web.get("/redfish/v1/Systems/1/EthernetInterfaces/NIC{n:\\d+}", member(nic_eth_doc, cfg.nics)),
+        web.get("/redfish/v1/Chassis/1/NetworkAdapters/{slot:\\d+}/Ports", adapter_ports),
+        web.get("/redfish/v1/Chassis/1/NetworkAdapters/{slot:\\d+}/Ports/{n:\\d+}", adapter_port),
+        web.get("/redfish/v1/UpdateService/FirmwareInventory/BIOS", bios_firmware),
+        web.get("/redfish/v1/UpdateService/FirmwareInventory/bundle_active", gpu_bundle),
+        web.get("/redfish/v1/Managers/1", manager),
+        web.get("/redfish/v1/Managers/1/", manager),           # query_firmware.sh's spelling
+        web.get("/redfish/v1/Systems/1/Bios", bios_settings),
+    ])
+    return app
+
+# ----
+# Running
+# ----
+
+def ensure_cert(cfg: SimConfig) -> SimConfig:
+    """Fill in cert/key for TLS, generating a throwaway self-signed pair with openssl."""
+    if not cfg.tls or (cfg.cert and cfg.key):
+        return cfg
+    if shutil.which("openssl") is None:
+        raise RuntimeError("--tls needs --cert/--key or the openssl CLI to generate them")
+    d = tempfile.mkdtemp(prefix="redfish-sim-")
+    cert, key = os.path.join(d, "cert.pem"), os.path.join(d, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+         "-subj", "/CN=redfish-sim", "-keyout", key, "-out", cert],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return SimConfig(**{**cfg.__dict__, "cert": cert, "key": key})
+
+def serve(cfg: SimConfig) -> None:
+    """Run one server process (blocking)."""
+    ssl_ctx = None
+    if cfg.tls:
+        ssl_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_ctx.load_cert_chain(cfg.cert, cfg.key)
+    web.run_app(
+        build_app(cfg),
+        host=cfg.host,
+        port=cfg.port,
+        ssl_context=ssl_ctx,
+        reuse_port=True,
+        backlog=4096,
+        print=None,
+        access_log=None,
+    )
+
+def start_in_background(cfg: SimConfig) -> List[mp.Process]:
+    """Start cfg.procs server processes; caller terminates them."""
+    cfg = ensure_cert(cfg)
+    ctx = mp.get_context("spawn")
+    procs = [ctx.Process(target=serve, args=(cfg,), daemon=True, name=f"redfish-sim-{i}") for i in range(cfg.procs)]
+    for p in procs:
+        p.start()
+    return procs
+
+async def wait_until_up(port: int, tls: bool, timeout: float = 15.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    ctx = None
+    if tls:
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    while True:
+        try:
+            _, w = await asyncio.open_connection("127.0.0.1", port, ssl=ctx)
+            w.close()
+            return
+        except OSError:
+            if loop.time() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+# ----
+# Inventory files for the tools under test
+# ----
+
+def fleet_hosts(n: int, port: int, net: int = 2) -> List[str]:
+    """n distinct loopback hosts 127.<net>.x.y:port (Linux routes all of 127/8 to lo)."""
+    return [f"127.{net}.{i // 250}.{i % 250 + 1}:{port}" for i in range(n)]
+
+def write_ipmi_json(path: str, n: int, port: int, prefix: str = "tus1-p") -> None:
+    """ipmi.json in the shape cluster_check/cluster_ttt.py expects (8 servers per rack)."""
+    nodes = [
+        {"name": f"{prefix}{i:05d}", "ip": ip, "username": "ADMIN", "password": "sim",
+         "rack": f"{i // 8:03d}", "ru": 33 - 4 * (i % 8)}
+        for i, ip in enumerate(fleet_hosts(n, port, net=2))
+    ]
+    with open(path, "w") as fh:
+        json.dump(nodes, fh)
+
+def write_pdu_list(path: str, n: int, port: int, prefix: str = "tus1-pdu") -> None:
+    """pdu_list.json with the 8 PDUs (L1..R4) of every rack write_ipmi_json(n) fills."""
+    racks = (n + 7) // 8
+    nodes = [
+        {"name": f"{prefix}-{rack:03d}-{p}", "ip": f"{_pdu_host(rack, p)}:{port}", "username": "admin", "password": "sim"}
+        for rack in range(racks) for p in PDU_POSITIONS
+    ]
+    with open(path, "w") as fh:
+        json.dump(nodes, fh)
+
+def write_pdu_config(path: str, n: int, port: int, scheme: str, outlets: Tuple[int, ...] = (10, 12, 18, 20, 26, 28, 38, 40),
+                     extra: Optional[Dict[str, Any]] = None) -> None:
+    """config.yaml for redfish_pdu_exporter pointing at n simulated PDUs."""
+    raw: Dict[str, Any] = {
+        "scheme": scheme,
+        "auth": {"groups": {"sim": {"user": "admin", "pass": "sim"}}},
+        "targets": [
+            {"pdu": f"sim-pdu-{i:05d}", "ip": ip, "auth_group": "sim", "outlets": list(outlets),
+             "rack": f"{i // 4:03d}", "row": ("L1", "L2", "R1", "R2")[i % 4]}
+            for i, ip in enumerate(fleet_hosts(n, port, net=1))
+        ],
+    }
+    raw.update(extra or {})
+    with open(path, "w") as fh:
+        yaml.safe_dump(raw, fh, sort_keys=False)
+
+# ----
+# CLI
+# ----
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Local Redfish PDU/BMC simulator")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=18443)
+    ap.add_argument("--procs", type=int, default=1, help="Server processes sharing the port")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    ap.add_argument("--tls", action="store_true")
+    ap.add_argument("--cert")
+    ap.add_argument("--key")
+    ap.add_argument("--no-expand", action="store_true", help="Ignore $expand on the Outlets collection")
+    ap.add_argument("--dimm-fill", type=float, default=1.0)
+    ap.add_argument("--nvme-fill", type=float, default=1.0)
+    ap.add_argument("--fault-rate", type=float, default=0.0, help="Fraction of hosts with each simulated fault")
+    ap.add_argument("--power-settle", type=float, default=1.0, help="Seconds before a switched outlet shows on the meters")
+    ap.add_argument("--write-inventory", action="store_true", help="Write ipmi.json, pdu_list.json and pdu_config.yaml and exit")
+    ap.add_argument("--fleet", type=int, default=1000, help="Hosts per inventory file")
+    return ap.parse_args()
+
+def main():
+    a = parse_args()
+    if a.write_inventory:
+        scheme = "https" if a.tls else "http"
+        write_ipmi_json("ipmi.json", a.fleet, a.port)
+        write_pdu_list("pdu_list.json", a.fleet, a.port)
+        write_pdu_config("pdu_config.yaml", a.fleet, a.port, scheme)
+        print(f"[SUCCESS] Wrote ipmi.json, pdu_list.json and pdu_config.yaml for {a.fleet} hosts on port {a.port}")
+        return
+    cfg = SimConfig(
+        host=a.host, port=a.port, procs=a.procs, latency_ms=a.latency_ms, jitter_ms=a.jitter_ms,
+        error_rate=a.error_rate, tls=a.tls, cert=a.cert, key=a.key, expand=not a.no_expand,
+        dimm_fill=a.dimm_fill, nvme_fill=a.nvme_fill, fault_rate=a.fault_rate,
+        power_settle_s=a.power_settle,
+    )
+    cfg = ensure_cert(cfg)
+    print(f"[SUCCESS] Redfish simulator on {'https' if cfg.tls else 'http'}://{cfg.host}:{cfg.port} x{cfg.procs}")
+    if cfg.procs == 1:
+        serve(cfg)
+        return
+    procs = start_in_background(cfg)
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+
+if __name__ == "__main__":
+    main()